@@ -0,0 +1,72 @@
+"""add session indexes
+
+Revision ID: 8e88118a8890
+Revises: 810ced14e449
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e88118a8890"
+down_revision: Union[str, Sequence[str], None] = "810ced14e449"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в sessions, но не работает в транзакции
+    with op.get_context().autocommit_block():
+        # get_session_info, abort_session: поиск по uuid на каждый запрос
+        op.create_index(
+            op.f("ix_sessions_uuid"),
+            "sessions",
+            ["uuid"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        # get_user_sessions: сессии пользователя по времени
+        op.create_index(
+            op.f("ix_sessions_sub_timestamp"),
+            "sessions",
+            ["sub", "timestamp"],
+            postgresql_concurrently=True,
+        )
+        # get_same_session: поиск дубля при входе без обращения к таблице
+        op.create_index(
+            op.f("ix_sessions_sub_ip_name"),
+            "sessions",
+            ["sub", "ip", "name"],
+            postgresql_include=["uuid", "status"],
+            postgresql_concurrently=True,
+        )
+        # Активные сессии по времени — для их устаревания
+        op.create_index(
+            op.f("ix_sessions_active_timestamp"),
+            "sessions",
+            ["timestamp"],
+            postgresql_where=sa.text("status = 'ACTIVE'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_sessions_active_timestamp",
+            "ix_sessions_sub_ip_name",
+            "ix_sessions_sub_timestamp",
+            "ix_sessions_uuid",
+        ):
+            op.drop_index(
+                op.f(name),
+                table_name="sessions",
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,82 @@
+"""unique session per device
+
+Revision ID: fea4c23d86e1
+Revises: 8e88118a8890
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.exc import IntegrityError
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fea4c23d86e1"
+down_revision: Union[str, Sequence[str], None] = "8e88118a8890"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_UNIQUE_INDEX = "uq_sessions_sub_ip_name"
+_BUILD_ATTEMPTS = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for attempt in range(1, _BUILD_ATTEMPTS + 1):
+            # Упавший CREATE INDEX CONCURRENTLY оставляет INVALID индекс,
+            # который не даст повторить сборку — убираем его
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_UNIQUE_INDEX}")
+            # Дубли, созданные одновременными входами; get_same_session
+            # всегда возвращал строку с наименьшим id — её и оставляем.
+            # Пишущие не остановлены, поэтому новый дубль может появиться
+            # между DELETE и сборкой индекса: тогда повторяем
+            op.execute(
+                """
+                DELETE FROM sessions AS s
+                USING sessions AS kept
+                WHERE s.sub = kept.sub
+                  AND s.ip = kept.ip
+                  AND s.name = kept.name
+                  AND s.id > kept.id
+                """
+            )
+            try:
+                op.create_index(
+                    op.f(_UNIQUE_INDEX),
+                    "sessions",
+                    ["sub", "ip", "name"],
+                    unique=True,
+                    postgresql_include=["uuid", "status"],
+                    postgresql_concurrently=True,
+                )
+                break
+            except IntegrityError:
+                if attempt == _BUILD_ATTEMPTS:
+                    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_UNIQUE_INDEX}")
+                    raise
+        op.drop_index(
+            op.f("ix_sessions_sub_ip_name"),
+            table_name="sessions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_sessions_sub_ip_name"),
+            "sessions",
+            ["sub", "ip", "name"],
+            postgresql_include=["uuid", "status"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("uq_sessions_sub_ip_name"),
+            table_name="sessions",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,42 @@
+"""inactive sessions index
+
+Revision ID: 071c87284201
+Revises: fea4c23d86e1
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "071c87284201"
+down_revision: Union[str, Sequence[str], None] = "fea4c23d86e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SessionGC: отключённые и истёкшие сессии по времени для удаления
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_sessions_inactive_timestamp"),
+            "sessions",
+            ["timestamp"],
+            postgresql_where=sa.text("status <> 'ACTIVE'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_sessions_inactive_timestamp"),
+            table_name="sessions",
+            postgresql_concurrently=True,
+        )
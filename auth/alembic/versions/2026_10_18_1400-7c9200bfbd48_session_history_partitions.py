@@ -0,0 +1,77 @@
+"""session history partitions
+
+Revision ID: 7c9200bfbd48
+Revises: 071c87284201
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from datetime import UTC, date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c9200bfbd48"
+down_revision: Union[str, Sequence[str], None] = "071c87284201"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _month(start: date, shift: int) -> date:
+    index = start.year * 12 + start.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "session_history",
+        sa.Column(
+            "archived_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column("uuid", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "ACTIVE", "EXPIRED", "DISABLED", name="session_status", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("sub", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("ip", sa.String(), nullable=False),
+        sa.Column("can_abort", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("archived_at", "id", name=op.f("pk_session_history")),
+        postgresql_partition_by="RANGE (archived_at)",
+    )
+    op.create_index(
+        op.f("ix_session_history_sub_archived_at"),
+        "session_history",
+        ["sub", "archived_at"],
+    )
+    # Дальше секции заранее создаёт jobs.partitions
+    # Месяцы в UTC, как в jobs/partitions.py
+    today = datetime.now(UTC).date().replace(day=1)
+    for shift in range(3):
+        start, end = _month(today, shift), _month(today, shift + 1)
+        op.execute(
+            f"CREATE TABLE session_history_p{start:%Y_%m} "
+            f"PARTITION OF session_history "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Подключённые секции удаляются вместе с родительской таблицей,
+    # отсоединённые jobs.partitions остаются отдельными таблицами
+    op.drop_table("session_history")
@@ -0,0 +1,52 @@
+"""sessions keyset index
+
+Revision ID: 08afb8dadc26
+Revises: 7c9200bfbd48
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "08afb8dadc26"
+down_revision: Union[str, Sequence[str], None] = "7c9200bfbd48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (timestamp, id) > (:timestamp, :id) по индексу без сортировки;
+    # старый (sub, timestamp) — его префикс и больше не нужен
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_sessions_sub_timestamp_id"),
+            "sessions",
+            ["sub", "timestamp", "id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("ix_sessions_sub_timestamp"),
+            table_name="sessions",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_sessions_sub_timestamp"),
+            "sessions",
+            ["sub", "timestamp"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("ix_sessions_sub_timestamp_id"),
+            table_name="sessions",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,203 @@
+"""native uuid, inet and user_agents: expand
+
+Revision ID: 84644489ce90
+Revises: 08afb8dadc26
+Create Date: 2026-10-18 16:00:00.000000
+
+Первая половина перехода на uuid/inet без остановки записи. Рядом со
+старыми текстовыми колонками появляются новые, триггер заполняет их у
+новых и изменённых строк, а существующие строки переносятся пачками,
+каждая в своей транзакции. Индексы строятся CONCURRENTLY, NOT NULL
+проверяется через CHECK ... NOT VALID + VALIDATE. Старый код приложения
+продолжает работать до a3f1c9e07b52, которая переключает колонки и
+выкатывается вместе с новым кодом.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "84644489ce90"
+down_revision: Union[str, Sequence[str], None] = "08afb8dadc26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+NEW_COLUMNS = {
+    "users": ("id_new",),
+    "sessions": ("id_new", "uuid_new", "sub_new", "ip_new", "user_agent_id"),
+}
+
+
+def _backfill(table: str, assignments: str) -> None:
+    """
+    Заполняет новые колонки пачками по BATCH_SIZE строк в порядке id:
+    блокировки строк держатся одну короткую транзакцию.
+    """
+    bind = op.get_bind()
+    after = ""
+    while True:
+        after = bind.execute(
+            sa.text(
+                f"""
+                WITH batch AS (
+                    SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :limit
+                ), updated AS (
+                    UPDATE {table} AS t SET {assignments}
+                    FROM batch
+                    WHERE t.id = batch.id
+                )
+                SELECT max(id) FROM batch
+                """
+            ),
+            {"after": after, "limit": BATCH_SIZE},
+        ).scalar()
+        if after is None:
+            break
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_agents",
+        sa.Column("id", sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_user_agents")),
+        sa.UniqueConstraint("name", name=op.f("uq_user_agents_name")),
+    )
+    # Колонки без DEFAULT добавляются без перезаписи таблицы
+    op.add_column("users", sa.Column("id_new", sa.UUID(), nullable=True))
+    op.add_column("sessions", sa.Column("id_new", sa.UUID(), nullable=True))
+    op.add_column("sessions", sa.Column("uuid_new", sa.UUID(), nullable=True))
+    op.add_column("sessions", sa.Column("sub_new", sa.UUID(), nullable=True))
+    op.add_column("sessions", sa.Column("ip_new", postgresql.INET(), nullable=True))
+    op.add_column("sessions", sa.Column("user_agent_id", sa.Integer(), nullable=True))
+
+    # Строки, которые старый код пишет во время переноса
+    op.execute(
+        """
+        CREATE FUNCTION users_uuid_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.id_new := NEW.id::uuid;
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER users_uuid_sync
+        BEFORE INSERT OR UPDATE OF id ON users
+        FOR EACH ROW EXECUTE FUNCTION users_uuid_sync()
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION sessions_uuid_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.id_new := NEW.id::uuid;
+            NEW.uuid_new := NEW.uuid::uuid;
+            NEW.sub_new := NEW.sub::uuid;
+            NEW.ip_new := NEW.ip::inet;
+            INSERT INTO user_agents (name) VALUES (NEW.name)
+            ON CONFLICT (name) DO NOTHING;
+            SELECT id INTO NEW.user_agent_id FROM user_agents WHERE name = NEW.name;
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER sessions_uuid_sync
+        BEFORE INSERT OR UPDATE OF id, uuid, sub, ip, name ON sessions
+        FOR EACH ROW EXECUTE FUNCTION sessions_uuid_sync()
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            INSERT INTO user_agents (name)
+            SELECT DISTINCT name FROM sessions
+            ON CONFLICT (name) DO NOTHING
+            """
+        )
+        _backfill("users", "id_new = t.id::uuid")
+        _backfill(
+            "sessions",
+            """
+            id_new = t.id::uuid,
+            uuid_new = t.uuid::uuid,
+            sub_new = t.sub::uuid,
+            ip_new = t.ip::inet,
+            user_agent_id = (SELECT ua.id FROM user_agents AS ua WHERE ua.name = t.name)
+            """,
+        )
+
+        # Будущие первичные ключи и индексы; a3f1c9e07b52 только переименует
+        op.create_index(
+            "users_id_new_key",
+            "users",
+            ["id_new"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "sessions_id_new_key",
+            "sessions",
+            ["id_new"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "sessions_uuid_new_key",
+            "sessions",
+            ["uuid_new"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "sessions_sub_new_timestamp_id_new_idx",
+            "sessions",
+            ["sub_new", "timestamp", "id_new"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "sessions_sub_new_ip_new_user_agent_id_key",
+            "sessions",
+            ["sub_new", "ip_new", "user_agent_id"],
+            unique=True,
+            postgresql_include=["uuid_new", "status"],
+            postgresql_concurrently=True,
+        )
+
+        # SET NOT NULL после переключения опирается на проверенный CHECK
+        # и не сканирует таблицу под ACCESS EXCLUSIVE
+        for table, columns in NEW_COLUMNS.items():
+            for column in columns:
+                op.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_not_null "
+                    f"CHECK ({column} IS NOT NULL) NOT VALID"
+                )
+                op.execute(
+                    f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_not_null"
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # После отката a3f1c9e07b52 новых колонок уже нет, поэтому IF EXISTS
+    op.execute("DROP TRIGGER IF EXISTS sessions_uuid_sync ON sessions")
+    op.execute("DROP FUNCTION IF EXISTS sessions_uuid_sync()")
+    op.execute("DROP TRIGGER IF EXISTS users_uuid_sync ON users")
+    op.execute("DROP FUNCTION IF EXISTS users_uuid_sync()")
+    for table, columns in NEW_COLUMNS.items():
+        for column in columns:
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {column}")
+    op.drop_table("user_agents")
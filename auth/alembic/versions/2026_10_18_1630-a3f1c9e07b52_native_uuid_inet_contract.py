@@ -0,0 +1,183 @@
+"""native uuid, inet and user_agents: contract
+
+Revision ID: a3f1c9e07b52
+Revises: 84644489ce90
+Create Date: 2026-10-18 16:30:00.000000
+
+Вторая половина: новые колонки занимают место старых. Переключение —
+одна транзакция из операций над метаданными (DROP COLUMN, RENAME,
+PRIMARY KEY USING INDEX, SET NOT NULL по проверенному CHECK), поэтому
+ACCESS EXCLUSIVE держится миллисекунды; внешние ключи добавляются
+NOT VALID и проверяются после. Выкатывается вместе с кодом, который
+работает с uuid, inet и user_agent_id.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f1c9e07b52"
+down_revision: Union[str, Sequence[str], None] = "84644489ce90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RENAMED = {
+    "users": ("id",),
+    "sessions": ("id", "uuid", "sub", "ip"),
+}
+
+INDEXES = {
+    "sessions_uuid_new_key": "ix_sessions_uuid",
+    "sessions_sub_new_timestamp_id_new_idx": "ix_sessions_sub_timestamp_id",
+    "sessions_sub_new_ip_new_user_agent_id_key": "uq_sessions_sub_ip_user_agent_id",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Не ждать долгих транзакций в очереди за ACCESS EXCLUSIVE:
+    # лучше упасть и повторить миграцию, чем остановить входы
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("DROP TRIGGER sessions_uuid_sync ON sessions")
+    op.execute("DROP FUNCTION sessions_uuid_sync()")
+    op.execute("DROP TRIGGER users_uuid_sync ON users")
+    op.execute("DROP FUNCTION users_uuid_sync()")
+
+    op.execute("ALTER TABLE sessions DROP CONSTRAINT fk_sessions_sub_users")
+    op.execute("ALTER TABLE users DROP CONSTRAINT pk_users")
+    op.execute("ALTER TABLE sessions DROP CONSTRAINT pk_sessions")
+    # Вместе со старыми колонками уходят их индексы
+    op.execute("ALTER TABLE users DROP COLUMN id")
+    op.execute(
+        "ALTER TABLE sessions"
+        " DROP COLUMN id, DROP COLUMN uuid, DROP COLUMN sub,"
+        " DROP COLUMN ip, DROP COLUMN name"
+    )
+    for table, columns in RENAMED.items():
+        for column in columns:
+            op.execute(f"ALTER TABLE {table} RENAME COLUMN {column}_new TO {column}")
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_new_not_null")
+    op.execute("ALTER TABLE sessions ALTER COLUMN user_agent_id SET NOT NULL")
+    op.execute("ALTER TABLE sessions DROP CONSTRAINT sessions_user_agent_id_not_null")
+
+    op.execute("ALTER TABLE users ADD CONSTRAINT pk_users PRIMARY KEY USING INDEX users_id_new_key")
+    op.execute(
+        "ALTER TABLE sessions ADD CONSTRAINT pk_sessions PRIMARY KEY USING INDEX sessions_id_new_key"
+    )
+    for old, new in INDEXES.items():
+        op.execute(f"ALTER INDEX {old} RENAME TO {new}")
+    op.execute(
+        "ALTER TABLE sessions ADD CONSTRAINT fk_sessions_sub_users"
+        " FOREIGN KEY (sub) REFERENCES users (id) ON DELETE CASCADE NOT VALID"
+    )
+    op.execute(
+        "ALTER TABLE sessions ADD CONSTRAINT fk_sessions_user_agent_id_user_agents"
+        " FOREIGN KEY (user_agent_id) REFERENCES user_agents (id) NOT VALID"
+    )
+
+    with op.get_context().autocommit_block():
+        # SHARE UPDATE EXCLUSIVE: проверка не мешает чтению и записи
+        op.execute("ALTER TABLE sessions VALIDATE CONSTRAINT fk_sessions_sub_users")
+        op.execute(
+            "ALTER TABLE sessions VALIDATE CONSTRAINT fk_sessions_user_agent_id_user_agents"
+        )
+
+        # Архив пишет только SessionGC, поэтому он переводится на месте
+        op.execute(
+            """
+            INSERT INTO user_agents (name)
+            SELECT DISTINCT name FROM session_history
+            ON CONFLICT (name) DO NOTHING
+            """
+        )
+        op.execute(
+            """
+            ALTER TABLE session_history
+                ADD COLUMN user_agent_id integer,
+                ALTER COLUMN id TYPE uuid USING id::uuid,
+                ALTER COLUMN uuid TYPE uuid USING uuid::uuid,
+                ALTER COLUMN sub TYPE uuid USING sub::uuid,
+                ALTER COLUMN ip TYPE inet USING ip::inet
+            """
+        )
+        op.execute(
+            """
+            UPDATE session_history AS h SET user_agent_id = ua.id
+            FROM user_agents AS ua
+            WHERE ua.name = h.name
+            """
+        )
+        op.execute(
+            """
+            ALTER TABLE session_history
+                ALTER COLUMN user_agent_id SET NOT NULL,
+                DROP COLUMN name,
+                ADD CONSTRAINT fk_session_history_user_agent_id_user_agents
+                    FOREIGN KEY (user_agent_id) REFERENCES user_agents (id)
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Обратно на месте, с перезаписью таблиц под блокировкой
+    op.execute(
+        """
+        ALTER TABLE session_history
+            DROP CONSTRAINT fk_session_history_user_agent_id_user_agents,
+            ADD COLUMN name varchar
+        """
+    )
+    op.execute(
+        """
+        UPDATE session_history AS h SET name = ua.name
+        FROM user_agents AS ua
+        WHERE ua.id = h.user_agent_id
+        """
+    )
+    op.execute(
+        """
+        ALTER TABLE session_history
+            ALTER COLUMN name SET NOT NULL,
+            DROP COLUMN user_agent_id,
+            ALTER COLUMN id TYPE varchar USING id::text,
+            ALTER COLUMN uuid TYPE varchar USING uuid::text,
+            ALTER COLUMN sub TYPE varchar USING sub::text,
+            ALTER COLUMN ip TYPE varchar USING host(ip)
+        """
+    )
+
+    op.execute("ALTER TABLE sessions DROP CONSTRAINT fk_sessions_sub_users")
+    op.execute("ALTER TABLE sessions DROP CONSTRAINT fk_sessions_user_agent_id_user_agents")
+    op.execute("ALTER TABLE users ALTER COLUMN id TYPE varchar USING id::text")
+    op.execute("ALTER TABLE sessions ADD COLUMN name varchar")
+    op.execute(
+        """
+        UPDATE sessions AS s SET name = ua.name
+        FROM user_agents AS ua
+        WHERE ua.id = s.user_agent_id
+        """
+    )
+    op.execute("DROP INDEX uq_sessions_sub_ip_user_agent_id")
+    op.execute(
+        """
+        ALTER TABLE sessions
+            ALTER COLUMN name SET NOT NULL,
+            DROP COLUMN user_agent_id,
+            ALTER COLUMN id TYPE varchar USING id::text,
+            ALTER COLUMN uuid TYPE varchar USING uuid::text,
+            ALTER COLUMN sub TYPE varchar USING sub::text,
+            ALTER COLUMN ip TYPE varchar USING host(ip)
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_sessions_sub_ip_name"
+        " ON sessions (sub, ip, name) INCLUDE (uuid, status)"
+    )
+    op.execute(
+        "ALTER TABLE sessions ADD CONSTRAINT fk_sessions_sub_users"
+        " FOREIGN KEY (sub) REFERENCES users (id) ON DELETE CASCADE"
+    )
@@ -1,10 +1,9 @@
-import uuid
-
-import httpx
 from fastapi import APIRouter, Request, Response, Depends
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from audit import LoginEvent, emit
+from core.models.base import get_uuid_str
 from core.schemas.token import SessionCreate
 from core.schemas.user import UserRead
 from crud.tokens import create_session
@@ -46,9 +45,9 @@ async def google_callback(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
 ):
     token_json = await get_json_google_token(code)
-    payload = get_google_user_payload(token_json)
+    payload = await get_google_user_payload(token_json)
     session_name = get_session_name(request)
-    session_uuid = str(uuid.uuid4())
+    session_uuid = get_uuid_str()
     google_user_id = payload["sub"]
 
     user = await validate_google_id(google_id=google_user_id, session=session)
@@ -61,6 +60,15 @@ async def google_callback(
         ip=request.client.host,
     )
     got_session = await create_session(session, user_session)
+    emit(
+        LoginEvent(
+            ip=request.client.host,
+            user_id=user.id,
+            session_uuid=got_session.uuid,
+            reused_session=got_session.uuid != session_uuid,
+            device=session_name,
+        )
+    )
     response = RedirectResponse(settings.google.redirect_after_auth_url)
 
     return await create_and_set_tokens_to_cookie(
@@ -1,8 +1,8 @@
+import time
 from datetime import timedelta
 from typing import Annotated, Any
 
 import jwt
-from jwt import PyJWKClient
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Form, Depends, Request
@@ -11,7 +11,11 @@ from starlette.requests import Request
 from starlette.responses import Response
 from user_agents import parse
 
-from api.exceptions.auth import InvalidCredentialsException, NoIdTokenException
+from api.exceptions.auth import (
+    InvalidCredentialsException,
+    InvalidTokenException,
+    NoIdTokenException,
+)
 
 from core.config import (
     settings,
@@ -19,10 +23,23 @@ from core.config import (
     ACCESS_TOKEN_TYPE,
     REFRESH_TOKEN_TYPE,
 )
+from core.http import HttpClient
+from core.metrics import JWT_SECONDS
 from core.models import User, db_helper
 from core.schemas.user import UserAuth, UserReg, UserRead
 from crud.users import get_user_by_username, create_user
 from utils import auth as auth_utils
+from utils.executor import crypto_executor
+from utils.jwks import JWKSCache
+
+google_jwks = JWKSCache(
+    settings.google.jwks_url,
+    default_max_age=settings.google.jwks_default_max_age,
+    min_refetch_seconds=settings.google.jwks_min_refetch_seconds,
+)
+
+
+_encode_seconds = JWT_SECONDS.labels("encode")
 
 
 def create_jwt(
@@ -64,11 +81,16 @@ class CreateToken:
         else:
             expire_timedelta = timedelta(days=settings.auth.refresh_token_expire_days)
 
-        return create_jwt(
-            token_type=self.token_type,
-            payload=jwt_payload,
-            expire_timedelta=expire_timedelta,
-        )
+        started = time.perf_counter()
+        try:
+            return await crypto_executor.run(
+                create_jwt,
+                token_type=self.token_type,
+                payload=jwt_payload,
+                expire_timedelta=expire_timedelta,
+            )
+        finally:
+            _encode_seconds.observe(time.perf_counter() - started)
 
 
 async def validate_google_id(
@@ -123,20 +145,24 @@ async def get_json_google_token(code: str):
         "grant_type": settings.google.grant_type,
     }
 
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(settings.google.token_url, data=data)
-        token_json = token_response.json()
+    token_response = await HttpClient.get().post(settings.google.token_url, data=data)
+    token_json = token_response.json()
 
-        return token_json
+    return token_json
 
 
-def get_google_user_payload(token_json: Any):
+async def get_google_user_payload(token_json: Any):
     id_token = token_json.get("id_token")
     if not id_token:
         raise NoIdTokenException
 
-    jwk_client = PyJWKClient(settings.google.jwks_url)
-    signing_key = jwk_client.get_signing_key_from_jwt(id_token)
+    try:
+        kid = jwt.get_unverified_header(id_token).get("kid")
+    except jwt.InvalidTokenError:
+        raise InvalidTokenException
+    signing_key = await google_jwks.get_signing_key(kid)
+    if signing_key is None:
+        raise InvalidTokenException
     payload = jwt.decode(
         id_token,
         signing_key.key,
@@ -1,24 +1,32 @@
-from typing import Annotated, Sequence
+from datetime import datetime, timedelta, UTC
+from typing import Annotated
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Response, Request, Form, status
+from fastapi import APIRouter, Depends, Response, Request, Form, Query, status
 from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger as log
 
-from core.schemas.token import SessionRead
+from audit import LogoutEvent, RefreshEvent, SessionAbortEvent, emit
+from core.models.user import SessionStatus
+from core.schemas.token import SessionHistoryRead, SessionPage, SessionRead
+from crud.history import get_session_history
 from crud.tokens import (
     abort_session,
-    get_user_sessions,
+    get_user_sessions_page,
     abort_another_session,
 )
 from .helpers import create_access_token
 from core.config import settings, REFRESH_TOKEN_TYPE
 from core.schemas.user import UserRead
 from core.models import db_helper
+from core.models.db_helper import LazyReadSession
 from .validation import (
     get_current_auth_user_for_refresh,
     get_current_auth_user,
     get_session_info_from_payload,
+    read_session_of_access_token,
+    verify_access_token,
     TokenPayloadGetter,
 )
 
@@ -45,8 +53,7 @@ async def ping():
 @router.get("/verify")
 async def verify_jwt(
     request: Request,
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
-    verify: UserRead = Depends(get_session_info_from_payload),
+    payload: dict = Depends(verify_access_token),
 ):
     return ORJSONResponse(
         {
@@ -81,6 +88,13 @@ async def auto_refresh_jwt(
         secure=True,
         httponly=True,
     )
+    emit(
+        RefreshEvent(
+            ip=request.client.host,
+            user_id=user.id,
+            session_uuid=payload.get("session_uuid"),
+        )
+    )
     log.info(
         "[%(ip)s] [REFRESH] access_token %(user)s (id=%(id)s)"
         % {"ip": request.client.host, "user": user.username, "id": user.id},
@@ -95,12 +109,21 @@ async def logout_user(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     session_data: SessionRead = Depends(get_session_info_from_payload),
 ):
-    await abort_session(session=session, uuid=session_data.uuid)
+    await abort_session(
+        session=session, uuid=session_data.uuid, sub_id=session_data.sub
+    )
     response.delete_cookie(
         key="refresh_token",
         secure=True,
         httponly=True,
     )
+    emit(
+        LogoutEvent(
+            ip=request.client.host,
+            user_id=session_data.sub,
+            session_uuid=session_data.uuid,
+        )
+    )
     log.info(
         "[%(ip)s] [LOGOUT] session %(session_uuid)s (id=%(id)s)"
         % {
@@ -123,20 +146,29 @@ async def abort_user_session(
     request: Request,
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     session_data: SessionRead = Depends(get_session_info_from_payload),
-    sui: str = Form(),
+    # Не-uuid отсекается валидацией до запроса к uuid-колонке
+    sui: UUID = Form(),
 ):
 
     # if not session_data.can_abort:
     #     raise NeedMorePermission
 
     await abort_another_session(
-        session=session, current_user_uuid=session_data.sub, uuid=sui
+        session=session, current_user_uuid=session_data.sub, uuid=str(sui)
+    )
+    emit(
+        SessionAbortEvent(
+            ip=request.client.host,
+            user_id=session_data.sub,
+            session_uuid=session_data.uuid,
+            aborted_session_uuid=str(sui),
+        )
     )
     log.info(
         "[%(ip)s] [ABORT SESSION] session %(session_uuid)s (id=%(id)s)"
         % {
             "ip": request.client.host,
-            "id": sui,
+            "id": str(sui),
             "session_uuid": session_data.sub,
         },
     )
@@ -149,10 +181,41 @@ async def abort_user_session(
     )
 
 
-@router.get("/sessions", response_model=Sequence[SessionRead])
+@router.get("/sessions", response_model=SessionPage)
 async def get_sessions(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    read_session: Annotated[LazyReadSession, Depends(read_session_of_access_token)],
+    user: UserRead = Depends(get_current_auth_user),
+    limit: Annotated[
+        int, Query(ge=1, le=settings.sessions.max_page_size)
+    ] = settings.sessions.page_size,
+    cursor: str | None = None,
+    status: SessionStatus | None = None,
+):
+    return await get_user_sessions_page(
+        await read_session(), sub_id=str(user.id), limit=limit, cursor=cursor, status=status
+    )
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # archived_at — timestamp without time zone, БД работает в UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+@router.get("/sessions/history", response_model=list[SessionHistoryRead])
+async def get_sessions_history(
+    read_session: Annotated[LazyReadSession, Depends(read_session_of_access_token)],
     user: UserRead = Depends(get_current_auth_user),
+    since: datetime | None = None,
+    until: datetime | None = None,
 ):
-    sessions = await get_user_sessions(session, sub_id=str(user.id))
-    return sessions
+    """Архив сессий, перенесённых сборщиком; по умолчанию за последние 30 дней."""
+    if since is None:
+        since = datetime.now(UTC) - timedelta(days=30)
+    return await get_session_history(
+        await read_session(),
+        sub_id=str(user.id),
+        since=_naive_utc(since),
+        until=_naive_utc(until) if until is not None else None,
+    )
@@ -1,8 +1,10 @@
-from typing import Annotated, Literal
+import asyncio
+import functools
+import time
+from typing import Annotated, Any, AsyncGenerator, Literal
 
 from fastapi import Depends, Request
 from jwt import InvalidTokenError
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.exceptions.auth import (
     InvalidTokenException,
@@ -10,50 +12,141 @@ from api.exceptions.auth import (
     TokenExpiredException,
 )
 
+from core.metrics import JWT_SECONDS, JWT_VERIFIED_CACHE
 from core.models import db_helper
+from core.models.db_helper import LazyReadSession
+from crud.loaders import session_loader, user_loader
 from crud.tokens import get_session_info
 from crud.users import get_user_by_id
 from utils.auth import validate_token_type
-from core.config import ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
+from core.config import settings, ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
+from core.redis.revocation import RevocationSet
+from core.schemas.user import UserRead
 from utils import auth as auth_utils
+from utils.executor import crypto_executor
 from core.models.user import SessionStatus, User
 
 
+_decode_seconds = JWT_SECONDS.labels("decode")
+_verified_hits = JWT_VERIFIED_CACHE.labels("hit")
+_verified_misses = JWT_VERIFIED_CACHE.labels("miss")
+
+
 class TokenPayloadGetter:
     def __init__(self, token_type: Literal["access", "refresh"] = ACCESS_TOKEN_TYPE):
         self.token_type = token_type + "_token"
 
+    # Равные экземпляры — одна зависимость: FastAPI разбирает токен раз за запрос
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TokenPayloadGetter) and other.token_type == self.token_type
+
+    def __hash__(self) -> int:
+        return hash((TokenPayloadGetter, self.token_type))
+
     async def __call__(self, request: Request) -> dict:
         token = request.cookies.get(self.token_type)
         if not token:
             raise TokenUnidentifiedException
+        # Уже проверенный токен не требует криптографии и пула
+        if (payload := auth_utils.peek_verified(token)) is not None:
+            _verified_hits.inc()
+            return payload
+        _verified_misses.inc()
+        started = time.perf_counter()
         try:
-            payload = auth_utils.decode_jwt(token=token)
+            payload = await crypto_executor.run(
+                auth_utils.decode_jwt, token=token, size=len(token)
+            )
         except InvalidTokenError:
             raise InvalidTokenException
+        finally:
+            _decode_seconds.observe(time.perf_counter() - started)
+        if crypto_executor.mode == "process":
+            # Кэш проверенных токенов дочернего процесса здесь не виден
+            auth_utils.remember_verified(token, payload)
         return payload
 
 
+@functools.cache
+def read_session_of_token(token_type: Literal["access", "refresh"] = ACCESS_TOKEN_TYPE):
+    """
+    Ленивая сессия БД для чтения от имени владельца токена: реплика, если
+    пользователь недавно не писал, иначе primary. Одна зависимость на тип
+    токена — все её потребители в запросе делят одну сессию, а база
+    выбирается, только если сессия кому-то понадобилась.
+    """
+    async def read_session_getter(
+        payload: dict = Depends(TokenPayloadGetter(token_type)),
+    ) -> AsyncGenerator[LazyReadSession, None]:
+        read_session = db_helper.lazy_read_session(payload.get("sub"))
+        try:
+            yield read_session
+        finally:
+            await read_session.close()
+
+    return read_session_getter
+
+
+read_session_of_access_token = read_session_of_token(ACCESS_TOKEN_TYPE)
+read_session_of_refresh_token = read_session_of_token(REFRESH_TOKEN_TYPE)
+
+
+def is_stateless(token_type: str) -> bool:
+    """Refresh-токены всегда сверяются с сессией в БД."""
+    return (
+        token_type == ACCESS_TOKEN_TYPE
+        and settings.auth.verification_mode == "stateless"
+    )
+
+
+def check_not_revoked(payload: dict) -> None:
+    if RevocationSet.is_revoked(payload.get("session_uuid")):
+        raise TokenExpiredException
+
+
+async def load_session_info(read_session: LazyReadSession, uuid: str) -> Any:
+    if settings.loader.enabled:
+        return await session_loader.load(uuid)
+    return await get_session_info(session=await read_session(), uuid=uuid)
+
+
 def get_user_by_token_of_type(token_type: Literal["access", "refresh"]):
     async def get_user_by_token_sub(
-        session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+        read_session: Annotated[
+            LazyReadSession, Depends(read_session_of_token(token_type))
+        ],
         payload: dict = Depends(TokenPayloadGetter(token_type)),
-    ) -> User:
+    ) -> User | UserRead:
 
         validate_token_type(payload=payload, got_token_type=token_type)
 
-        session_info = await get_session_info(
-            session=session, uuid=payload.get("session_uuid")
-        )
+        if is_stateless(token_type):
+            check_not_revoked(payload)
+            return UserRead(id=payload.get("sub"), username=payload.get("username"))
+
+        if settings.loader.enabled:
+            # Сессия и пользователь — параллельно и пачкой с другими запросами
+            session_info, user = await asyncio.gather(
+                session_loader.load(payload.get("session_uuid")),
+                user_loader.load(payload.get("sub")),
+            )
+        else:
+            # Одна AsyncSession не допускает параллельных запросов
+            session = await read_session()
+            session_info = await get_session_info(
+                session=session, uuid=payload.get("session_uuid")
+            )
+            user = None
         if session_info is None:
             raise TokenExpiredException
         if session_info.status not in (SessionStatus.ACTIVE, 'active'):
             raise TokenExpiredException
 
-        user = await get_user_by_id(
-            session=session,
-            id_=payload.get("sub"),
-        )
+        if not settings.loader.enabled:
+            user = await get_user_by_id(
+                session=session,
+                id_=payload.get("sub"),
+            )
         return user
 
     return get_user_by_token_sub
@@ -64,12 +157,10 @@ get_current_auth_user_for_refresh = get_user_by_token_of_type(REFRESH_TOKEN_TYPE
 
 
 async def get_session_info_from_payload(
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    read_session: Annotated[LazyReadSession, Depends(read_session_of_access_token)],
     payload: dict = Depends(TokenPayloadGetter()),
 ):
-    session_info = await get_session_info(
-        session=session, uuid=payload.get("session_uuid")
-    )
+    session_info = await load_session_info(read_session, payload.get("session_uuid"))
 
     if session_info is None:
         raise TokenExpiredException
@@ -77,3 +168,16 @@ async def get_session_info_from_payload(
         raise TokenExpiredException
 
     return session_info
+
+
+async def verify_access_token(
+    read_session: Annotated[LazyReadSession, Depends(read_session_of_access_token)],
+    payload: dict = Depends(TokenPayloadGetter()),
+) -> dict:
+    """Проверка для /verify: в режиме stateless обходится без обращения к сессии."""
+    if is_stateless(ACCESS_TOKEN_TYPE):
+        validate_token_type(payload=payload, got_token_type=ACCESS_TOKEN_TYPE)
+        check_not_revoked(payload)
+    else:
+        await get_session_info_from_payload(read_session=read_session, payload=payload)
+    return payload
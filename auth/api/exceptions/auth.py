@@ -91,6 +91,14 @@ class SessionNotFound(BaseAuthException):
         )
 
 
+class InvalidCursorException(BaseAuthException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
 class DatabaseError(HTTPException):
     def __init__(self):
         super().__init__(
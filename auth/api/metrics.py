@@ -0,0 +1,194 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from audit import AuditPublisher
+from core.metrics import (
+    GaugeCallback,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+    registry,
+)
+from core.models import db_helper
+from core.redis import InstrumentedConnectionPool, RedisClient
+from crud.loaders import session_loader, user_loader
+from logs.logger import async_sinks
+from utils.executor import crypto_executor
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """
+    RED-метрики по шаблону маршрута (``/api/v1/auth/sessions``, а не
+    фактический путь). Серии кэшируются по кортежу меток.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._requests: dict[tuple, object] = {}
+        self._latency: dict[tuple, object] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            latency_key = (method, path)
+            latency = self._latency.get(latency_key)
+            if latency is None:
+                latency = self._latency[latency_key] = HTTP_REQUEST_SECONDS.labels(method, path)
+            latency.observe(time.perf_counter() - started)
+            requests_key = (method, path, status)
+            requests = self._requests.get(requests_key)
+            if requests is None:
+                requests = self._requests[requests_key] = HTTP_REQUESTS.labels(
+                    method, path, str(status)
+                )
+            requests.inc()
+
+
+def _pool_state(pool):
+    yield "size", pool.size()
+    yield "checked_out", pool.checkedout()
+    yield "checked_in", pool.checkedin()
+    yield "overflow", pool.overflow()
+
+
+def _db_pool():
+    for state, value in _pool_state(db_helper.engine.pool):
+        yield (state,), value
+
+
+def _db_replicas():
+    for replica in db_helper.replicas:
+        for state, value in _pool_state(replica.engine.pool):
+            yield (replica.name, state), value
+
+
+def _db_replica_health():
+    for replica in db_helper.replicas:
+        yield (replica.name, "healthy"), int(replica.healthy)
+        if replica.lag is not None:
+            yield (replica.name, "lag_seconds"), replica.lag
+
+
+def _redis_pools():
+    for client in (RedisClient.redis_client, RedisClient.blocking_client):
+        pool = client.connection_pool
+        if not isinstance(pool, InstrumentedConnectionPool):
+            continue
+        yield (pool.name, "max"), pool.max_connections
+        yield (pool.name, "created"), pool.created
+        yield (pool.name, "in_use"), max(pool.in_use, 0)
+
+
+def _executor():
+    stats = crypto_executor.stats
+    yield ("submitted",), stats.submitted
+    yield ("completed",), stats.completed
+    yield ("inline",), stats.inline
+
+
+def _executor_latency():
+    yield (), crypto_executor.stats.total_latency
+
+
+def _executor_max_latency():
+    yield (), crypto_executor.stats.max_latency
+
+
+def _executor_in_flight():
+    stats = crypto_executor.stats
+    if crypto_executor.mode != "thread":
+        yield ("total",), stats.in_flight
+        return
+    yield ("running",), stats.running
+    yield ("waiting",), max(stats.in_flight - stats.running, 0)
+
+
+def _log_sinks():
+    for index, sink in enumerate(async_sinks):
+        name = str(getattr(sink, "path", "stderr") or index)
+        yield (name, "written"), sink.stats.written
+        yield (name, "dropped"), sink.stats.dropped
+
+
+def _audit():
+    stats = AuditPublisher.stats
+    for outcome in ("emitted", "published", "fallback", "dropped"):
+        yield (outcome,), getattr(stats, outcome)
+
+
+def _loaders():
+    for name, loader in (("session", session_loader), ("user", user_loader)):
+        yield (name, "batches"), loader.stats.batches
+        yield (name, "keys"), loader.stats.keys
+        yield (name, "deduplicated"), loader.stats.deduplicated
+
+
+GaugeCallback("db_pool_connections", "SQLAlchemy pool state", ("state",), _db_pool)
+GaugeCallback(
+    "redis_pool_connections", "Redis connection pool state", ("pool", "state"), _redis_pools
+)
+GaugeCallback(
+    "db_replica_pool_connections",
+    "SQLAlchemy pool state per read replica",
+    ("replica", "state"),
+    _db_replicas,
+)
+GaugeCallback(
+    "db_replica", "Read replica health check", ("replica", "stat"), _db_replica_health
+)
+GaugeCallback(
+    "crypto_executor_tasks", "JWT executor task counts", ("outcome",), _executor, type="counter"
+)
+GaugeCallback(
+    "crypto_executor_latency_seconds",
+    "Total time from submitting a JWT operation to its result",
+    (),
+    _executor_latency,
+    type="counter",
+)
+GaugeCallback(
+    "crypto_executor_max_latency_seconds",
+    "Slowest JWT operation since the worker started",
+    (),
+    _executor_max_latency,
+)
+GaugeCallback(
+    "crypto_executor_in_flight",
+    "JWT operations submitted to the executor and not yet completed",
+    ("state",),
+    _executor_in_flight,
+)
+GaugeCallback(
+    "log_records", "Async log sink records", ("sink", "outcome"), _log_sinks, type="counter"
+)
+GaugeCallback("audit_events", "Audit events by outcome", ("outcome",), _audit, type="counter")
+GaugeCallback(
+    "batch_loader", "Batch loader activity", ("loader", "stat"), _loaders, type="counter"
+)
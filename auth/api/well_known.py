@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+
+from utils import auth as auth_utils
+
+router = APIRouter(
+    prefix="/.well-known",
+    tags=["Well-known"],
+)
+
+
+@router.get("/jwks.json")
+async def jwks():
+    """Публичные ключи для локальной проверки токенов другими сервисами."""
+    return ORJSONResponse(
+        auth_utils.keyring.jwks(),
+        headers={"Cache-Control": "public, max-age=300"},
+    )
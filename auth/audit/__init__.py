@@ -0,0 +1,20 @@
+__all__ = (
+    "AuditEvent",
+    "AuditPublisher",
+    "LoginEvent",
+    "LogoutEvent",
+    "RefreshEvent",
+    "SessionAbortEvent",
+    "emit",
+)
+
+from .events import (
+    AuditEvent,
+    LoginEvent,
+    LogoutEvent,
+    RefreshEvent,
+    SessionAbortEvent,
+)
+from .publisher import AuditPublisher
+
+emit = AuditPublisher.emit
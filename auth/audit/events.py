@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime, UTC
+from typing import Literal
+
+import orjson
+from pydantic import BaseModel, Field
+
+
+class AuditEvent(BaseModel):
+    """
+    Событие аудита. type становится последним сегментом subject в NATS,
+    например ``auth.audit.login``.
+    """
+
+    type: str
+    event_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    occurred_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    ip: str | None = None
+    user_id: str | None = None
+    session_uuid: str | None = None
+
+    def encode(self) -> bytes:
+        return orjson.dumps(self.model_dump())
+
+
+class LoginEvent(AuditEvent):
+    type: Literal["login"] = "login"
+    provider: str = "google"
+    # Сессия уже существовала для этого устройства
+    reused_session: bool = False
+    device: str | None = None
+
+
+class RefreshEvent(AuditEvent):
+    type: Literal["refresh"] = "refresh"
+
+
+class LogoutEvent(AuditEvent):
+    type: Literal["logout"] = "logout"
+
+
+class SessionAbortEvent(AuditEvent):
+    type: Literal["abort"] = "abort"
+    aborted_session_uuid: str
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from loguru import logger as log
+
+from core.config import settings
+from .events import AuditEvent
+
+
+@dataclass
+class AuditStats:
+    emitted: int = 0
+    published: int = 0
+    # Записано в файл, пока NATS был недоступен
+    fallback: int = 0
+    # Отброшено из-за переполненной очереди
+    dropped: int = 0
+
+
+class AuditPublisher:
+    """
+    Асинхронная публикация событий аудита.
+
+    emit только кладёт событие в ограниченную очередь; фоновая задача
+    забирает его пачками и публикует в NATS (FastStream NatsBroker) в
+    subject ``{subject}.{type}``. Пока NATS недоступен, пачки дописываются
+    в fallback_path в формате NDJSON. Переполнение очереди не задерживает
+    запрос: событие отбрасывается и учитывается в stats.dropped.
+    """
+
+    stats: AuditStats = AuditStats()
+    reconnect_seconds: float = 5.0
+    _queue: asyncio.Queue | None = None
+    _task: asyncio.Task | None = None
+    _broker: Any = None
+    _next_connect: float = 0.0
+    # Пачка, собираемая или публикуемая сейчас; при остановке дописывается
+    _current: list[AuditEvent] = []
+
+    @classmethod
+    def emit(cls, event: AuditEvent) -> None:
+        if cls._queue is None:
+            return
+        try:
+            cls._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            cls.stats.dropped += 1
+        else:
+            cls.stats.emitted += 1
+
+    @classmethod
+    async def _connect(cls):
+        if time.monotonic() < cls._next_connect:
+            return
+        cls._next_connect = time.monotonic() + cls.reconnect_seconds
+        # faststream нужен только бэкенду nats
+        from faststream.nats import NatsBroker
+        from nats.errors import Error as NatsError
+
+        broker = NatsBroker(
+            settings.audit.nats_servers,
+            connect_timeout=settings.audit.connect_timeout,
+            max_reconnect_attempts=-1,
+        )
+        try:
+            # Без ограничения первое подключение повторялось бы бесконечно
+            await asyncio.wait_for(broker.connect(), settings.audit.connect_timeout)
+        except (NatsError, OSError, asyncio.TimeoutError) as e:
+            log.warning("Audit NATS connection failed: %s" % e)
+            await broker.close()
+            return
+        cls._broker = broker
+
+    @classmethod
+    async def _publish(cls, batch: list[AuditEvent]) -> bool:
+        from nats.errors import Error as NatsError
+
+        if cls._broker is None:
+            await cls._connect()
+        if cls._broker is None:
+            return False
+        try:
+            for event in batch:
+                await cls._broker.publish(
+                    event.encode(),
+                    subject=f"{settings.audit.subject}.{event.type}",
+                    correlation_id=event.event_id,
+                )
+        except (NatsError, OSError, asyncio.TimeoutError) as e:
+            # Часть пачки могла уйти: потребители различают дубли по event_id
+            log.warning("Audit publish failed: %s" % e)
+            return False
+        return True
+
+    @classmethod
+    def _write_fallback(cls, batch: list[AuditEvent]):
+        path = settings.audit.fallback_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as file:
+            file.write(b"".join(event.encode() + b"\n" for event in batch))
+
+    @classmethod
+    async def _flush(cls, batch: list[AuditEvent]):
+        if settings.audit.backend == "nats":
+            try:
+                published = await cls._publish(batch)
+            except Exception:
+                # Например, faststream не установлен: события уходят в файл
+                log.exception("Audit publish failed")
+                published = False
+            if published:
+                cls.stats.published += len(batch)
+                return
+        try:
+            await asyncio.to_thread(cls._write_fallback, batch)
+        except OSError as e:
+            log.error("Audit fallback write failed, %d events lost: %s" % (len(batch), e))
+            return
+        cls.stats.fallback += len(batch)
+
+    @classmethod
+    async def _next_batch(cls) -> list[AuditEvent]:
+        batch = cls._current
+        batch.append(await cls._queue.get())
+        deadline = time.monotonic() + settings.audit.flush_interval
+        while len(batch) < settings.audit.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(cls._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            try:
+                await cls._flush(await cls._next_batch())
+            except Exception:
+                # Пачка, которую не удалось даже записать в файл, теряется,
+                # но задача продолжает разбирать очередь
+                log.exception("Audit batch of %d events lost" % len(cls._current))
+                cls.stats.dropped += len(cls._current)
+            cls._current = []
+
+    @classmethod
+    async def start(cls):
+        if settings.audit.backend == "off" or cls._task is not None:
+            return
+        cls._queue = asyncio.Queue(maxsize=settings.audit.queue_size)
+        cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+        # Дописываем то, что осталось в очереди
+        queue, cls._queue = cls._queue, None
+        remaining, cls._current = cls._current, []
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        if remaining:
+            try:
+                await cls._flush(remaining)
+            except Exception:
+                log.exception("Audit batch of %d events lost" % len(remaining))
+        if cls._broker is not None:
+            await cls._broker.close()
+            cls._broker = None
@@ -0,0 +1,52 @@
+"""
+Стоимость выпуска и проверки JWT: разбор PEM на каждый вызов (как было),
+заранее разобранный ключ и повторная проверка из кэша проверенных токенов.
+
+Запуск из каталога auth (нужны переменные окружения приложения):
+    python -m benchmarks.bench_jwt
+"""
+from datetime import timedelta
+
+import jwt
+
+from benchmarks.common import BenchResult, measure, report
+from core.config import settings
+from utils import auth as auth_utils
+
+PAYLOAD = {
+    "sub": "5d3c1c9e-4a4b-4d0b-9a52-1f1f3c1f6a10",
+    "username": "104872993847561234567",
+    "session_uuid": "a0e3f9a4-7d1e-4cc5-8c2b-0d7f5b2f8e11",
+    "type": "access",
+}
+
+
+def run() -> list[BenchResult]:
+    private_pem = settings.auth.private_key_path.read_text()
+    public_pem = settings.auth.public_key_path.read_text()
+    algorithm = settings.auth.algorithm
+    token = auth_utils.encode_jwt(PAYLOAD, expire_timedelta=timedelta(minutes=10))
+
+    def decode_cold():
+        auth_utils._verified.clear()
+        auth_utils.decode_jwt(token)
+
+    return [
+        measure(
+            "jwt.encode.pem_text",
+            lambda: jwt.encode(PAYLOAD, private_pem, algorithm=algorithm),
+            number=50,
+        ),
+        measure("jwt.encode.parsed_key", lambda: auth_utils.encode_jwt(PAYLOAD), number=50),
+        measure(
+            "jwt.decode.pem_text",
+            lambda: jwt.decode(token, public_pem, algorithms=[algorithm]),
+            number=200,
+        ),
+        measure("jwt.decode.parsed_key", decode_cold, number=200),
+        measure("jwt.decode.verified_cache", lambda: auth_utils.decode_jwt(token), number=5000),
+    ]
+
+
+if __name__ == "__main__":
+    report(run())
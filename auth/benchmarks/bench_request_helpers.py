@@ -0,0 +1,80 @@
+"""
+Накладные расходы запроса вне криптографии: построение ключей кэша
+(шаблон и хэш аргументов), чтение из L1 и разбор User-Agent в
+get_session_name.
+
+Запуск из каталога auth (нужны переменные окружения приложения):
+    python -m benchmarks.bench_request_helpers
+"""
+from starlette.requests import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.api_v1.authentication.helpers import get_session_name
+from benchmarks.common import BenchResult, measure, report
+from core.redis.keys import KeyBuilder
+from core.redis.local import LocalCache
+from core.schemas.token import SessionCreate
+
+USER_AGENTS = {
+    "chrome": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36"
+    ),
+    "safari_ios": (
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1"
+    ),
+}
+
+
+async def get_session_info(session: AsyncSession, uuid: str): ...
+
+
+async def create_session(session: AsyncSession, new_session: SessionCreate): ...
+
+
+def make_request(user_agent: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"user-agent", user_agent.encode())],
+        }
+    )
+
+
+def run() -> list[BenchResult]:
+    template = KeyBuilder("sessions", get_session_info, template="{uuid}")
+    hashed = KeyBuilder("sessions", create_session)
+    by_field = KeyBuilder("sessions", create_session, fields=["new_session.sub"])
+    new_session = SessionCreate(
+        uuid="a0e3f9a4-7d1e-4cc5-8c2b-0d7f5b2f8e11",
+        name="Chrome 139.0.0, Windows 10",
+        sub="5d3c1c9e-4a4b-4d0b-9a52-1f1f3c1f6a10",
+        ip="192.168.0.1",
+    )
+    session_args = template.bind((None, new_session.uuid), {})
+    create_args = hashed.bind((None, new_session), {})
+
+    local = LocalCache(maxsize=10_000, ttl=60)
+    local.set("sessions:get_session_info:hit", object())
+
+    results = [
+        measure("keys.bind", lambda: template.bind((None, new_session.uuid), {}), 20_000),
+        measure("keys.template", lambda: template.build(session_args), 20_000),
+        measure("keys.hash_all_args", lambda: hashed.build(create_args), 20_000),
+        measure("keys.hash_field", lambda: by_field.build(create_args), 20_000),
+        measure("local_cache.hit", lambda: local.get("sessions:get_session_info:hit"), 50_000),
+        measure("local_cache.miss", lambda: local.get("sessions:get_session_info:miss"), 50_000),
+    ]
+    for name, user_agent in USER_AGENTS.items():
+        request = make_request(user_agent)
+        results.append(
+            measure(f"get_session_name[{name}]", lambda: get_session_name(request), 500)
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,68 @@
+"""
+Сравнение форматов кэша на списках SessionRead.
+
+Запуск из каталога auth (нужны переменные окружения приложения):
+    python -m benchmarks.bench_serializers
+"""
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+from benchmarks.common import BenchResult, measure, report
+from core.redis.serializers import get_serializer
+from core.schemas.token import SessionRead
+
+SIZES = (1, 10, 100)
+
+
+def make_rows(n: int) -> list[SimpleNamespace]:
+    """Имитирует ORM-объекты Session, как их возвращает SQLAlchemy."""
+    return [
+        SimpleNamespace(
+            id=str(uuid.uuid4()),
+            uuid=str(uuid.uuid4()),
+            sub=str(uuid.uuid4()),
+            name="Chrome 139.0.0, Windows 10",
+            ip="192.168.0.%d" % (i % 255),
+            status="active",
+            can_abort=False,
+            timestamp=time.time(),
+        )
+        for i in range(n)
+    ]
+
+
+def legacy_dumps(rows):
+    return json.dumps([SessionRead.model_validate(i).model_dump() for i in rows])
+
+
+def legacy_loads(raw):
+    return [SessionRead.model_validate(i) for i in json.loads(raw)]
+
+
+def run() -> list[BenchResult]:
+    results = []
+    for n in SIZES:
+        rows = make_rows(n)
+        number = max(10, 2000 // n)
+        raw = legacy_dumps(rows)
+        results.append(measure(f"serializer.legacy.dumps[{n}]", lambda: legacy_dumps(rows), number))
+        results.append(measure(f"serializer.legacy.loads[{n}]", lambda: legacy_loads(raw), number))
+        for name in ("pydantic", "orjson", "msgpack"):
+            try:
+                codec = get_serializer(name, SessionRead)
+            except ImportError:
+                continue
+            _, data = codec.dumps(rows)
+            results.append(
+                measure(f"serializer.{name}.dumps[{n}]", lambda: codec.dumps(rows), number)
+            )
+            results.append(
+                measure(f"serializer.{name}.loads[{n}]", lambda: codec.loads(data), number)
+            )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,180 @@
+"""
+Планы и задержки горячих запросов к sessions на большом объёме данных.
+
+Засевает в Postgres пользователей bench-* и их сессии, выводит
+EXPLAIN (ANALYZE, BUFFERS) и задержки запросов из crud/stores/postgres.py.
+Запускать только на отдельной локальной базе:
+    python -m benchmarks.bench_sessions_db --dsn postgresql+asyncpg://... \\
+        --sessions 2000000 --users 100000 --cleanup
+"""
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from benchmarks.common import BenchResult, measure_async, report
+
+# UUIDv7 как в get_uuid_str: первые 48 бит — миллисекунды ts, версия 7
+UUID7 = """
+    encode(
+        set_bit(
+            set_bit(
+                overlay(
+                    uuid_send(gen_random_uuid())
+                    PLACING substring(int8send((extract(epoch FROM {ts}) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6
+                ),
+                52, 1
+            ),
+            53, 1
+        ),
+        'hex'
+    )::uuid
+"""
+
+SEED_USERS = text(
+    f"""
+    INSERT INTO users (id, username)
+    SELECT {UUID7.format(ts="clock_timestamp()")}, 'bench-' || g
+    FROM generate_series(1, :users) AS g
+    ON CONFLICT (username) DO NOTHING
+    """
+)
+
+SEED_USER_AGENTS = text(
+    """
+    INSERT INTO user_agents (name)
+    SELECT 'Chrome ' || g || '.0.0, Windows 10'
+    FROM generate_series(0, 49) AS g
+    ON CONFLICT (name) DO NOTHING
+    """
+)
+
+# ip однозначно задаётся номером строки, поэтому (sub, ip, user_agent_id)
+# не повторяются
+SEED_SESSIONS = text(
+    f"""
+    INSERT INTO sessions (id, uuid, status, timestamp, sub, user_agent_id, ip, can_abort)
+    SELECT
+        {UUID7.format(ts="s.ts")},
+        {UUID7.format(ts="s.ts")},
+        (ARRAY['ACTIVE', 'EXPIRED', 'DISABLED'])[1 + s.g % 3]::session_status,
+        s.ts,
+        u.id,
+        ua.id,
+        ('10.' || ((s.g >> 16) & 255) || '.' || ((s.g >> 8) & 255) || '.' || (s.g & 255))::inet,
+        false
+    FROM (
+        SELECT g, now() - (g % 10000000) * interval '1 second' AS ts
+        FROM generate_series(:start, :stop) AS g
+    ) AS s
+    JOIN users AS u ON u.username = 'bench-' || (1 + s.g % :users)
+    JOIN user_agents AS ua ON ua.name = 'Chrome ' || (s.g % 50) || '.0.0, Windows 10'
+    """
+)
+
+QUERIES = {
+    "get_session_info": (
+        "SELECT * FROM sessions WHERE uuid = :uuid AND status = 'ACTIVE'",
+        lambda row: {"uuid": row.uuid},
+    ),
+    "get_user_sessions": (
+        "SELECT * FROM sessions WHERE sub = :sub ORDER BY timestamp, id",
+        lambda row: {"sub": row.sub},
+    ),
+    # Страница после строки-образца: стоимость не зависит от её номера
+    "get_user_sessions_page": (
+        "SELECT s.id, s.uuid, ua.name, s.sub, s.ip, s.status, s.can_abort, s.timestamp"
+        " FROM sessions AS s JOIN user_agents AS ua ON ua.id = s.user_agent_id"
+        " WHERE s.sub = :sub AND (s.timestamp, s.id) > (:timestamp, :id)"
+        " ORDER BY s.timestamp, s.id LIMIT 51",
+        lambda row: {"sub": row.sub, "timestamp": row.timestamp, "id": row.id},
+    ),
+    "get_same_session": (
+        "SELECT uuid, status FROM sessions"
+        " WHERE sub = :sub AND ip = :ip AND user_agent_id = :user_agent_id",
+        lambda row: {"sub": row.sub, "ip": row.ip, "user_agent_id": row.user_agent_id},
+    ),
+}
+
+
+async def seed(conn: AsyncConnection, sessions: int, users: int, batch: int) -> None:
+    await conn.execute(SEED_USERS, {"users": users})
+    await conn.execute(SEED_USER_AGENTS)
+    await conn.commit()
+    for start in range(1, sessions + 1, batch):
+        stop = min(start + batch - 1, sessions)
+        await conn.execute(SEED_SESSIONS, {"start": start, "stop": stop, "users": users})
+        await conn.commit()
+        print(f"seeded {stop}/{sessions}")
+    await conn.execute(text("ANALYZE sessions"))
+    await conn.commit()
+
+
+async def explain(conn: AsyncConnection, sql: str, params: dict) -> str:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+    return "\n".join(row[0] for row in result)
+
+
+async def run(args: argparse.Namespace) -> list[BenchResult]:
+    engine = create_async_engine(args.dsn)
+    results = []
+    async with engine.connect() as conn:
+        if args.sessions:
+            await seed(conn, args.sessions, args.users, args.batch)
+
+        sample = (
+            await conn.execute(
+                text(
+                    "SELECT id, uuid, sub, ip, user_agent_id, timestamp FROM sessions"
+                    " TABLESAMPLE SYSTEM (1) LIMIT :n"
+                ),
+                {"n": args.iterations},
+            )
+        ).all()
+        if not sample:
+            raise SystemExit("sessions is empty, run with --sessions N")
+
+        sizes = await conn.execute(
+            text(
+                "SELECT indexrelname, pg_size_pretty(pg_relation_size(indexrelid))"
+                " FROM pg_stat_user_indexes WHERE relname = 'sessions'"
+                " ORDER BY indexrelname"
+            )
+        )
+        print("\n== index sizes")
+        for index, size in sizes:
+            print(f"{index:<40} {size:>10}")
+
+        for name, (sql, params_of) in QUERIES.items():
+            print(f"\n== {name}\n{await explain(conn, sql, params_of(sample[0]))}")
+            stmt = text(sql)
+
+            async def query(i: int, stmt=stmt, params_of=params_of):
+                row = random.choice(sample)
+                await conn.execute(stmt, params_of(row))
+
+            results.append(await measure_async(f"db.{name}", query, args.iterations))
+
+        if args.cleanup:
+            await conn.execute(text("DELETE FROM users WHERE username LIKE 'bench-%'"))
+            await conn.commit()
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--sessions", type=int, default=0, help="сколько сессий засеять")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cleanup", action="store_true", help="удалить bench-* после замеров")
+    report(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    number: int = 1000,
+    repeat: int = 20,
+) -> BenchResult:
+    """Выполняет fn repeat раз по number вызовов, время — на один вызов."""
+    for _ in range(min(number, 100)):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    median = statistics.median(samples)
+    return BenchResult(
+        name=name,
+        ops_per_sec=1 / median,
+        p50_us=median * 1e6,
+        p95_us=_percentile(samples, 0.95) * 1e6,
+        p99_us=_percentile(samples, 0.99) * 1e6,
+    )
+
+
+async def measure_async(
+    name: str,
+    fn: Callable[[int], Awaitable[object]],
+    number: int = 1000,
+) -> BenchResult:
+    """Последовательно ждёт fn(i) number раз; перцентили — по отдельным вызовам."""
+    samples = []
+    total_start = time.perf_counter()
+    for i in range(number):
+        start = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - start)
+    total = time.perf_counter() - total_start
+    return BenchResult(
+        name=name,
+        ops_per_sec=number / total,
+        p50_us=statistics.median(samples) * 1e6,
+        p95_us=_percentile(samples, 0.95) * 1e6,
+        p99_us=_percentile(samples, 0.99) * 1e6,
+    )
+
+
+async def measure_concurrent(
+    name: str,
+    fn: Callable[[int], Awaitable[object]],
+    number: int = 1000,
+    concurrency: int = 50,
+) -> BenchResult:
+    """
+    number вызовов fn(i) с concurrency одновременными исполнителями;
+    ops/s — пропускная способность, перцентили — по отдельным вызовам.
+    """
+    samples = []
+    counter = iter(range(number))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await fn(i)
+            samples.append(time.perf_counter() - start)
+
+    total_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    total = time.perf_counter() - total_start
+    return BenchResult(
+        name=name,
+        ops_per_sec=number / total,
+        p50_us=statistics.median(samples) * 1e6,
+        p95_us=_percentile(samples, 0.95) * 1e6,
+        p99_us=_percentile(samples, 0.99) * 1e6,
+    )
+
+
+def save_baseline(path: Path, results: Iterable[BenchResult]) -> None:
+    path.write_text(
+        json.dumps({r.name: asdict(r) for r in results}, indent=2, sort_keys=True)
+    )
+
+
+def load_baseline(path: Path) -> dict[str, BenchResult]:
+    return {name: BenchResult(**data) for name, data in json.loads(path.read_text()).items()}
+
+
+def compare(
+    results: Iterable[BenchResult],
+    baseline: dict[str, BenchResult],
+    threshold: float = 0.10,
+) -> list[str]:
+    """
+    Печатает изменения относительно baseline и возвращает имена
+    регрессий: ops/s упал или p99 вырос больше чем на threshold.
+    """
+    regressions = []
+    print(f"{'benchmark':<44} {'ops/s':>10} {'p99':>10}")
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            print(f"{r.name:<44} {'new':>10} {'new':>10}")
+            continue
+        ops_change = r.ops_per_sec / base.ops_per_sec - 1
+        p99_change = r.p99_us / base.p99_us - 1
+        regressed = ops_change < -threshold or p99_change > threshold
+        if regressed:
+            regressions.append(r.name)
+        print(
+            f"{r.name:<44} {ops_change:>+10.1%} {p99_change:>+10.1%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def report(results: Iterable[BenchResult]) -> None:
+    print(f"{'benchmark':<44} {'ops/s':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for r in results:
+        print(
+            f"{r.name:<44} {r.ops_per_sec:>12.0f} {r.p50_us:>10.2f}"
+            f" {r.p95_us:>10.2f} {r.p99_us:>10.2f}"
+        )
@@ -0,0 +1,125 @@
+"""
+Нагрузочный прогон эндпоинтов авторизации внутри процесса: приложение
+поднимается со своим lifespan и вызывается через ASGI-транспорт httpx,
+поэтому цифры включают FastAPI, зависимости, Redis и PostgreSQL, но не
+сеть и uvicorn.
+
+Обмен кодом с Google подменяется: каждый виртуальный пользователь
+получает свой sub, остальная цепочка входа (пользователь, сессия,
+выпуск токенов) выполняется как в проде.
+
+Запуск из каталога auth (нужны PostgreSQL и Redis из .env):
+    python -m benchmarks.load --users 200 --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import uuid
+from http.cookies import SimpleCookie
+
+import httpx
+
+from api.api_v1.authentication import google
+from benchmarks.common import BenchResult, measure_concurrent, report
+from core.config import settings
+from main import main_app
+
+AUTH_PREFIX = settings.api.prefix + settings.api.v1.prefix + settings.api.v1.auth
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36"
+)
+
+
+async def fake_google_token(code: str):
+    return {"id_token": code}
+
+
+async def fake_google_payload(token_json):
+    return {"sub": token_json["id_token"]}
+
+
+def patch_google() -> None:
+    google.get_json_google_token = fake_google_token
+    google.get_google_user_payload = fake_google_payload
+
+
+class VirtualUser:
+    """
+    Куки выставляются с secure=True и по http не вернулись бы,
+    поэтому клиент хранит их сам и отправляет заголовком Cookie.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, google_sub: str) -> None:
+        self.client = client
+        self.google_sub = google_sub
+        self.cookies: dict[str, str] = {}
+
+    def _remember(self, response: httpx.Response) -> None:
+        for header in response.headers.get_list("set-cookie"):
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+    def _headers(self) -> dict[str, str]:
+        cookie = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        return {"cookie": cookie, "user-agent": USER_AGENT}
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self.client.request(
+            method, AUTH_PREFIX + path, headers=self._headers(), **kwargs
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path}: {response.status_code} {response.text}")
+        self._remember(response)
+        return response
+
+    async def login(self) -> None:
+        await self.request("GET", "/google/callback", params={"code": self.google_sub})
+
+
+async def run(users: int, requests: int, concurrency: int) -> list[BenchResult]:
+    patch_google()
+    transport = httpx.ASGITransport(app=main_app)
+    results = []
+    async with main_app.router.lifespan_context(main_app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            run_id = uuid.uuid4().hex[:8]
+            pool = [VirtualUser(client, f"bench-{run_id}-{i}") for i in range(users)]
+
+            async def login(i: int):
+                await pool[i].login()
+
+            results.append(
+                await measure_concurrent("http.login", login, users, concurrency)
+            )
+
+            async def verify(i: int):
+                await pool[i % users].request("GET", "/verify")
+
+            async def refresh(i: int):
+                await pool[i % users].request("POST", "/refresh")
+
+            async def sessions(i: int):
+                await pool[i % users].request("GET", "/sessions")
+
+            for name, fn in (
+                ("http.verify", verify),
+                ("http.refresh", refresh),
+                ("http.sessions", sessions),
+            ):
+                results.append(
+                    await measure_concurrent(name, fn, requests, concurrency)
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    report(asyncio.run(run(args.users, args.requests, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
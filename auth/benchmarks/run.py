@@ -0,0 +1,52 @@
+"""
+Общий прогон бенчмарков со сравнением с сохранённым baseline.
+
+Запуск из каталога auth:
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Код выхода 1, если какой-либо бенчмарк потерял в ops/s или вырос
+по p99 больше, чем на --threshold. --macro добавляет нагрузочный
+прогон HTTP (нужны PostgreSQL и Redis).
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from benchmarks import bench_jwt, bench_request_helpers, bench_serializers
+from benchmarks.common import compare, load_baseline, report, save_baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--macro", action="store_true")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = [
+        *bench_jwt.run(),
+        *bench_serializers.run(),
+        *bench_request_helpers.run(),
+    ]
+    if args.macro:
+        from benchmarks import load
+
+        results += asyncio.run(load.run(args.users, args.requests, args.concurrency))
+    report(results)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if args.baseline:
+        print()
+        if compare(results, load_baseline(args.baseline), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+from datetime import datetime
 from pathlib import Path
-from pydantic import BaseModel, PostgresDsn
+import importlib.util
+from typing import Literal
+from pydantic import BaseModel, PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).parent.parent
@@ -23,6 +26,10 @@ class GoogleSettings(BaseSettings):
     jwks_url: str = "https://www.googleapis.com/oauth2/v3/certs"
     algorithm: str = "RS256"
     redirect_after_auth_url: str = "http://localhost:8000/docs"
+    # Если ответ JWKS без Cache-Control: max-age
+    jwks_default_max_age: int = 300
+    # Не чаще этого интервала перезапрашивать JWKS из-за незнакомого kid
+    jwks_min_refetch_seconds: float = 30.0
 
 
 class LoggerSettings(BaseSettings):
@@ -36,21 +43,74 @@ class LoggerSettings(BaseSettings):
     rotation: str = "10 MB"
     retention: str = "10 days"
     compression: str = "zip"
+    # async — записи уходят в ограниченную очередь, в файлы и stderr пишет
+    # фоновый поток пачками; sync — штатная синхронная запись loguru
+    mode: Literal["sync", "async"] = "async"
+    queue_size: int = 10_000
+    batch_size: int = 256
+    flush_interval: float = 0.5
     auth_logs: Path = BASE_DIR / "log_files" / "auth_logs"
     error_logs: Path = BASE_DIR / "log_files" / "error_logs"
 
 
+class HttpConfig(BaseModel):
+    timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+
+
+class CryptoExecutorConfig(BaseModel):
+    # inline — в цикле событий, thread — пул потоков (PyJWT/cryptography
+    # отпускают GIL), process — пул процессов
+    mode: Literal["inline", "thread", "process"] = "thread"
+    max_workers: int | None = None
+    # Операции над входом не больше стольких байт (проверка коротких
+    # токенов) выполняются в цикле событий: пересылка в пул для них дороже
+    # самой операции. 0 — всё через пул
+    inline_max_bytes: int = 0
+
+
+class BatchLoaderConfig(BaseModel):
+    # Поиск сессии и пользователя при проверке токена собирается в пачки
+    # за window_ms со всех запросов воркера
+    enabled: bool = True
+    window_ms: float = 1.0
+    max_batch: int = 256
+
+
 class RunConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
 
 
+class JWTKey(BaseModel):
+    kid: str
+    # RS256, ES256 или EdDSA (Ed25519)
+    algorithm: str = "RS256"
+    # Без приватного ключа ключ используется только для проверки
+    private_key_path: Path | None = None
+    public_key_path: Path
+    # Плановая ротация: с active_from ключ подписывает новые токены,
+    # после retire_at подписанные им токены больше не принимаются
+    active_from: datetime | None = None
+    retire_at: datetime | None = None
+
+
 class AuthJWT(BaseModel):
     private_key_path: Path = BASE_DIR / "certs" / "jwt-private.pem"
     public_key_path: Path = BASE_DIR / "certs" / "jwt-public.pem"
     algorithm: str = "RS256"
+    # Связка ключей; если пуста, используется пара ключей выше
+    keys: list[JWTKey] = []
     access_token_expire_minutes: int = 10
     refresh_token_expire_days: int = 30
+    # session — статус сессии проверяется на каждый запрос;
+    # stateless — access-токену доверяем по подписи и сверяем только
+    # с набором отозванных сессий (задержка отзыва ≤ revocation_sync_seconds)
+    verification_mode: Literal["session", "stateless"] = "session"
+    revocation_sync_seconds: float = 1.0
+    verified_token_cache_size: int = 10_000
 
 
 class ApiV1Prefix(BaseModel):
@@ -65,6 +125,93 @@ class RedisConfig(BaseModel):
     port: int = 6379
     db: int = 0
     decode_responses: bool = False
+    # 3 — RESP3; парсер hiredis подключается сам, если установлен redis[hiredis]
+    protocol: Literal[2, 3] = 2
+    max_connections: int = 50
+    # Сколько запрос ждёт свободное соединение при исчерпании пула
+    pool_timeout: float = 1.0
+    socket_timeout: float = 1.0
+    socket_connect_timeout: float = 1.0
+    health_check_interval: int = 30
+    # Повтор при обрыве соединения или таймауте: base * 2^n, не больше cap
+    retries: int = 2
+    backoff_base: float = 0.01
+    backoff_cap: float = 0.2
+    blocking_max_connections: int = 4
+    local_cache_enabled: bool = False
+    local_cache_maxsize: int = 10_000
+    local_cache_ttl: float = 5.0
+    invalidation_channel: str = "cache:invalidate"
+    # CLIENT TRACKING: Redis сам сообщает об изменении ключей с этими
+    # префиксами, и L1 держит их до ttl кэша, а не local_cache_ttl.
+    # Работает только вместе с local_cache_enabled
+    tracking_enabled: bool = False
+    tracking_prefixes: list[str] = ["users:", "sessions:"]
+    lock_lease_ms: int = 5000
+    lock_poll_ms: int = 25
+    # msgpack ставится отдельно: poetry install -E msgpack
+    serializer: Literal["pydantic", "orjson", "msgpack"] = "pydantic"
+
+    @field_validator("serializer")
+    @classmethod
+    def check_serializer_installed(cls, value: str) -> str:
+        # Без проверки отсутствующий пакет всплыл бы только на первой записи в кэш
+        if value == "msgpack" and importlib.util.find_spec("msgpack") is None:
+            raise ValueError(
+                "serializer=msgpack requires the msgpack extra: poetry install -E msgpack"
+            )
+        return value
+
+
+class SessionStoreConfig(BaseModel):
+    # postgres — сессии в БД, Redis только кэширует чтения;
+    # redis — сессии живут в Redis, в БД пишутся в фоне через Redis Stream
+    backend: Literal["postgres", "redis"] = "postgres"
+    key_prefix: str = "session_store"
+    consumer_group: str = "session-writer"
+    flush_batch_size: int = 500
+    flush_block_ms: int = 1000
+    # Записи упавших воркеров забираются после такого простоя
+    claim_idle_ms: int = 30_000
+    # Запись, которую Postgres отвергает столько раз подряд (нарушение
+    # ограничения, неверные данные), уходит в поток {key_prefix}:stream:dead
+    max_flush_attempts: int = 5
+    # /sessions: размер страницы по умолчанию и наибольший
+    page_size: int = 50
+    max_page_size: int = 200
+
+
+class SessionGCConfig(BaseModel):
+    # Фоновый сборщик в lifespan; отдельно: python -m jobs.session_gc
+    enabled: bool = True
+    interval_seconds: float = 300.0
+    # Строк на транзакцию и транзакций за проход
+    batch_size: int = 1000
+    max_batches: int = 100
+    # Отключённые и истёкшие сессии удаляются через столько дней после
+    # истечения refresh-токена последнего входа
+    retention_days: int = 7
+    # delete — удалять; archive — переносить в секционированную
+    # session_history, откуда старые месяцы уходят целыми секциями
+    mode: Literal["delete", "archive"] = "delete"
+    # Секции session_history: сколько месяцев создавать заранее, сколько
+    # хранить подключёнными; отсоединённые удаляются, если drop_detached
+    history_months_ahead: int = 2
+    history_retention_months: int = 12
+    history_drop_detached: bool = False
+
+
+class AuditConfig(BaseModel):
+    # nats — события публикуются в NATS, пока он недоступен — пишутся в
+    # fallback_path; file — только в файл; off — события не собираются
+    backend: Literal["nats", "file", "off"] = "nats"
+    nats_servers: list[str] = ["nats://nats:4222"]
+    subject: str = "auth.audit"
+    connect_timeout: float = 2.0
+    queue_size: int = 10_000
+    batch_size: int = 100
+    flush_interval: float = 0.2
+    fallback_path: Path = BASE_DIR / "log_files" / "audit.ndjson"
 
 
 class Api(BaseModel):
@@ -78,6 +225,19 @@ class DatabaseConfig(BaseModel):
     echo_pool: bool = False
     max_overflow: int = 50
     pool_size: int = 10
+    # Реплики для чтения, JSON-списком: DB__REPLICA_URLS='["postgresql+asyncpg://..."]'.
+    # Пусто — все запросы идут в url
+    replica_urls: list[PostgresDsn] = []
+    replica_pool_size: int = 10
+    replica_max_overflow: int = 50
+    # Проверка реплик: SELECT с таймаутом и отставанием воспроизведения WAL.
+    # Реплика дальше max_lag_seconds выводится из ротации до следующей проверки
+    replica_check_interval: float = 5.0
+    replica_check_timeout: float = 2.0
+    replica_max_lag_seconds: float = 5.0
+    # После записи чтения этого пользователя идут в primary: не меньше
+    # replica_max_lag_seconds, иначе кэш заполнится устаревшей строкой с реплики
+    primary_pin_seconds: float = 10.0
 
     naming_convention: dict = {
         "ix": "ix_%(column_0_label)s",
@@ -99,6 +259,12 @@ class Settings(BaseSettings):
     run: RunConfig = RunConfig()
     api: Api = Api()
     redis: RedisConfig = RedisConfig()
+    http: HttpConfig = HttpConfig()
+    executor: CryptoExecutorConfig = CryptoExecutorConfig()
+    sessions: SessionStoreConfig = SessionStoreConfig()
+    loader: BatchLoaderConfig = BatchLoaderConfig()
+    session_gc: SessionGCConfig = SessionGCConfig()
+    audit: AuditConfig = AuditConfig()
     db: DatabaseConfig
     auth: AuthJWT = AuthJWT()
     logs: LoggerSettings = LoggerSettings()
@@ -0,0 +1,32 @@
+import httpx
+
+from core.config import settings
+
+
+class HttpClient:
+    """Общий httpx.AsyncClient с пулом соединений на время жизни приложения."""
+
+    client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def get(cls) -> httpx.AsyncClient:
+        if cls.client is None or cls.client.is_closed:
+            cls.client = httpx.AsyncClient(
+                timeout=settings.http.timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.http.max_connections,
+                    max_keepalive_connections=settings.http.max_keepalive_connections,
+                    keepalive_expiry=settings.http.keepalive_expiry,
+                ),
+            )
+        return cls.client
+
+    @classmethod
+    async def connect(cls):
+        cls.get()
+
+    @classmethod
+    async def close(cls):
+        if cls.client:
+            await cls.client.aclose()
+            cls.client = None
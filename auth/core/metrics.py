@@ -0,0 +1,154 @@
+"""
+Метрики Prometheus на prometheus_client.
+
+Дочерние серии создаются один раз через labels(...) и сохраняются рядом с
+кодом, который их обновляет, поэтому горячий путь — это инкремент без
+разбора меток. Значения свои у каждого процесса воркера.
+"""
+
+import functools
+import time
+from typing import Any, Awaitable, Callable, Iterable, Literal, Sequence
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+registry = CollectorRegistry()
+
+
+class GaugeCallback(Collector):
+    """
+    Значения снимаются при каждом запросе /metrics: callback возвращает
+    пары (значения меток, число). Для состояния, которое уже считается
+    где-то ещё — пулы, очереди, счётчики stats.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[tuple[Sequence[str], float]]],
+        type: Literal["gauge", "counter"] = "gauge",
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = list(labelnames)
+        self.callback = callback
+        self.family = CounterMetricFamily if type == "counter" else GaugeMetricFamily
+        registry.register(self)
+
+    def collect(self):
+        family = self.family(self.name, self.documentation, labels=self.labelnames)
+        for values, value in self.callback():
+            family.add_metric([str(v) for v in values], value)
+        yield family
+
+    def describe(self):
+        # Без вызова callback при регистрации
+        return []
+
+
+def timed(histogram: Histogram, *labels: str):
+    """
+    Время выполнения корутины в histogram; последняя метка — имя функции.
+    Серия создаётся при декорировании.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        child = histogram.labels(*labels, func.__name__)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests by route and status",
+    ("method", "route", "status"),
+    registry=registry,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route"),
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+JWT_SECONDS = Histogram(
+    "jwt_operation_duration_seconds",
+    "JWT encode/decode latency including executor queueing",
+    ("operation",),
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+JWT_VERIFIED_CACHE = Counter(
+    "jwt_verified_cache",
+    "Verified-token cache lookups",
+    ("result",),
+    registry=registry,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache.redis reads by namespace and result",
+    ("namespace", "result"),
+    registry=registry,
+)
+CACHE_FETCH_SECONDS = Histogram(
+    "cache_fetch_duration_seconds",
+    "Redis read latency per Cache.redis namespace",
+    ("namespace",),
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Database latency per CRUD function",
+    ("function",),
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+REDIS_POOL_CHECKOUT_SECONDS = Histogram(
+    "redis_pool_checkout_wait_seconds",
+    "Time spent waiting for a Redis pool connection",
+    ("pool",),
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a SQLAlchemy pool connection",
+    buckets=DEFAULT_BUCKETS,
+    registry=registry,
+)
+SESSION_GC_ROWS = Counter(
+    "session_gc_rows",
+    "Sessions expired or deleted by the sweeper",
+    ("action",),
+    registry=registry,
+)
+SESSION_WRITE_BEHIND_DEAD = Counter(
+    "session_write_behind_dead_letters",
+    "Session events moved to the dead-letter stream",
+    registry=registry,
+)
+DB_READS = Counter(
+    "db_reads",
+    "Read sessions by routing target",
+    ("target",),
+    registry=registry,
+)
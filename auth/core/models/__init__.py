@@ -2,8 +2,11 @@ __all__ = (
     "db_helper",
     "Base",
     "User",
+    "Session",
+    "SessionHistory",
+    "UserAgent",
 )
 
 from .db_helper import db_helper
 from .base import Base
-from .user import User
+from .user import User, Session, SessionHistory, UserAgent
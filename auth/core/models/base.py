@@ -1,3 +1,5 @@
+import os
+import time
 import uuid
 
 from sqlalchemy.orm import DeclarativeBase
@@ -10,8 +12,22 @@ from core.config import settings
 from utils import camel_case_to_snake_case
 
 
+def uuid7() -> uuid.UUID:
+    """
+    UUIDv7 (RFC 9562): 48 бит миллисекунд Unix-времени, затем случайные
+    биты. Новые значения растут со временем и дописываются в правый край
+    B-tree, а не в случайные страницы, как uuid4.
+    """
+    value = int.from_bytes(
+        (time.time_ns() // 1_000_000).to_bytes(6, "big") + os.urandom(10), "big"
+    )
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+
 def get_uuid_str():
-    return str(uuid.uuid4())
+    return str(uuid7())
 
 
 class Base(DeclarativeBase):
@@ -25,7 +41,10 @@ class Base(DeclarativeBase):
     def __tablename__(cls) -> str:
         return f"{camel_case_to_snake_case(cls.__name__)}s"
 
+    # Нативный uuid: 16 байт вместо 36 символов в каждом индексе и
+    # внешнем ключе; в Python значения остаются строками
     id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False),
         primary_key=True,
         default=get_uuid_str,
     )
@@ -1,44 +1,224 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import time
+from typing import AsyncGenerator, Sequence
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from loguru import logger as log
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from core.config import settings
+from core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_READS
+from core.redis.primary_pin import PrimaryPin
+
+_reads = {
+    target: DB_READS.labels(target)
+    for target in ("replica", "primary", "pinned", "fallback")
+}
+
+# Отставание воспроизведения WAL в секундах. Без новых записей на primary
+# pg_last_xact_replay_timestamp() стареет, поэтому догнавшая реплика — 0;
+# не реплика (pg_is_in_recovery() = false) — тоже 0
+REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+class Replica:
+    """Движок реплики и результат её последней проверки."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.name = f"{engine.url.host}:{engine.url.port or 5432}/{engine.url.database}"
+        self.session_factory = _session_factory(engine)
+        # До первой проверки в start() чтения идут в primary
+        self.healthy = False
+        self.lag: float | None = None
+
+    async def check(self) -> None:
+        try:
+            async with asyncio.timeout(settings.db.replica_check_timeout):
+                async with self.engine.connect() as connection:
+                    lag = float((await connection.execute(REPLICA_LAG)).scalar())
+        except Exception as e:
+            if self.healthy:
+                log.warning("Replica %s is down: %r" % (self.name, e))
+            self.healthy, self.lag = False, None
+            return
+        healthy = lag <= settings.db.replica_max_lag_seconds
+        if healthy != self.healthy:
+            log.info(
+                "Replica %s %s (lag %.1fs)"
+                % (self.name, "is back in rotation" if healthy else "lags behind", lag)
+            )
+        self.healthy, self.lag = healthy, lag
+
+
+class LazyReadSession:
+    """
+    Сессия для чтения данных пользователей subs, которая выбирает базу и
+    открывается при первом await. Зависимость, которой БД может не
+    понадобиться, не платит за проверку метки primary.
+    """
+
+    def __init__(self, helper: "DatabaseHelper", *subs: str) -> None:
+        self.helper = helper
+        self.subs = subs
+        self._session: AsyncSession | None = None
+
+    async def __call__(self) -> AsyncSession:
+        if self._session is None:
+            session_factory = await self.helper.read_session_factory_for(*self.subs)
+            self._session = session_factory()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
 
 class DatabaseHelper:
+    """
+    Запись и чтение, которому нужна свежесть, — через session_factory
+    (primary). Остальное чтение — через read_session_factory: по кругу
+    среди здоровых реплик, без них — в primary.
+    """
+
     def __init__(
             self,
             url: str,
             echo: bool = False,
             echo_pool: bool = False,
             max_overflow: int = 10,
-            pool_size: int = 5
+            pool_size: int = 5,
+            replica_urls: Sequence[str] = (),
+            replica_max_overflow: int = 10,
+            replica_pool_size: int = 5,
     ):
         self.engine = create_async_engine(
             url=url,
             echo=echo,
             echo_pool=echo_pool,
             max_overflow=max_overflow,
-            pool_size=pool_size
+            pool_size=pool_size,
+            poolclass=InstrumentedPool,
         )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False,
+        self.session_factory: async_sessionmaker[AsyncSession] = _session_factory(
+            self.engine
         )
+        self.replicas = [
+            Replica(
+                create_async_engine(
+                    url=replica_url,
+                    echo=echo,
+                    echo_pool=echo_pool,
+                    max_overflow=replica_max_overflow,
+                    pool_size=replica_pool_size,
+                    poolclass=InstrumentedPool,
+                    pool_pre_ping=True,
+                )
+            )
+            for replica_url in replica_urls
+        ]
+        self._turn = itertools.count()
+        self._check_task: asyncio.Task | None = None
+
+    def read_session_factory(self, primary: bool = False) -> async_sessionmaker[AsyncSession]:
+        if primary:
+            _reads["pinned"].inc()
+            return self.session_factory
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            _reads["fallback" if self.replicas else "primary"].inc()
+            return self.session_factory
+        _reads["replica"].inc()
+        return healthy[next(self._turn) % len(healthy)].session_factory
+
+    async def read_session_factory_for(self, *subs: str) -> async_sessionmaker[AsyncSession]:
+        """Чтение данных пользователей subs: в primary, если кто-то из них недавно писал."""
+        if not self.replicas:
+            return self.read_session_factory()
+        return self.read_session_factory(primary=await PrimaryPin.is_pinned(*subs))
+
+    def lazy_read_session(self, *subs: str) -> LazyReadSession:
+        return LazyReadSession(self, *subs)
+
+    async def check_replicas(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def _check_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.db.replica_check_interval)
+            await self.check_replicas()
+
+    async def start(self) -> None:
+        if self.replicas and self._check_task is None:
+            await self.check_replicas()
+            self._check_task = asyncio.create_task(self._check_forever())
+
+    async def stop(self) -> None:
+        if self._check_task is not None:
+            self._check_task.cancel()
+            try:
+                await self._check_task
+            except asyncio.CancelledError:
+                pass
+            self._check_task = None
+
     async def dispose(self) -> None:
+        await self.stop()
         await self.engine.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        """Для чтений, не привязанных к пользователю; иначе read_session_factory_for."""
+        async with self.read_session_factory()() as session:
+            yield session
+
 
 db_helper = DatabaseHelper(
     url=str(settings.db.url),
     echo = settings.db.echo,
     echo_pool = settings.db.echo_pool,
     max_overflow = settings.db.max_overflow,
-    pool_size = settings.db.pool_size
-)
\ No newline at end of file
+    pool_size = settings.db.pool_size,
+    replica_urls = [str(url) for url in settings.db.replica_urls],
+    replica_max_overflow = settings.db.replica_max_overflow,
+    replica_pool_size = settings.db.replica_pool_size,
+)
@@ -1,9 +1,10 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy.dialects.postgresql import BYTEA
+from sqlalchemy.dialects.postgresql import BYTEA, INET
 from sqlalchemy.orm import Mapped, MappedColumn
-from sqlalchemy import String, DateTime, Enum, ForeignKey
+from sqlalchemy import String, DateTime, Enum, ForeignKey, Identity, Index, text
+from sqlalchemy.types import UUID
 from sqlalchemy.sql import func
 
 from .base import Base
@@ -23,8 +24,44 @@ class User(Base):
     )
 
 
+class UserAgent(Base):
+    """
+    Справочник названий устройств ("Chrome 139.0.0, Windows 10"): их
+    немного, и сессия хранит 4-байтовую ссылку вместо строки.
+    """
+
+    id: Mapped[int] = MappedColumn(Identity(), primary_key=True)
+    name: Mapped[str] = MappedColumn(nullable=False, unique=True)
+
+
 class Session(Base):
-    uuid: Mapped[str] = MappedColumn()
+    __table_args__ = (
+        Index("ix_sessions_uuid", "uuid", unique=True),
+        # Keyset-пагинация /sessions по (timestamp, id)
+        Index("ix_sessions_sub_timestamp_id", "sub", "timestamp", "id"),
+        # Цель ON CONFLICT в create_session
+        Index(
+            "uq_sessions_sub_ip_user_agent_id",
+            "sub",
+            "ip",
+            "user_agent_id",
+            unique=True,
+            postgresql_include=["uuid", "status"],
+        ),
+        Index(
+            "ix_sessions_active_timestamp",
+            "timestamp",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+        # Удаление неактивных сессий в SessionGC
+        Index(
+            "ix_sessions_inactive_timestamp",
+            "timestamp",
+            postgresql_where=text("status <> 'ACTIVE'"),
+        ),
+    )
+
+    uuid: Mapped[str] = MappedColumn(UUID(as_uuid=False))
     status: Mapped[SessionStatus] = MappedColumn(
         Enum(SessionStatus, name="session_status"), nullable=False
     )
@@ -32,8 +69,45 @@ class Session(Base):
         DateTime, server_default=func.current_timestamp()
     )
     sub: Mapped[str] = MappedColumn(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    name: Mapped[str] = MappedColumn(nullable=False)
-    ip: Mapped[str] = MappedColumn(nullable=False)
+    user_agent_id: Mapped[int] = MappedColumn(
+        ForeignKey("user_agents.id"), nullable=False
+    )
+    ip: Mapped[str] = MappedColumn(INET, nullable=False)
     can_abort: Mapped[bool] = MappedColumn(nullable=False, default=False)
+
+
+class SessionHistory(Base):
+    """
+    Архив сессий, удалённых из sessions сборщиком SessionGC.
+
+    Секционирован по месяцам archived_at: старый месяц уходит одним
+    DETACH PARTITION (jobs.partitions), а запросы с условием на
+    archived_at читают только нужные секции. Живая таблица sessions не
+    секционируется: уникальный индекс (sub, ip, name) под ON CONFLICT
+    обязан включать ключ секционирования, а timestamp меняется при каждом
+    повторном входе.
+    """
+
+    __tablename__ = "session_history"
+    __table_args__ = (
+        Index("ix_session_history_sub_archived_at", "sub", "archived_at"),
+        {"postgresql_partition_by": "RANGE (archived_at)"},
+    )
+
+    archived_at: Mapped[datetime] = MappedColumn(
+        DateTime, primary_key=True, server_default=func.current_timestamp()
+    )
+    uuid: Mapped[str] = MappedColumn(UUID(as_uuid=False), nullable=False)
+    status: Mapped[SessionStatus] = MappedColumn(
+        Enum(SessionStatus, name="session_status"), nullable=False
+    )
+    timestamp: Mapped[datetime] = MappedColumn(DateTime, nullable=False)
+    # Без внешнего ключа: история переживает удаление пользователя
+    sub: Mapped[str] = MappedColumn(UUID(as_uuid=False), nullable=False)
+    user_agent_id: Mapped[int] = MappedColumn(
+        ForeignKey("user_agents.id"), nullable=False
+    )
+    ip: Mapped[str] = MappedColumn(INET, nullable=False)
+    can_abort: Mapped[bool] = MappedColumn(nullable=False)
@@ -1,14 +1,91 @@
-from redis.asyncio import Redis
+import time
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
 
 from core.config import settings
+from core.metrics import REDIS_POOL_CHECKOUT_SECONDS
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Пул, который сам считает свои соединения и ожидание свободного.
+    Только через переопределение публичных методов: внутренние списки
+    пула redis-py меняются от версии к версии.
+    """
+
+    created: int = 0
+    in_use: int = 0
+
+    def __init__(self, name: str, **kwargs) -> None:
+        self.name = name
+        self._checkout_wait = REDIS_POOL_CHECKOUT_SECONDS.labels(name)
+        super().__init__(**kwargs)
+
+    def reset(self):
+        super().reset()
+        self.created = 0
+        self.in_use = 0
+
+    def make_connection(self):
+        connection = super().make_connection()
+        self.created += 1
+        return connection
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        finally:
+            self._checkout_wait.observe(time.perf_counter() - started)
+        self.in_use += 1
+        return connection
+
+    async def release(self, connection):
+        self.in_use -= 1
+        await super().release(connection)
+
+
+def _make_pool(
+    name: str, max_connections: int, socket_timeout: float | None
+) -> InstrumentedConnectionPool:
+    """
+    При исчерпании пула запрос ждёт свободное соединение не дольше
+    pool_timeout, а не открывает новые без ограничений.
+    """
+    config = settings.redis
+    return InstrumentedConnectionPool(
+        name,
+        host=config.host,
+        port=config.port,
+        db=config.db,
+        decode_responses=config.decode_responses,
+        protocol=config.protocol,
+        max_connections=max_connections,
+        timeout=config.pool_timeout,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=config.socket_connect_timeout,
+        socket_keepalive=True,
+        health_check_interval=config.health_check_interval,
+        retry=Retry(
+            ExponentialBackoff(cap=config.backoff_cap, base=config.backoff_base),
+            config.retries,
+        ),
+        retry_on_error=[ConnectionError, TimeoutError],
+    )
 
 
 class RedisClient:
-    redis_client: Redis = Redis(
-        host=settings.redis.host,
-        port=settings.redis.port,
-        db=settings.redis.db,
-        decode_responses=settings.redis.decode_responses,
+    redis_client: Redis = Redis.from_pool(
+        _make_pool("main", settings.redis.max_connections, settings.redis.socket_timeout)
+    )
+    # Для долгих блокирующих чтений (pub/sub, XREADGROUP ... BLOCK):
+    # socket_timeout основного пула оборвал бы их, а занятые ими соединения
+    # не должны отниматься у запросов
+    blocking_client: Redis = Redis.from_pool(
+        _make_pool("blocking", settings.redis.blocking_max_connections, None)
     )
 
     @classmethod
@@ -17,5 +94,5 @@ class RedisClient:
 
     @classmethod
     async def close(cls):
-        if cls.redis_client:
-            await cls.redis_client.close()
+        await cls.redis_client.aclose()
+        await cls.blocking_client.aclose()
@@ -1,6 +1,7 @@
+import asyncio
 import functools
-import hashlib
-import json
+import time
+import uuid
 from typing import (
     Type,
     Callable,
@@ -9,28 +10,319 @@ from typing import (
     Sequence
 )
 
-from pydantic import BaseModel
+import orjson
+from loguru import logger as log
+from pydantic import BaseModel, ValidationError
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings
+from core.metrics import CACHE_FETCH_SECONDS, CACHE_REQUESTS
+from core.models.db_helper import db_helper
 from core.redis import RedisClient
+from core.redis.keys import KeyBuilder
+from core.redis.local import LocalCache, MISSING
+from core.redis.serializers import SerializerName, get_serializer
+from core.redis.tracking import ClientTracking
 
 
 class Cache:
     redis_client: Redis = RedisClient.redis_client
-
-    @classmethod
-    def _make_key(cls, namespace: str, func: Callable[..., Awaitable[Any]], kwargs: dict) -> str:
-        """Создаёт хэшированный ключ для Redis."""
-        raw = f"{namespace}:{func.__module__}:{func.__name__}:{kwargs}"
-        return f"{namespace}:{hashlib.sha256(raw.encode()).hexdigest()}"
+    local: LocalCache | None = (
+        LocalCache(
+            maxsize=settings.redis.local_cache_maxsize,
+            ttl=settings.redis.local_cache_ttl,
+        )
+        if settings.redis.local_cache_enabled
+        else None
+    )
+    _listener: asyncio.Task | None = None
+    tracking: ClientTracking | None = None
+    _inflight: dict[str, asyncio.Future] = {}
+    _background: set[asyncio.Task] = set()
+    # Ключи тегов и сами теги удаляются за одно обращение к Redis
+    _drop_tags = redis_client.register_script(
+        """
+        local dropped = {}
+        for _, tag_key in ipairs(KEYS) do
+            local members = redis.call('SMEMBERS', tag_key)
+            for i = 1, #members, 500 do
+                redis.call('UNLINK', unpack(members, i, math.min(i + 499, #members)))
+            end
+            for _, member in ipairs(members) do
+                dropped[#dropped + 1] = member
+            end
+            redis.call('UNLINK', tag_key)
+        end
+        return dropped
+        """
+    )
+    _release_lock = redis_client.register_script(
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
 
     @classmethod
     async def _clear_namespace(cls, namespace: str):
         """Удаляет все ключи для указанного namespace."""
         pattern = f"{namespace}:*"
-        async for key in cls.redis_client.scan_iter(match=pattern):
-            await cls.redis_client.delete(key)
+        batch = []
+        async for key in cls.redis_client.scan_iter(match=pattern, count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await cls.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            await cls.redis_client.unlink(*batch)
+        await cls._invalidate_local(prefixes=[f"{namespace}:"])
+
+    @classmethod
+    def _tag_key(cls, namespace: str, tag: str) -> str:
+        return f"{namespace}:tag:{tag}"
+
+    @classmethod
+    async def invalidate_tags(cls, namespace: str, tags: Sequence[str]):
+        """
+        Удаляет только ключи, зарегистрированные под указанными тегами.
+        Для записей в обход Cache.redis(write=True): фоновых задач и т.п.
+        """
+        tag_keys = [cls._tag_key(namespace, tag) for tag in tags]
+        members = await cls._drop_tags(keys=tag_keys)
+        keys = [key.decode() if isinstance(key, bytes) else key for key in members]
+        await cls._invalidate_local(keys=keys)
+
+    @classmethod
+    async def _invalidate_local(
+        cls,
+        keys: Sequence[str] = (),
+        prefixes: Sequence[str] = (),
+    ):
+        """Сбрасывает L1 в текущем воркере и рассылает инвалидацию остальным."""
+        if cls.local is None:
+            return
+        cls._evict_local(keys, prefixes)
+        message = orjson.dumps({"keys": list(keys), "prefixes": list(prefixes)})
+        try:
+            await cls.redis_client.publish(settings.redis.invalidation_channel, message)
+        except RedisError as e:
+            log.warning("Cache invalidation publish failed: %s" % e)
+
+    @classmethod
+    def _evict_local(cls, keys: Sequence[str], prefixes: Sequence[str]):
+        cls.local.delete(keys)
+        for prefix in prefixes:
+            cls.local.delete_prefix(prefix)
+
+    @classmethod
+    def _on_tracking_invalidate(cls, keys: list[str] | None):
+        if keys is None:
+            cls.local.clear()
+        else:
+            cls.local.delete(keys)
+
+    @classmethod
+    def _read_sequence(cls) -> int:
+        """Снимок номера инвалидации перед чтением из Redis."""
+        return cls.tracking.sequence if cls.tracking is not None else 0
+
+    @classmethod
+    def _remember(cls, cache_key: str, value: Any, ttl: int, sequence: int | None = None):
+        """
+        Кладёт значение в L1. Ключи под CLIENT TRACKING попадают туда
+        только после чтения из Redis (sequence — снимок _read_sequence до
+        него) и живут до ttl: об их изменении сообщит Redis. Собственная
+        запись в Redis всё равно пришлёт инвалидацию, её не кэшируем.
+        """
+        if cls.tracking is not None and cls.tracking.covers(cache_key):
+            if sequence is not None and cls.tracking.unchanged_since(cache_key, sequence):
+                cls.local.set(cache_key, value, ttl, cap=False)
+            return
+        cls.local.set(cache_key, value, ttl)
+
+    @classmethod
+    async def _listen_invalidations(cls):
+        """Слушает канал инвалидаций, пока не будет отменён."""
+        while True:
+            try:
+                async with RedisClient.blocking_client.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.redis.invalidation_channel)
+                    # Пока подписки не было, сообщения могли потеряться
+                    cls.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = orjson.loads(message["data"])
+                        cls._evict_local(data["keys"], data["prefixes"])
+            except RedisError as e:
+                log.warning("Cache invalidation listener disconnected: %s" % e)
+                cls.local.clear()
+                await asyncio.sleep(1)
+
+    @classmethod
+    async def start(cls):
+        if cls.local is not None and cls._listener is None:
+            cls._listener = asyncio.create_task(cls._listen_invalidations())
+        if cls.local is not None and settings.redis.tracking_enabled and cls.tracking is None:
+            cls.tracking = ClientTracking(
+                RedisClient.blocking_client.connection_pool.connection_kwargs,
+                settings.redis.tracking_prefixes,
+                cls._on_tracking_invalidate,
+            )
+            await cls.tracking.start()
+
+    @classmethod
+    async def stop(cls):
+        if cls._listener is not None:
+            cls._listener.cancel()
+            try:
+                await cls._listener
+            except asyncio.CancelledError:
+                pass
+            cls._listener = None
+        if cls.tracking is not None:
+            await cls.tracking.stop()
+            cls.tracking = None
+
+    @classmethod
+    async def _fetch(cls, cache_key: str, stale_ttl: int) -> tuple[bytes | None, bool]:
+        """Читает значение из Redis и признак его свежести."""
+        if not stale_ttl:
+            return await cls.redis_client.get(cache_key), True
+        cached, fresh = await cls.redis_client.mget(cache_key, f"{cache_key}:fresh")
+        return cached, fresh is not None
+
+    @classmethod
+    async def get_many(cls, cache_keys: Sequence[str], stale_ttl: int = 0) -> list[bytes | None]:
+        """Один MGET на все ключи; устаревшие значения считаются промахом."""
+        if not cache_keys:
+            return []
+        if not stale_ttl:
+            return await cls.redis_client.mget(cache_keys)
+        values = await cls.redis_client.mget(
+            [*cache_keys, *(f"{key}:fresh" for key in cache_keys)]
+        )
+        count = len(cache_keys)
+        return [
+            value if fresh is not None else None
+            for value, fresh in zip(values[:count], values[count:])
+        ]
+
+    @classmethod
+    async def set_many(
+        cls,
+        namespace: str,
+        entries: Sequence[tuple[str, bytes, Sequence[str]]],
+        ttl: int,
+        stale_ttl: int = 0,
+    ):
+        """
+        Сохраняет записи (ключ, значение, теги) одним pipeline: SETEX,
+        маркер свежести и регистрация ключей под тегами.
+        """
+        if not entries:
+            return
+        pipe = cls.redis_client.pipeline(transaction=False)
+        for cache_key, data, tags in entries:
+            pipe.setex(cache_key, ttl + stale_ttl, data)
+            if stale_ttl:
+                pipe.setex(f"{cache_key}:fresh", ttl, 1)
+            for tag in tags:
+                tag_key = cls._tag_key(namespace, tag)
+                pipe.sadd(tag_key, cache_key)
+                pipe.expire(tag_key, ttl + stale_ttl)
+        await pipe.execute()
+
+    @classmethod
+    async def _store(
+        cls,
+        namespace: str,
+        cache_key: str,
+        data: bytes,
+        ttl: int,
+        stale_ttl: int,
+        tags: Sequence[str],
+    ):
+        await cls.set_many(namespace, [(cache_key, data, tags)], ttl, stale_ttl)
+
+    @classmethod
+    async def _coalesce(cls, cache_key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Одновременные промахи по одному ключу в воркере ждут одну загрузку."""
+        if future := cls._inflight.get(cache_key):
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили не нас, а ведущий запрос — загружаем сами
+                if not future.cancelled():
+                    raise
+                return await load()
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[cache_key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим, не логировать его повторно
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del cls._inflight[cache_key]
+
+    @classmethod
+    async def _load(
+        cls,
+        cache_key: str,
+        compute: Callable[[], Awaitable[Any]],
+        decode: Callable[[bytes], Any],
+    ) -> Any:
+        """
+        Загрузка под распределённой блокировкой с lease: между воркерами
+        значение вычисляет только владелец блокировки, остальные ждут,
+        пока оно появится в Redis или блокировка будет снята, но не
+        дольше срока аренды. Пустой результат не кэшируется, поэтому
+        снятая блокировка без значения — сигнал вычислять самим.
+        """
+        lock_key = f"{cache_key}:lock"
+        lease = settings.redis.lock_lease_ms
+        token = uuid.uuid4().hex
+        try:
+            acquired = await cls.redis_client.set(lock_key, token, nx=True, px=lease)
+        except RedisError as e:
+            log.warning("Cache lock failed: %s" % e)
+            return await compute()
+
+        if not acquired:
+            deadline = time.monotonic() + lease / 1000
+            while time.monotonic() < deadline:
+                await asyncio.sleep(settings.redis.lock_poll_ms / 1000)
+                cached, holder = await cls.redis_client.mget(cache_key, lock_key)
+                if cached:
+                    return decode(cached)
+                if holder is None:
+                    # Владелец закончил без значения (пустой результат) или упал
+                    break
+            # Владелец не успел за время аренды или не оставил значения — вычисляем сами
+            return await compute()
+
+        try:
+            return await compute()
+        finally:
+            await cls._release_lock(keys=[lock_key], args=[token])
+
+    @classmethod
+    def _revalidate(cls, cache_key: str, load: Callable[[], Awaitable[Any]]):
+        """Обновляет устаревшее значение в фоне, не задерживая запрос."""
+        if cache_key in cls._inflight:
+            return
+        task = asyncio.create_task(cls._coalesce(cache_key, load))
+        cls._background.add(task)
+        task.add_done_callback(cls._background.discard)
 
     @classmethod
     def redis(
@@ -40,55 +332,178 @@ class Cache:
         read: bool = False,
         write: bool = False,
         model_class: Type[BaseModel] | Type[Sequence[BaseModel]] = None,
+        local: bool = True,
+        tags: Sequence[str] = (),
+        key: str | None = None,
+        key_fields: Sequence[str] | None = None,
+        single_flight: bool = True,
+        stale_ttl: int = 0,
+        serializer: SerializerName | None = None,
     ):
+        """
+        key / key_fields — как строится ключ, см. KeyBuilder.
+        tags — шаблоны тегов, например ``"sub:{sub_id}"`` или
+        ``"session:{new_session.sub}"``; подставляются аргументы вызова.
+        В режиме чтения ключ регистрируется под тегами, в режиме записи
+        после выполнения функции сбрасываются только ключи этих тегов.
+        Запись без тегов очищает весь namespace.
+        single_flight — промахи по одному ключу не дублируют запрос к БД.
+        stale_ttl — сколько секунд после ttl отдавать устаревшее значение,
+        обновляя его в фоне (stale-while-revalidate).
+        serializer — формат значений в Redis, по умолчанию из настроек.
+        У обёртки режима чтения есть cached_many / store_many — чтение и
+        запись кэша пачкой для пакетных загрузчиков.
+        """
+
         def decorator(func: Callable[..., Awaitable[Any]]):
+            keys = KeyBuilder(namespace, func, template=key, fields=key_fields)
+            codec = get_serializer(serializer or settings.redis.serializer, model_class)
+            l1_hits = CACHE_REQUESTS.labels(namespace, "l1_hit")
+            hits = CACHE_REQUESTS.labels(namespace, "hit")
+            stale_hits = CACHE_REQUESTS.labels(namespace, "stale")
+            misses = CACHE_REQUESTS.labels(namespace, "miss")
+            fetch_seconds = CACHE_FETCH_SECONDS.labels(namespace)
+
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
-                # Очистка от AsyncSession
-                cleaned_kwargs = {
-                    k: (None if isinstance(v, AsyncSession) else v)
-                    for k, v in kwargs.items()
-                }
+                arguments = keys.bind(args, kwargs)
+                rendered_tags = [tag.format(**arguments) for tag in tags]
 
-                # Если режим записи — очистить кэш и выполнить функцию
+                # Если режим записи — выполнить функцию и сбросить её теги
                 if write:
-                    await cls._clear_namespace(namespace)
-                    return await func(*args, **kwargs)
+                    if not tags:
+                        await cls._clear_namespace(namespace)
+                        return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
+                    await cls.invalidate_tags(namespace, rendered_tags)
+                    return result
 
-                # Если режим чтения — попытка прочитать из кэша
-                if read:
-                    cache_key = cls._make_key(namespace, func, cleaned_kwargs)
-                    cached = await cls.redis_client.get(cache_key)
+                # Без кэширования
+                if not read:
+                    return await func(*args, **kwargs)
 
-                    if cached:
-                        data = json.loads(cached)
-                        if model_class:
-                            if isinstance(data, list):
-                                return [model_class.model_validate(i) for i in data]
-                            return model_class.model_validate(data)
-                        return data
+                cache_key = keys.build(arguments)
+                use_local = local and cls.local is not None
 
-                    # Если данных нет в кэше — выполняем и сохраняем
-                    result = await func(*args, **kwargs)
+                async def compute(call_kwargs: dict) -> Any:
+                    result = await func(**call_kwargs)
                     if not result:
                         return result
+                    value, data = codec.dumps(result)
+                    await cls._store(
+                        namespace, cache_key, data, ttl, stale_ttl, rendered_tags
+                    )
+                    if use_local:
+                        cls._remember(cache_key, value, ttl)
+                    return value
 
-                    if model_class:
-                        if isinstance(result, list):
-                            json_data = json.dumps(
-                                [model_class.model_validate(i).model_dump() for i in result]
-                            )
-                        else:
-                            json_data = model_class.model_validate(result).model_dump_json()
+                async def load() -> Any:
+                    if not single_flight:
+                        return await compute(arguments)
+                    return await cls._load(
+                        cache_key, lambda: compute(arguments), codec.loads
+                    )
+
+                async def refresh() -> Any:
+                    # Сессия запроса к этому моменту может быть закрыта
+                    async with db_helper.session_factory() as db_session:
+                        call_kwargs = {
+                            k: db_session if isinstance(v, AsyncSession) else v
+                            for k, v in arguments.items()
+                        }
+                        return await cls._load(
+                            cache_key, lambda: compute(call_kwargs), codec.loads
+                        )
+
+                # Сначала L1 в памяти воркера, затем Redis
+                if use_local:
+                    value = cls.local.get(cache_key)
+                    if value is not MISSING:
+                        l1_hits.inc()
+                        return value
+
+                sequence = cls._read_sequence()
+                started = time.perf_counter()
+                cached, fresh = await cls._fetch(cache_key, stale_ttl)
+                fetch_seconds.observe(time.perf_counter() - started)
+                try:
+                    value = codec.loads(cached) if cached else MISSING
+                except (ValueError, ValidationError):
+                    # Запись в другом формате, например после смены serializer
+                    value = MISSING
+                if value is not MISSING:
+                    if not fresh:
+                        stale_hits.inc()
+                        cls._revalidate(cache_key, refresh)
                     else:
-                        json_data = json.dumps(result)
+                        hits.inc()
+                        if use_local:
+                            cls._remember(cache_key, value, ttl, sequence)
+                    return value
 
-                    await cls.redis_client.setex(cache_key, ttl, json_data)
-                    return result
+                misses.inc()
 
-                # Без кэширования
-                return await func(*args, **kwargs)
+                # Если данных нет в кэше — выполняем и сохраняем
+                if single_flight:
+                    return await cls._coalesce(cache_key, load)
+                return await load()
+
+            async def cached_many(calls: Sequence[dict[str, Any]]) -> list[Any]:
+                """
+                Значения для нескольких вызовов: L1, затем один MGET.
+                calls — аргументы вызовов (без сессии БД); промах — MISSING.
+                """
+                cache_keys = [keys.build(arguments) for arguments in calls]
+                use_local = local and cls.local is not None
+                values = [
+                    cls.local.get(cache_key) if use_local else MISSING
+                    for cache_key in cache_keys
+                ]
+                pending = [i for i, value in enumerate(values) if value is MISSING]
+                l1_hits.inc(len(values) - len(pending))
+                if not pending:
+                    return values
+                sequence = cls._read_sequence()
+                started = time.perf_counter()
+                raw = await cls.get_many([cache_keys[i] for i in pending], stale_ttl)
+                fetch_seconds.observe(time.perf_counter() - started)
+                found = 0
+                for i, cached in zip(pending, raw):
+                    if not cached:
+                        continue
+                    try:
+                        values[i] = codec.loads(cached)
+                    except (ValueError, ValidationError):
+                        continue
+                    found += 1
+                    if use_local:
+                        cls._remember(cache_keys[i], values[i], ttl, sequence)
+                hits.inc(found)
+                misses.inc(len(pending) - found)
+                return values
+
+            async def store_many(items: Sequence[tuple[dict[str, Any], Any]]) -> list[Any]:
+                """
+                Кэширует результаты, полученные в обход функции (например
+                одним пакетным запросом), одним pipeline; возвращает их в том
+                виде, в каком их вернула бы сама функция.
+                """
+                use_local = local and cls.local is not None
+                entries, values = [], []
+                for arguments, result in items:
+                    value, data = codec.dumps(result)
+                    cache_key = keys.build(arguments)
+                    entries.append(
+                        (cache_key, data, [tag.format(**arguments) for tag in tags])
+                    )
+                    if use_local:
+                        cls._remember(cache_key, value, ttl)
+                    values.append(value)
+                await cls.set_many(namespace, entries, ttl, stale_ttl)
+                return values
 
+            wrapper.cached_many = cached_many
+            wrapper.store_many = store_many
             return wrapper
 
         return decorator
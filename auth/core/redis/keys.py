@@ -0,0 +1,72 @@
+import inspect
+from operator import attrgetter
+from typing import Any, Callable, Awaitable, Sequence
+
+import orjson
+import xxhash
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError
+
+
+def _field_getter(path: str) -> Callable[[dict], Any]:
+    name, _, attrs = path.partition(".")
+    if not attrs:
+        return lambda arguments: arguments[name]
+    getter = attrgetter(attrs)
+    return lambda arguments: getter(arguments[name])
+
+
+class KeyBuilder:
+    """
+    Строит ключ Redis по аргументам функции.
+
+    Аргументы связываются через сигнатуру, поэтому позиционный и
+    именованный вызовы дают один и тот же ключ; AsyncSession пропускается.
+    - template: ключ без хэширования, например ``"{sub_id}"``;
+    - fields: только эти аргументы (допустимы пути ``"new_session.sub"``)
+      сериализуются в канонический вид и хэшируются;
+    - без обоих хэшируются все аргументы, кроме сессии БД.
+
+    Хэш — некриптографический XXH3-128: ключи строятся на каждом обращении
+    к кэшу, а стойкость к подбору коллизий здесь не нужна.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        func: Callable[..., Awaitable[Any]],
+        template: str | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> None:
+        self.signature = inspect.signature(func)
+        self.prefix = f"{namespace}:{func.__name__}"
+        self.template = template
+        self._skip = {
+            name
+            for name, param in self.signature.parameters.items()
+            if param.annotation is AsyncSession
+        }
+        if fields is None:
+            fields = [name for name in self.signature.parameters if name not in self._skip]
+        self._getters = [_field_getter(path) for path in fields]
+
+    def bind(self, args: tuple, kwargs: dict) -> dict[str, Any]:
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound.arguments
+
+    def build(self, arguments: dict[str, Any]) -> str:
+        if self.template is not None:
+            return f"{self.prefix}:{self.template.format(**arguments)}"
+        values = [
+            None if isinstance(value, AsyncSession) else value
+            for value in (getter(arguments) for getter in self._getters)
+        ]
+        raw = orjson.dumps(values, default=_default, option=orjson.OPT_SORT_KEYS)
+        return f"{self.prefix}:{xxhash.xxh3_128_hexdigest(raw)}"
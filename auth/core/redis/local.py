@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+MISSING = object()
+
+
+class LocalCache:
+    """Ограниченный LRU/TTL кэш в памяти воркера (L1 перед Redis)."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 5.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None, cap: bool = True) -> None:
+        """cap=False — ключ отслеживается Redis (CLIENT TRACKING), ttl не урезается."""
+        if ttl is None:
+            ttl = self.ttl
+        elif cap:
+            ttl = min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -0,0 +1,57 @@
+import time
+
+from loguru import logger as log
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from core.redis import RedisClient
+
+
+class PrimaryPin:
+    """
+    Read-your-writes при чтении с реплик: после записи пользователь на
+    primary_pin_seconds закрепляется за primary.
+
+    Метка — ключ с TTL в Redis, поэтому её видят все воркеры. Свои метки
+    воркер помнит в памяти и за ними в Redis не ходит.
+    """
+
+    redis_client: Redis = RedisClient.redis_client
+    prefix: str = "db:primary_pin:"
+    max_local: int = 10_000
+    _pinned: dict[str, float] = {}
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return bool(settings.db.replica_urls) and settings.db.primary_pin_seconds > 0
+
+    @classmethod
+    async def pin(cls, sub: str):
+        if not cls.enabled():
+            return
+        sub = str(sub)
+        seconds = settings.db.primary_pin_seconds
+        now = time.monotonic()
+        if len(cls._pinned) >= cls.max_local:
+            cls._pinned = {k: v for k, v in cls._pinned.items() if v > now}
+        cls._pinned[sub] = now + seconds
+        try:
+            await cls.redis_client.set(cls.prefix + sub, 1, px=int(seconds * 1000))
+        except RedisError as e:
+            log.warning("Primary pin for %s not shared: %s" % (sub, e))
+
+    @classmethod
+    async def is_pinned(cls, *subs: str) -> bool:
+        if not cls.enabled() or not subs:
+            return False
+        subs = [str(sub) for sub in subs]
+        now = time.monotonic()
+        if any(cls._pinned.get(sub, 0) > now for sub in subs):
+            return True
+        try:
+            return await cls.redis_client.exists(*(cls.prefix + sub for sub in subs)) > 0
+        except RedisError as e:
+            # Неизвестно, кто писал недавно: устаревшее чтение хуже лишней нагрузки
+            log.warning("Primary pin check failed: %s" % e)
+            return True
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from loguru import logger as log
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from core.redis import RedisClient
+
+
+class RevocationSet:
+    """
+    Отозванные session_uuid для проверки access-токенов без запроса сессии.
+
+    Источник истины — sorted set в Redis (score — момент, после которого
+    все access-токены сессии уже истекли). Каждый воркер держит его копию
+    в памяти и синхронизирует раз в revocation_sync_seconds, поэтому
+    отзыв виден остальным воркерам с задержкой не больше этого интервала.
+
+    Отзыв пишется в любом режиме проверки — при переключении на stateless
+    воркеры сразу знают отозванные сессии, — поэтому синхронизация, а с ней
+    и удаление истёкших записей, тоже идёт всегда.
+    """
+
+    redis_client: Redis = RedisClient.redis_client
+    key: str = "revoked_sessions"
+    _revoked: dict[str, float] = {}
+    # Изменения этого воркера, сделанные пока sync ждёт ответа Redis;
+    # None — отзыв снят
+    _pending: dict[str, float | None] | None = None
+    _sync_task: asyncio.Task | None = None
+
+    @classmethod
+    def _expires_at(cls) -> float:
+        return time.time() + settings.auth.access_token_expire_minutes * 60
+
+    @classmethod
+    def is_revoked(cls, uuid: str) -> bool:
+        expires_at = cls._revoked.get(uuid)
+        return expires_at is not None and expires_at > time.time()
+
+    @classmethod
+    async def revoke(cls, uuid: str):
+        expires_at = cls._expires_at()
+        cls._revoked[uuid] = expires_at
+        if cls._pending is not None:
+            cls._pending[uuid] = expires_at
+        await cls.redis_client.zadd(cls.key, {uuid: expires_at})
+
+    @classmethod
+    async def restore(cls, uuid: str):
+        """Снимает отзыв, когда сессия с тем же uuid снова стала активной."""
+        cls._revoked.pop(uuid, None)
+        if cls._pending is not None:
+            cls._pending[uuid] = None
+        await cls.redis_client.zrem(cls.key, uuid)
+
+    @classmethod
+    async def sync(cls):
+        now = time.time()
+        pipe = cls.redis_client.pipeline(transaction=False)
+        pipe.zremrangebyscore(cls.key, "-inf", now)
+        pipe.zrangebyscore(cls.key, now, "+inf", withscores=True)
+        cls._pending = {}
+        try:
+            _, revoked = await pipe.execute()
+        finally:
+            pending, cls._pending = cls._pending, None
+        current = {
+            (uuid.decode() if isinstance(uuid, bytes) else uuid): expires_at
+            for uuid, expires_at in revoked
+        }
+        # Ответ Redis мог разминуться с revoke/restore этого воркера
+        for uuid, expires_at in pending.items():
+            if expires_at is None:
+                current.pop(uuid, None)
+            else:
+                current[uuid] = expires_at
+        for uuid in cls._revoked.keys() - current.keys():
+            del cls._revoked[uuid]
+        cls._revoked.update(current)
+
+    @classmethod
+    async def _sync_forever(cls):
+        while True:
+            try:
+                await cls.sync()
+            except RedisError as e:
+                log.warning("Revocation set sync failed: %s" % e)
+            await asyncio.sleep(settings.auth.revocation_sync_seconds)
+
+    @classmethod
+    async def start(cls):
+        if cls._sync_task is None:
+            cls._sync_task = asyncio.create_task(cls._sync_forever())
+
+    @classmethod
+    async def stop(cls):
+        if cls._sync_task is not None:
+            cls._sync_task.cancel()
+            try:
+                await cls._sync_task
+            except asyncio.CancelledError:
+                pass
+            cls._sync_task = None
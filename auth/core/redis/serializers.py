@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from typing import Any, Literal, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+SerializerName = Literal["pydantic", "orjson", "msgpack"]
+
+
+class Serializer(ABC):
+    """
+    Преобразует результат функции в байты для Redis и обратно.
+    dumps возвращает также значение, которое отдаётся вызывающему и
+    кладётся в L1, чтобы не валидировать результат второй раз.
+    """
+
+    def __init__(self, model_class: Type[BaseModel] | None = None) -> None:
+        self.model_class = model_class
+
+    @abstractmethod
+    def dumps(self, result: Any) -> tuple[Any, bytes]: ...
+
+    @abstractmethod
+    def loads(self, raw: bytes) -> Any: ...
+
+    def _validate(self, data: Any) -> Any:
+        if not self.model_class:
+            return data
+        if isinstance(data, list):
+            return [self.model_class.model_validate(i) for i in data]
+        return self.model_class.model_validate(data)
+
+    def _dump(self, value: Any) -> Any:
+        if not self.model_class:
+            return value
+        if isinstance(value, list):
+            return [i.model_dump(mode="json") for i in value]
+        return value.model_dump(mode="json")
+
+
+class OrjsonSerializer(Serializer):
+    def dumps(self, result: Any) -> tuple[Any, bytes]:
+        value = self._validate(result)
+        return value, orjson.dumps(self._dump(value))
+
+    def loads(self, raw: bytes) -> Any:
+        return self._validate(orjson.loads(raw))
+
+
+class MsgpackSerializer(Serializer):
+    def __init__(self, model_class: Type[BaseModel] | None = None) -> None:
+        # msgpack — необязательная зависимость (extra), его наличие
+        # проверяет RedisConfig при загрузке настроек
+        import msgpack
+
+        super().__init__(model_class)
+        self._msgpack = msgpack
+
+    def dumps(self, result: Any) -> tuple[Any, bytes]:
+        value = self._validate(result)
+        return value, self._msgpack.packb(self._dump(value))
+
+    def loads(self, raw: bytes) -> Any:
+        return self._validate(self._msgpack.unpackb(raw))
+
+
+class PydanticSerializer(Serializer):
+    """Декодирует и валидирует попадание за один проход через pydantic-core."""
+
+    def __init__(self, model_class: Type[BaseModel]) -> None:
+        super().__init__(model_class)
+        self._one = TypeAdapter(model_class)
+        self._many = TypeAdapter(list[model_class])
+
+    def dumps(self, result: Any) -> tuple[Any, bytes]:
+        adapter = self._many if isinstance(result, list) else self._one
+        value = adapter.validate_python(result, from_attributes=True)
+        return value, adapter.dump_json(value)
+
+    def loads(self, raw: bytes) -> Any:
+        adapter = self._many if raw[:1] == b"[" else self._one
+        return adapter.validate_json(raw)
+
+
+def get_serializer(
+    name: SerializerName,
+    model_class: Type[BaseModel] | None = None,
+) -> Serializer:
+    if name == "msgpack":
+        return MsgpackSerializer(model_class)
+    if name == "pydantic" and model_class:
+        return PydanticSerializer(model_class)
+    return OrjsonSerializer(model_class)
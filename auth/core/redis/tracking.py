@@ -0,0 +1,152 @@
+import asyncio
+from typing import Callable, Sequence
+
+from loguru import logger as log
+from redis.asyncio.connection import Connection
+from redis.exceptions import RedisError
+
+INVALIDATE_CHANNEL = b"__redis__:invalidate"
+
+
+class ClientTracking:
+    """
+    Серверная поддержка клиентского кэша (CLIENT TRACKING, режим BCAST).
+
+    Одно соединение подписано на __redis__:invalidate, второе включает
+    отслеживание с REDIRECT на первое — так работает и с RESP2. В режиме
+    BCAST Redis сообщает о каждом изменённом или истёкшем ключе с одним из
+    prefixes, поэтому ключи в памяти можно держать до их ttl в Redis.
+    Пока соединений нет, active = False и L1 живёт по обычному ttl.
+
+    Проверка на локальном redis-server:
+    ``redis-cli CLIENT LIST`` показывает flags=t у управляющего соединения,
+    а ``redis-cli SET users:x 1`` вызывает on_invalidate(["users:x"]).
+    """
+
+    # История инвалидаций нужна только для чтений, начатых до сообщения
+    history_size: int = 10_000
+
+    def __init__(
+        self,
+        connection_kwargs: dict,
+        prefixes: Sequence[str],
+        on_invalidate: Callable[[list[str] | None], None],
+        keepalive_seconds: float = 30.0,
+    ) -> None:
+        # Блокирующее чтение без таймаута и без health check посреди подписки
+        self.connection_kwargs = {
+            **connection_kwargs,
+            "protocol": 2,
+            "decode_responses": False,
+            "socket_timeout": None,
+            "health_check_interval": 0,
+        }
+        self.prefixes = tuple(prefixes)
+        self.on_invalidate = on_invalidate
+        self.keepalive_seconds = keepalive_seconds
+        self.active = False
+        # Номер последнего сообщения; чтение из Redis запоминает его
+        # до запроса, чтобы не положить в память уже изменённый ключ
+        self.sequence = 0
+        self._invalidated: dict[str, int] = {}
+        self._floor = 0
+        self._task: asyncio.Task | None = None
+
+    def covers(self, key: str) -> bool:
+        return self.active and key.startswith(self.prefixes)
+
+    def unchanged_since(self, key: str, sequence: int) -> bool:
+        return sequence >= self._floor and self._invalidated.get(key, 0) <= sequence
+
+    def _record(self, keys: list[str] | None) -> None:
+        self.sequence += 1
+        if keys is None or len(self._invalidated) + len(keys) > self.history_size:
+            self._invalidated.clear()
+            self._floor = self.sequence
+        else:
+            for key in keys:
+                self._invalidated[key] = self.sequence
+        self.on_invalidate(keys)
+
+    async def _open(self) -> tuple[Connection, Connection]:
+        listener = Connection(**self.connection_kwargs)
+        control = Connection(**self.connection_kwargs)
+        try:
+            await listener.connect()
+            await listener.send_command("CLIENT", "ID")
+            client_id = await listener.read_response()
+            await listener.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+            await listener.read_response()
+
+            await control.connect()
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args += ["PREFIX", prefix]
+            await control.send_command(*args)
+            await control.read_response()
+        except BaseException:
+            await listener.disconnect()
+            await control.disconnect()
+            raise
+        return listener, control
+
+    async def _read(self, listener: Connection) -> None:
+        while True:
+            message = await listener.read_response()
+            # Остальное — ответы на PING из _keepalive
+            if message[0] != b"message" or message[1] != INVALIDATE_CHANNEL:
+                continue
+            keys = message[2]
+            # None — FLUSHALL/FLUSHDB, сбрасывается всё
+            self._record(None if keys is None else [key.decode() for key in keys])
+
+    async def _keepalive(self, listener: Connection, control: Connection) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_seconds)
+            await control.send_command("PING")
+            await control.read_response()
+            # Ответ придёт в _read; обрыв соединения проявится там же
+            await listener.send_command("PING")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                listener, control = await self._open()
+            except (RedisError, OSError) as e:
+                log.warning("Client tracking connection failed: %s" % e)
+                await asyncio.sleep(1)
+                continue
+            tasks = {
+                asyncio.create_task(self._read(listener)),
+                asyncio.create_task(self._keepalive(listener, control)),
+            }
+            # Изменения до подписки могли пройти мимо
+            self._record(None)
+            self.active = True
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            except (RedisError, OSError) as e:
+                log.warning("Client tracking disconnected: %s" % e)
+            finally:
+                self.active = False
+                self._record(None)
+                for task in tasks:
+                    task.cancel()
+                await listener.disconnect()
+                await control.disconnect()
+            await asyncio.sleep(1)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -49,6 +49,13 @@ class SessionBase(BaseModel):
         default=SessionStatus.ACTIVE, validate_default=True
     )
 
+    @field_validator("ip", mode="before")
+    def convert_inet_to_str(cls, v):
+        # INET приходит из asyncpg как IPv4Address / IPv6Address
+        if not isinstance(v, str):
+            return str(v)
+        return v
+
 
 class SessionCreate(SessionBase):
     status: SessionStatus = SessionStatus.ACTIVE
@@ -64,3 +71,34 @@ class SessionRead(SessionBase):
         if isinstance(v, datetime):
             return v.timestamp()
         return v
+
+
+class SessionPage(BaseModel):
+    items: list[SessionRead]
+    # Передаётся в cursor следующего запроса; None — страниц больше нет
+    next_cursor: str | None = None
+
+
+class SessionHistoryRead(BaseModel):
+    model_config = ConfigDict(
+        use_enum_values=True,
+        from_attributes=True,
+    )
+    uuid: str
+    ip: str
+    status: SessionStatus
+    can_abort: bool
+    timestamp: float
+    archived_at: float
+
+    @field_validator("ip", mode="before")
+    def convert_inet_to_str(cls, v):
+        if not isinstance(v, str):
+            return str(v)
+        return v
+
+    @field_validator("timestamp", "archived_at", mode="before")
+    def convert_datetime_to_timestamp(cls, v):
+        if isinstance(v, datetime):
+            return v.timestamp()
+        return v
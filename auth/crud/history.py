@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import DB_QUERY_SECONDS, timed
+from core.models import SessionHistory
+
+
+@timed(DB_QUERY_SECONDS)
+async def get_session_history(
+    session: AsyncSession,
+    sub_id: str,
+    since: datetime,
+    until: datetime | None = None,
+) -> Sequence[SessionHistory]:
+    """
+    Архивные сессии пользователя, перенесённые в [since, until).
+    Условие на archived_at обязательно: по нему планировщик отбрасывает
+    секции вне диапазона и не читает архив целиком.
+    """
+    stmt = select(SessionHistory).where(
+        SessionHistory.sub == sub_id,
+        SessionHistory.archived_at >= since,
+    )
+    if until is not None:
+        stmt = stmt.where(SessionHistory.archived_at < until)
+    result = await session.scalars(stmt.order_by(SessionHistory.archived_at))
+    return result.all()
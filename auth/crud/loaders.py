@@ -0,0 +1,15 @@
+from core.config import settings
+from crud.tokens import get_sessions_info
+from crud.users import get_users_by_ids
+from utils.batch_loader import BatchLoader
+
+session_loader = BatchLoader(
+    get_sessions_info,
+    window_ms=settings.loader.window_ms,
+    max_batch=settings.loader.max_batch,
+)
+user_loader = BatchLoader(
+    get_users_by_ids,
+    window_ms=settings.loader.window_ms,
+    max_batch=settings.loader.max_batch,
+)
@@ -0,0 +1,19 @@
+__all__ = (
+    "SessionStore",
+    "PostgresSessionStore",
+    "RedisSessionStore",
+    "SessionWriteBehind",
+    "session_store",
+)
+
+from core.config import settings
+from .base import SessionStore
+from .postgres import PostgresSessionStore
+from .redis import RedisSessionStore
+from .write_behind import SessionWriteBehind
+
+session_store: SessionStore = (
+    RedisSessionStore()
+    if settings.sessions.backend == "redis"
+    else PostgresSessionStore()
+)
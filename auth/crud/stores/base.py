@@ -0,0 +1,87 @@
+from abc import ABC, abstractmethod
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models.user import SessionStatus
+from core.schemas.token import SessionCreate, SessionPage, SessionRead
+
+
+class SessionStore(ABC):
+    """
+    Хранилище сессий. Сессия БД передаётся всем методам, даже если
+    хранилище её не использует, чтобы бэкенды были взаимозаменяемы.
+    """
+
+    @abstractmethod
+    async def create(
+        self,
+        session: AsyncSession,
+        new_session: SessionCreate,
+    ) -> SessionCreate:
+        """Возвращает new_session с каноническим uuid сессии устройства."""
+
+    @abstractmethod
+    async def get_user_sessions(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+    ) -> Sequence[SessionRead | Any]: ...
+
+    @abstractmethod
+    async def get_user_sessions_page(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+        limit: int,
+        cursor: str | None = None,
+        status: SessionStatus | None = None,
+    ) -> SessionPage:
+        """
+        Не больше limit сессий после cursor. Курсор непрозрачен и годится
+        только для бэкенда, который его выдал.
+        """
+
+    @abstractmethod
+    async def get_info(
+        self,
+        session: AsyncSession,
+        uuid: str,
+    ) -> SessionRead | Any | None:
+        """Только активная сессия, иначе None."""
+
+    @abstractmethod
+    async def get_info_many(
+        self,
+        uuids: Sequence[str],
+    ) -> dict[str, SessionRead | Any]:
+        """
+        Активные сессии из uuids одним обращением к хранилищу; для пакетных
+        загрузчиков, поэтому сессию БД открывает сам.
+        """
+
+    @abstractmethod
+    async def abort(
+        self,
+        session: AsyncSession,
+        uuid: str,
+        sub_id: str,
+    ) -> None: ...
+
+    @abstractmethod
+    async def abort_another(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+        uuid: str,
+    ) -> str:
+        """
+        Отключает сессию uuid пользователя sub_id и возвращает её uuid
+        или бросает SessionNotFound.
+        """
+
+    async def forget(self, sessions: Sequence[Any]) -> None:
+        """
+        Убирает удалённые из Postgres сессии (строки с uuid, sub, ip, name)
+        из собственного хранилища бэкенда, если оно есть.
+        """
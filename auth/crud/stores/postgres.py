@@ -0,0 +1,251 @@
+from typing import Sequence
+
+from sqlalchemy import Row, Select, any_, bindparam, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import UUID
+
+from api.exceptions.auth import SessionNotFound
+from core.metrics import DB_QUERY_SECONDS, timed
+from core.models import db_helper
+from core.models.user import Session, SessionStatus, UserAgent
+from core.redis.cache import Cache
+from core.redis.local import MISSING
+from core.schemas.token import SessionCreate, SessionPage, SessionRead
+from crud.user_agents import get_user_agent_id
+from utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    parse_naive_datetime,
+    parse_uuid,
+)
+from .base import SessionStore
+
+
+@Cache.redis(write=True, namespace="sessions", tags=("sub:{new_session.sub}",))
+@timed(DB_QUERY_SECONDS)
+async def create_session(
+    session: AsyncSession,
+    new_session: SessionCreate,
+):
+    """
+    Создаёт новую сессию если не находит похожей, уже существующей.
+    Похожей сессия считается, если у них совпадает:
+    - name (user-agent),
+    - ip (ip-address),
+    - Айди пользователя
+    Поиск и вставка — один INSERT ... ON CONFLICT по уникальному индексу,
+    поэтому одновременные входы не создают дублей.
+    """
+    user_agent_id = await get_user_agent_id(session, new_session.name)
+    stmt = (
+        insert(Session)
+        .values(
+            **new_session.model_dump(exclude={"status", "name"}),
+            user_agent_id=user_agent_id,
+            status=SessionStatus.ACTIVE,
+        )
+        .on_conflict_do_update(
+            index_elements=[Session.sub, Session.ip, Session.user_agent_id],
+            # timestamp — время последнего входа, от него считает SessionGC
+            set_={"status": SessionStatus.ACTIVE, "timestamp": func.current_timestamp()},
+        )
+        .returning(Session.uuid)
+    )
+    new_session.uuid = await session.scalar(stmt)
+    await session.commit()
+    return new_session
+
+
+def select_read() -> Select:
+    """Только то, что нужно SessionRead: строки Core без объектов ORM."""
+    return select(
+        Session.id,
+        Session.uuid,
+        UserAgent.name,
+        Session.sub,
+        Session.ip,
+        Session.status,
+        Session.can_abort,
+        Session.timestamp,
+    ).join(UserAgent, UserAgent.id == Session.user_agent_id)
+
+
+@Cache.redis(
+    read=True,
+    namespace="sessions",
+    model_class=SessionRead,
+    tags=("sub:{sub_id}",),
+    key="{sub_id}",
+)
+@timed(DB_QUERY_SECONDS)
+async def get_user_sessions(
+    session: AsyncSession,
+    sub_id: str,
+) -> Sequence[Row]:
+    stmt = (
+        select_read()
+        .where(Session.sub == sub_id)
+        .order_by(Session.timestamp, Session.id)
+    )
+    result = await session.execute(stmt)
+    return result.all()
+
+
+@Cache.redis(
+    read=True,
+    namespace="sessions",
+    model_class=SessionPage,
+    tags=("sub:{sub_id}",),
+)
+@timed(DB_QUERY_SECONDS)
+async def get_user_sessions_page(
+    session: AsyncSession,
+    sub_id: str,
+    limit: int,
+    cursor: str | None = None,
+    status: SessionStatus | None = None,
+) -> SessionPage:
+    """
+    Страница сессий по (timestamp, id): следующая начинается строго после
+    последней строки предыдущей, без OFFSET, поэтому стоимость страницы
+    не зависит от её номера. Курсор — timestamp и id последней строки.
+    """
+    stmt = select_read().where(Session.sub == sub_id)
+    if status is not None:
+        stmt = stmt.where(Session.status == status)
+    if cursor is not None:
+        timestamp, id_ = decode_cursor(cursor, parse_naive_datetime, parse_uuid)
+        stmt = stmt.where(tuple_(Session.timestamp, Session.id) > tuple_(timestamp, id_))
+    stmt = stmt.order_by(Session.timestamp, Session.id).limit(limit + 1)
+    rows = (await session.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp.isoformat(), rows[-1].id)
+    return SessionPage(items=rows, next_cursor=next_cursor)
+
+
+@Cache.redis(
+    read=True,
+    namespace="sessions",
+    model_class=SessionRead,
+    tags=("session:{uuid}",),
+    key="{uuid}",
+)
+@timed(DB_QUERY_SECONDS)
+async def get_session_info(
+    session: AsyncSession,
+    uuid: str,
+) -> Row | None:
+    stmt = select_read().where(
+        Session.uuid == uuid, Session.status == SessionStatus.ACTIVE
+    )
+    result = await session.execute(stmt)
+    return result.one_or_none()
+
+
+@timed(DB_QUERY_SECONDS)
+async def select_active_sessions(uuids: Sequence[str]) -> Sequence[Row]:
+    stmt = select_read().where(
+        Session.uuid == any_(bindparam("uuids", uuids, type_=ARRAY(UUID(as_uuid=False)))),
+        Session.status == SessionStatus.ACTIVE,
+    )
+    # Владельцы uuid неизвестны, а отставшая реплика вернула бы только что
+    # отозванную сессию активной и положила бы её в кэш, поэтому primary
+    async with db_helper.session_factory() as session:
+        return (await session.execute(stmt)).all()
+
+
+async def get_sessions_info(uuids: Sequence[str]) -> dict[str, SessionRead]:
+    """
+    Пакетный get_session_info: кэш одним MGET, промахи — одним запросом
+    ``uuid = ANY(:uuids)`` в собственной сессии БД.
+    """
+    cached = await get_session_info.cached_many([{"uuid": uuid} for uuid in uuids])
+    found = {uuid: value for uuid, value in zip(uuids, cached) if value is not MISSING}
+    missing = [uuid for uuid in uuids if uuid not in found]
+    if not missing:
+        return found
+
+    rows = await select_active_sessions(missing)
+    values = await get_session_info.store_many([({"uuid": row.uuid}, row) for row in rows])
+    found.update(zip((row.uuid for row in rows), values))
+    return found
+
+
+@Cache.redis(
+    write=True,
+    namespace="sessions",
+    tags=("sub:{sub_id}", "session:{uuid}"),
+)
+@timed(DB_QUERY_SECONDS)
+async def abort_session(
+    session: AsyncSession,
+    uuid: str,
+    sub_id: str,
+):
+    stmt = (
+        update(Session)
+        .where(Session.uuid == uuid)
+        .values(status=SessionStatus.DISABLED)
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
+@Cache.redis(
+    write=True,
+    namespace="sessions",
+    tags=("sub:{current_user_uuid}", "session:{uuid}"),
+)
+@timed(DB_QUERY_SECONDS)
+async def abort_another_session(
+    session: AsyncSession,
+    current_user_uuid: str,
+    uuid: str,
+) -> str:
+    stmt = (
+        update(Session)
+        .where(
+            Session.uuid == uuid,
+            Session.sub == current_user_uuid,
+        )
+        .values(status=SessionStatus.DISABLED)
+        .returning(Session.uuid)
+    )
+    updated = (await session.execute(stmt)).scalar_one_or_none()
+    if updated:
+        await session.commit()
+        return updated
+    raise SessionNotFound
+
+
+class PostgresSessionStore(SessionStore):
+    """Postgres — источник истины, Redis — кэш чтения на ttl секунд."""
+
+    async def create(self, session, new_session):
+        return await create_session(session, new_session)
+
+    async def get_user_sessions(self, session, sub_id):
+        return await get_user_sessions(session, sub_id=sub_id)
+
+    async def get_user_sessions_page(self, session, sub_id, limit, cursor=None, status=None):
+        return await get_user_sessions_page(
+            session, sub_id=sub_id, limit=limit, cursor=cursor, status=status
+        )
+
+    async def get_info(self, session, uuid):
+        return await get_session_info(session, uuid=uuid)
+
+    async def get_info_many(self, uuids):
+        return await get_sessions_info(uuids)
+
+    async def abort(self, session, uuid, sub_id):
+        await abort_session(session, uuid=uuid, sub_id=sub_id)
+
+    async def abort_another(self, session, sub_id, uuid):
+        return await abort_another_session(
+            session, current_user_uuid=sub_id, uuid=uuid
+        )
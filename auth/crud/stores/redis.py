@@ -0,0 +1,322 @@
+import time
+from typing import Any, Iterable, Sequence
+
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.exceptions.auth import SessionNotFound
+from core.config import settings
+from core.models.base import get_uuid_str
+from core.models.user import SessionStatus
+from core.redis import RedisClient
+from core.schemas.token import SessionCreate, SessionPage, SessionRead
+from utils.pagination import decode_cursor, encode_cursor, parse_score
+from . import postgres
+from .base import SessionStore
+
+# Дедупликация, запись сессии и событие для БД — одна атомарная операция
+_CREATE = """
+local uuid = redis.call('HGET', KEYS[1], ARGV[1])
+if not uuid then uuid = ARGV[2] end
+local key = ARGV[10] .. ':session:' .. uuid
+if redis.call('HSETNX', key, 'uuid', uuid) == 1 then
+    redis.call('HSET', key, 'id', ARGV[3], 'sub', ARGV[4], 'name', ARGV[5],
+               'ip', ARGV[6], 'can_abort', ARGV[8])
+end
+-- У существующей сессии id уже записан: в БД должен уйти он, а не новый
+local id = redis.call('HGET', key, 'id') or ARGV[3]
+-- timestamp — время последнего входа, от него отсчитывается истечение
+redis.call('HSET', key, 'status', 'active', 'timestamp', ARGV[7])
+redis.call('ZADD', KEYS[2], ARGV[7], uuid)
+redis.call('HSET', KEYS[1], ARGV[1], uuid)
+redis.call('EXPIRE', key, ARGV[9])
+redis.call('EXPIRE', KEYS[1], ARGV[9])
+redis.call('EXPIRE', KEYS[2], ARGV[9])
+redis.call('XADD', KEYS[3], '*', 'op', 'upsert', 'uuid', uuid, 'id', id,
+           'sub', ARGV[4], 'name', ARGV[5], 'ip', ARGV[6], 'timestamp', ARGV[7],
+           'can_abort', ARGV[8], 'status', 'active')
+return uuid
+"""
+
+# -1 — сессии нет в Redis, 0 — сессия другого пользователя
+_SET_STATUS = """
+local sub = redis.call('HGET', KEYS[1], 'sub')
+if not sub then return -1 end
+if sub ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+redis.call('XADD', KEYS[2], '*', 'op', 'status', 'uuid', ARGV[3], 'sub', sub,
+           'status', ARGV[2])
+return 1
+"""
+
+_FIELDS = ("id", "uuid", "sub", "name", "ip", "status", "can_abort", "timestamp")
+
+
+def _decode(raw: dict) -> dict[str, str]:
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (
+            v.decode() if isinstance(v, bytes) else v
+        )
+        for k, v in raw.items()
+    }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Сессии живут в Redis: hash на сессию, sorted set сессий пользователя
+    по времени последнего входа и hash устройство → uuid для дедупликации.
+    Ключи живут refresh_token_expire_days — дольше сессия без входа
+    не нужна. Каждое изменение пишется в Redis Stream, откуда
+    SessionWriteBehind пачками переносит его в Postgres.
+
+    При промахе данные читаются из Postgres и догружаются в Redis,
+    поэтому переключение бэкенда не теряет существующие сессии.
+    """
+
+    redis_client: Redis = RedisClient.redis_client
+    prefix: str = settings.sessions.key_prefix
+    stream: str = f"{settings.sessions.key_prefix}:stream"
+
+    def __init__(self) -> None:
+        self._create = self.redis_client.register_script(_CREATE)
+        self._set_status = self.redis_client.register_script(_SET_STATUS)
+
+    @property
+    def ttl(self) -> int:
+        return settings.auth.refresh_token_expire_days * 24 * 60 * 60
+
+    def _session_key(self, uuid: str) -> str:
+        return f"{self.prefix}:session:{uuid}"
+
+    def _user_key(self, sub_id: str) -> str:
+        return f"{self.prefix}:user:{sub_id}"
+
+    def _device_key(self, sub_id: str) -> str:
+        return f"{self.prefix}:device:{sub_id}"
+
+    @staticmethod
+    def _device_field(ip: str, name: str) -> bytes:
+        return orjson.dumps([ip, name])
+
+    async def _hydrate(self, rows: Iterable[Any], with_user: bool = True):
+        """
+        Переносит сессии из Postgres в Redis. HSETNX/ZADD NX не затирают
+        то, что успело записаться в Redis, пока шёл запрос к БД.
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        for row in rows:
+            data = SessionRead.model_validate(row)
+            key = self._session_key(data.uuid)
+            values = {
+                "id": data.id,
+                "uuid": data.uuid,
+                "sub": data.sub,
+                "name": data.name,
+                "ip": data.ip,
+                "status": SessionStatus(data.status).value,
+                "can_abort": int(data.can_abort),
+                "timestamp": data.timestamp,
+            }
+            for field, value in values.items():
+                pipe.hsetnx(key, field, value)
+            pipe.expire(key, self.ttl)
+            if with_user:
+                pipe.zadd(self._user_key(data.sub), {data.uuid: data.timestamp}, nx=True)
+                pipe.expire(self._user_key(data.sub), self.ttl)
+                pipe.hsetnx(
+                    self._device_key(data.sub),
+                    self._device_field(data.ip, data.name),
+                    data.uuid,
+                )
+                pipe.expire(self._device_key(data.sub), self.ttl)
+        await pipe.execute()
+
+    async def create(
+        self,
+        session: AsyncSession,
+        new_session: SessionCreate,
+    ) -> SessionCreate:
+        if not await self.redis_client.exists(self._user_key(new_session.sub)):
+            # Первый вход после переключения бэкенда или истечения ключей
+            await self._hydrate(
+                await postgres.get_user_sessions(session, sub_id=new_session.sub)
+            )
+        uuid = await self._create(
+            keys=[
+                self._device_key(new_session.sub),
+                self._user_key(new_session.sub),
+                self.stream,
+            ],
+            args=[
+                self._device_field(new_session.ip, new_session.name),
+                new_session.uuid,
+                get_uuid_str(),
+                new_session.sub,
+                new_session.name,
+                new_session.ip,
+                repr(time.time()),
+                0,
+                self.ttl,
+                self.prefix,
+            ],
+        )
+        new_session.uuid = uuid.decode() if isinstance(uuid, bytes) else uuid
+        return new_session
+
+    async def get_user_sessions(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+    ) -> Sequence[SessionRead]:
+        uuids = await self.redis_client.zrange(self._user_key(sub_id), 0, -1)
+        if not uuids:
+            rows = await postgres.get_user_sessions(session, sub_id=sub_id)
+            await self._hydrate(rows)
+            return rows
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for uuid in uuids:
+            pipe.hmget(self._session_key(uuid.decode()), _FIELDS)
+        sessions = []
+        for values in await pipe.execute():
+            if values[0] is None:
+                # Ключ сессии истёк раньше списка
+                continue
+            sessions.append(SessionRead.model_validate(_decode(dict(zip(_FIELDS, values)))))
+        return sessions
+
+    async def get_user_sessions_page(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+        limit: int,
+        cursor: str | None = None,
+        status: SessionStatus | None = None,
+    ) -> SessionPage:
+        """
+        Порядок sorted set — (score, uuid), он же ключ курсора. Сессии
+        читаются кусками по limit + 1, пока не наберётся страница: при
+        фильтре по статусу пропущенные не копятся в памяти.
+        """
+        user_key = self._user_key(sub_id)
+        if not await self.redis_client.exists(user_key):
+            await self._hydrate(await postgres.get_user_sessions(session, sub_id=sub_id))
+
+        after = None
+        start: float | str = "-inf"
+        if cursor is not None:
+            after = tuple(decode_cursor(cursor, parse_score, str))
+            start = after[0]
+
+        found: list[tuple[float, str, SessionRead]] = []
+        offset, chunk = 0, limit + 1
+        while len(found) <= limit:
+            entries = await self.redis_client.zrange(
+                user_key,
+                start,
+                "+inf",
+                byscore=True,
+                offset=offset,
+                num=chunk,
+                withscores=True,
+            )
+            offset += len(entries)
+            pipe = self.redis_client.pipeline(transaction=False)
+            for uuid, _ in entries:
+                pipe.hmget(self._session_key(uuid.decode()), _FIELDS)
+            for (uuid, score), values in zip(entries, await pipe.execute()):
+                uuid = uuid.decode()
+                if after is not None and (score, uuid) <= after:
+                    continue
+                if values[0] is None:
+                    continue
+                data = _decode(dict(zip(_FIELDS, values)))
+                if status is not None and data["status"] != status.value:
+                    continue
+                found.append((score, uuid, SessionRead.model_validate(data)))
+            if len(entries) < chunk:
+                break
+
+        next_cursor = None
+        if len(found) > limit:
+            found = found[:limit]
+            next_cursor = encode_cursor(found[-1][0], found[-1][1])
+        return SessionPage(items=[item for *_, item in found], next_cursor=next_cursor)
+
+    async def get_info(
+        self,
+        session: AsyncSession,
+        uuid: str,
+    ) -> SessionRead | Any | None:
+        raw = await self.redis_client.hgetall(self._session_key(uuid))
+        if not raw:
+            found = await postgres.get_session_info(session, uuid=uuid)
+            if found is not None:
+                await self._hydrate([found], with_user=False)
+            return found
+        data = _decode(raw)
+        if data["status"] != SessionStatus.ACTIVE.value:
+            return None
+        return SessionRead.model_validate(data)
+
+    async def get_info_many(
+        self,
+        uuids: Sequence[str],
+    ) -> dict[str, SessionRead | Any]:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for uuid in uuids:
+            pipe.hmget(self._session_key(uuid), _FIELDS)
+        found, missing = {}, []
+        for uuid, values in zip(uuids, await pipe.execute()):
+            if values[0] is None:
+                missing.append(uuid)
+                continue
+            data = _decode(dict(zip(_FIELDS, values)))
+            if data["status"] == SessionStatus.ACTIVE.value:
+                found[uuid] = SessionRead.model_validate(data)
+        if missing:
+            loaded = await postgres.get_sessions_info(missing)
+            await self._hydrate(loaded.values(), with_user=False)
+            found.update(loaded)
+        return found
+
+    async def _disable(self, uuid: str, sub_id: str) -> int:
+        return await self._set_status(
+            keys=[self._session_key(uuid), self.stream],
+            args=[sub_id, SessionStatus.DISABLED.value, uuid],
+        )
+
+    async def abort(
+        self,
+        session: AsyncSession,
+        uuid: str,
+        sub_id: str,
+    ) -> None:
+        if await self._disable(uuid, sub_id) == -1:
+            await postgres.abort_session(session, uuid=uuid, sub_id=sub_id)
+
+    async def abort_another(
+        self,
+        session: AsyncSession,
+        sub_id: str,
+        uuid: str,
+    ) -> str:
+        result = await self._disable(uuid, sub_id)
+        if result == -1:
+            return await postgres.abort_another_session(
+                session, current_user_uuid=sub_id, uuid=uuid
+            )
+        if result == 0:
+            raise SessionNotFound
+        return uuid
+
+    async def forget(self, sessions: Sequence[Any]) -> None:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for row in sessions:
+            pipe.unlink(self._session_key(row.uuid))
+            pipe.zrem(self._user_key(row.sub), row.uuid)
+            pipe.hdel(
+                self._device_key(row.sub), self._device_field(str(row.ip), row.name)
+            )
+        await pipe.execute()
@@ -0,0 +1,257 @@
+import asyncio
+import os
+import socket
+from collections import defaultdict
+from datetime import datetime
+from typing import Sequence
+
+from loguru import logger as log
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from core.config import settings
+from core.metrics import DB_QUERY_SECONDS, SESSION_WRITE_BEHIND_DEAD, timed
+from core.models import db_helper
+from core.models.user import Session, SessionStatus
+from core.redis import RedisClient
+from core.redis.cache import Cache
+from crud.user_agents import get_user_agent_ids
+from .redis import RedisSessionStore, _decode
+
+
+class SessionWriteBehind:
+    """
+    Переносит изменения сессий из Redis Stream в Postgres.
+
+    Воркеры читают поток через одну consumer group, так что каждую запись
+    обрабатывает один воркер. Запись подтверждается (XACK) и удаляется из
+    потока только после commit; записи упавшего воркера забирает XAUTOCLAIM
+    после claim_idle_ms простоя.
+
+    Если Postgres отвергает пачку не из-за связи, записи повторяются по
+    одной; запись, отвергнутая max_flush_attempts раз, перекладывается в
+    dead_stream и больше не задерживает остальные.
+    """
+
+    redis_client: Redis = RedisClient.redis_client
+    stream: str = RedisSessionStore.stream
+    dead_stream: str = f"{RedisSessionStore.stream}:dead"
+    retry_delay: float = 1.0
+    group: str = settings.sessions.consumer_group
+    consumer: str = f"{socket.gethostname()}-{os.getpid()}"
+    _task: asyncio.Task | None = None
+    # id записи -> сколько раз подряд Postgres её отверг
+    _failures: dict[bytes | str, int] = {}
+
+    @classmethod
+    async def _ensure_group(cls):
+        try:
+            await cls.redis_client.xgroup_create(
+                cls.stream, cls.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @classmethod
+    @timed(DB_QUERY_SECONDS)
+    async def flush(cls, entries: Sequence[tuple[bytes, dict]]):
+        """
+        Схлопывает пачку событий до последнего состояния каждой сессии:
+        один INSERT ... ON CONFLICT для новых и по UPDATE на статус.
+        """
+        rows: dict[tuple[str, str, str], dict] = {}
+        devices: dict[str, tuple[str, str, str]] = {}
+        statuses: dict[str, str] = {}
+        tags: set[str] = set()
+        for _, fields in entries:
+            event = _decode(fields)
+            uuid = event["uuid"]
+            tags.update((f"sub:{event['sub']}", f"session:{uuid}"))
+            if event["op"] == "upsert":
+                device = (event["sub"], event["ip"], event["name"])
+                rows[device] = event
+                devices[uuid] = device
+                statuses.pop(uuid, None)
+            elif uuid in devices:
+                rows[devices[uuid]]["status"] = event["status"]
+            else:
+                statuses[uuid] = event["status"]
+
+        async with db_helper.session_factory() as session:
+            if rows:
+                user_agent_ids = await get_user_agent_ids(
+                    session, (row["name"] for row in rows.values())
+                )
+                stmt = insert(Session).values(
+                    [
+                        {
+                            "id": row["id"],
+                            "uuid": row["uuid"],
+                            "sub": row["sub"],
+                            "user_agent_id": user_agent_ids[row["name"]],
+                            "ip": row["ip"],
+                            "status": SessionStatus(row["status"]),
+                            "can_abort": row["can_abort"] == "1",
+                            "timestamp": datetime.fromtimestamp(float(row["timestamp"])),
+                        }
+                        for row in rows.values()
+                    ]
+                )
+                # Redis — источник истины, поэтому uuid тоже берётся оттуда
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Session.sub, Session.ip, Session.user_agent_id],
+                    set_={
+                        "uuid": stmt.excluded.uuid,
+                        "status": stmt.excluded.status,
+                        "timestamp": stmt.excluded.timestamp,
+                    },
+                )
+                await session.execute(stmt)
+
+            by_status: dict[str, list[str]] = defaultdict(list)
+            for uuid, status in statuses.items():
+                by_status[status].append(uuid)
+            for status, uuids in by_status.items():
+                await session.execute(
+                    update(Session)
+                    .where(Session.uuid.in_(uuids))
+                    .values(status=SessionStatus(status))
+                )
+            await session.commit()
+
+        await cls._ack([entry_id for entry_id, _ in entries])
+        # Кэш чтений из Postgres, которым стор пользуется при промахах
+        await Cache.invalidate_tags("sessions", sorted(tags))
+
+    @classmethod
+    async def _ack(cls, ids: Sequence[bytes | str]):
+        pipe = cls.redis_client.pipeline(transaction=False)
+        pipe.xack(cls.stream, cls.group, *ids)
+        pipe.xdel(cls.stream, *ids)
+        await pipe.execute()
+        if cls._failures:
+            for entry_id in ids:
+                cls._failures.pop(entry_id, None)
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Сбой связи или недоступность, а не отказ принять сами данные."""
+        if isinstance(error, (RedisError, OSError, OperationalError, InterfaceError)):
+            return True
+        return isinstance(error, DBAPIError) and error.connection_invalidated
+
+    @classmethod
+    async def _dead_letter(cls, entry: tuple[bytes | str, dict], error: Exception):
+        entry_id, fields = entry
+        pipe = cls.redis_client.pipeline(transaction=True)
+        pipe.xadd(
+            cls.dead_stream,
+            {**fields, "dead_entry_id": entry_id, "dead_error": repr(error)[:1000]},
+        )
+        pipe.xack(cls.stream, cls.group, entry_id)
+        pipe.xdel(cls.stream, entry_id)
+        await pipe.execute()
+        cls._failures.pop(entry_id, None)
+        SESSION_WRITE_BEHIND_DEAD.inc()
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        log.error("Session event %s moved to %s: %r" % (entry_id, cls.dead_stream, error))
+
+    @classmethod
+    async def _process(cls, entries: Sequence[tuple[bytes | str, dict]]):
+        """flush с поиском записи, из-за которой Postgres отвергает пачку."""
+        try:
+            await cls.flush(entries)
+            return
+        except Exception as e:
+            if cls._is_transient(e):
+                raise
+            error = e
+        if len(entries) > 1:
+            # По порядку: события одной сессии применяются в том же порядке
+            for entry in entries:
+                await cls._process([entry])
+            return
+        entry_id = entries[0][0]
+        failures = cls._failures.get(entry_id, 0) + 1
+        if failures < settings.sessions.max_flush_attempts:
+            cls._failures[entry_id] = failures
+            raise error
+        await cls._dead_letter(entries[0], error)
+
+    @classmethod
+    async def _claim(cls) -> list:
+        _, entries, *_ = await cls.redis_client.xautoclaim(
+            cls.stream,
+            cls.group,
+            cls.consumer,
+            min_idle_time=settings.sessions.claim_idle_ms,
+            start_id="0-0",
+            count=settings.sessions.flush_batch_size,
+        )
+        # Redis 6.2 возвращает удалённые записи как nil
+        return [entry for entry in entries if entry and entry[1]]
+
+    @staticmethod
+    def _entries(response: list | dict | None) -> list:
+        """Ответ XREADGROUP одного потока: RESP2 — список, RESP3 — словарь."""
+        if not response:
+            return []
+        if isinstance(response, dict):
+            return next(iter(response.values()))[0]
+        return response[0][1]
+
+    @classmethod
+    async def _run(cls):
+        # Сначала свои неподтверждённые записи, потом новые
+        start_id = "0"
+        loop = asyncio.get_running_loop()
+        next_claim = 0.0
+        while True:
+            try:
+                if start_id == "0":
+                    await cls._ensure_group()
+                if loop.time() >= next_claim:
+                    next_claim = loop.time() + settings.sessions.claim_idle_ms / 1000
+                    if claimed := await cls._claim():
+                        await cls._process(claimed)
+                response = await RedisClient.blocking_client.xreadgroup(
+                    cls.group,
+                    cls.consumer,
+                    {cls.stream: start_id},
+                    count=settings.sessions.flush_batch_size,
+                    block=settings.sessions.flush_block_ms,
+                )
+                entries = [e for e in cls._entries(response) if e[1]]
+                if entries:
+                    await cls._process(entries)
+                elif start_id == "0":
+                    start_id = ">"
+            except Exception as e:
+                # Любая ошибка — повтор с неподтверждённых записей: задача
+                # не должна умирать, пока стор принимает записи в Redis
+                if cls._is_transient(e):
+                    log.warning("Session write-behind flush failed: %s" % e)
+                else:
+                    log.exception("Session write-behind flush failed")
+                start_id = "0"
+                await asyncio.sleep(cls.retry_delay)
+
+    @classmethod
+    async def start(cls):
+        if settings.sessions.backend == "redis" and cls._task is None:
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
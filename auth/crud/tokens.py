@@ -1,39 +1,18 @@
-from typing import Sequence
+from typing import Any, Sequence
 
-from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.exceptions.auth import SessionNotFound
-from core.models.user import Session, SessionStatus
+from core.models.user import SessionStatus
+from core.schemas.token import SessionCreate, SessionPage, SessionRead
+from core.redis.primary_pin import PrimaryPin
+from core.redis.revocation import RevocationSet
+from crud.stores import session_store
 
-from core.schemas.token import SessionCreate, SessionRead
-from core.redis.cache import Cache
 
-
-@Cache.redis(read=True, namespace="sessions", model_class=SessionRead)
-async def get_same_session(
-    session: AsyncSession,
-    new_session: SessionCreate,
-) -> Session:
-    stmt = (
-        select(Session)
-        .where(
-            Session.sub == new_session.sub,
-            Session.ip == new_session.ip,
-            Session.name == new_session.name,
-        )
-        .order_by(Session.id)
-    )
-
-    result = await session.scalar(stmt)
-    return result
-
-
-@Cache.redis(write=True, namespace="sessions")
 async def create_session(
     session: AsyncSession,
     new_session: SessionCreate,
-):
+) -> SessionCreate:
     """
     Создаёт новую сессию если не находит похожей, уже существующей.
     Похожей сессия считается, если у них совпадает:
@@ -41,75 +20,63 @@ async def create_session(
     - ip (ip-address),
     - Айди пользователя
     """
-    if got_session := await get_same_session(session, new_session):
-        new_session.uuid = got_session.uuid
-        stmt = (
-            update(Session)
-            .where(Session.uuid == new_session.uuid)
-            .values(status=SessionStatus.ACTIVE)
-        )
-        await session.execute(stmt)
-    else:
-        new_session_stmt = Session(**new_session.model_dump())
-        session.add(new_session_stmt)
-    await session.commit()
+    proposed_uuid = new_session.uuid
+    # До записи: иначе чтение в промежутке уйдёт на реплику и положит в
+    # кэш состояние до записи
+    await PrimaryPin.pin(new_session.sub)
+    new_session = await session_store.create(session, new_session)
+    if new_session.uuid != proposed_uuid:
+        # Повторный вход в существующую сессию, возможно отозванную ранее
+        await RevocationSet.restore(new_session.uuid)
     return new_session
 
 
-@Cache.redis(read=True, namespace="sessions", model_class=SessionRead)
 async def get_user_sessions(
     session: AsyncSession,
     sub_id: str,
-) -> Sequence[Session]:
-    stmt = select(Session).where(Session.sub == sub_id).order_by(Session.timestamp)
-    result = await session.scalars(stmt)
-    return result.all()
+) -> Sequence[SessionRead | Any]:
+    return await session_store.get_user_sessions(session, sub_id)
+
+
+async def get_user_sessions_page(
+    session: AsyncSession,
+    sub_id: str,
+    limit: int,
+    cursor: str | None = None,
+    status: SessionStatus | None = None,
+) -> SessionPage:
+    return await session_store.get_user_sessions_page(
+        session, sub_id, limit, cursor=cursor, status=status
+    )
 
 
-@Cache.redis(read=True, namespace="sessions", model_class=SessionRead)
 async def get_session_info(
     session: AsyncSession,
     uuid: str,
-) -> Session:
-    stmt = select(Session).where(
-        Session.uuid == uuid, Session.status == SessionStatus.ACTIVE
-    )
-    result = await session.scalars(stmt)
-    return result.one_or_none()
+) -> SessionRead | Any | None:
+    return await session_store.get_info(session, uuid)
+
+
+async def get_sessions_info(uuids: Sequence[str]) -> dict[str, SessionRead | Any]:
+    return await session_store.get_info_many(uuids)
 
 
-@Cache.redis(write=True, namespace="sessions")
 async def abort_session(
     session: AsyncSession,
     uuid: str,
+    sub_id: str,
 ):
-    stmt = (
-        update(Session)
-        .where(Session.uuid == uuid)
-        .values(status=SessionStatus.DISABLED)
-    )
-    await session.execute(stmt)
-    await session.commit()
+    await PrimaryPin.pin(sub_id)
+    await session_store.abort(session, uuid, sub_id)
+    await RevocationSet.revoke(uuid)
 
 
-@Cache.redis(write=True, namespace="sessions")
 async def abort_another_session(
     session: AsyncSession,
     current_user_uuid: str,
     uuid: str,
 ):
-    stmt = (
-        update(Session)
-        .where(
-            Session.uuid == uuid,
-            Session.sub == current_user_uuid,
-        )
-        .values(status=SessionStatus.DISABLED)
-        .returning(Session)
-    )
-    result = await session.execute(stmt)
-    updated = result.one_or_none()
-    if updated:
-        await session.commit()
-        return updated
-    raise SessionNotFound
+    await PrimaryPin.pin(current_user_uuid)
+    updated = await session_store.abort_another(session, current_user_uuid, uuid)
+    await RevocationSet.revoke(uuid)
+    return updated
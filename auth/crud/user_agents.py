@@ -0,0 +1,55 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import DB_QUERY_SECONDS, timed
+from core.models import UserAgent
+from core.redis.local import MISSING, LocalCache
+
+# Справочник только растёт и не меняется, поэтому id держатся в памяти
+# воркера без срока; вытеснение — только по размеру
+_ids = LocalCache(maxsize=10_000, ttl=float("inf"))
+
+
+@timed(DB_QUERY_SECONDS)
+async def get_user_agent_ids(
+    session: AsyncSession,
+    names: Iterable[str],
+) -> dict[str, int]:
+    """
+    id справочника user_agents для names; недостающие добавляются.
+    Вставка не коммитится — она уходит вместе с транзакцией вызывающего.
+    """
+    names = set(names)
+    found = {}
+    for name in names:
+        if (id_ := _ids.get(name)) is not MISSING:
+            found[name] = id_
+    missing = sorted(names - found.keys())
+    if not missing:
+        return found
+    # Сортировка — одинаковый порядок блокировок у параллельных вставок
+    inserted = await session.execute(
+        insert(UserAgent)
+        .values([{"name": name} for name in missing])
+        .on_conflict_do_nothing(index_elements=[UserAgent.name])
+        .returning(UserAgent.name, UserAgent.id)
+    )
+    found.update(inserted.tuples())
+    rest = [name for name in missing if name not in found]
+    if rest:
+        rows = await session.execute(
+            select(UserAgent.name, UserAgent.id).where(UserAgent.name.in_(rest))
+        )
+        # В память — только уже закоммиченные строки: свою вставку
+        # вызывающий ещё может откатить
+        for name, id_ in rows.tuples():
+            _ids.set(name, id_)
+            found[name] = id_
+    return found
+
+
+async def get_user_agent_id(session: AsyncSession, name: str) -> int:
+    return (await get_user_agent_ids(session, [name]))[name]
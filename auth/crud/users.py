@@ -1,7 +1,9 @@
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import UUID
 from sqlalchemy.exc import IntegrityError
 from asyncpg.exceptions import UniqueViolationError
 from loguru import logger as logs
@@ -11,11 +13,14 @@ from api.exceptions.auth import (
     DatabaseError,
     InvalidCredentialsException,
 )
-from core.models import User
+from core.metrics import DB_QUERY_SECONDS, timed
+from core.models import User, db_helper
 from core.schemas.user import UserReg, UserRead, UserAuth
 from core.redis.cache import Cache
+from core.redis.local import MISSING
 
 
+@timed(DB_QUERY_SECONDS)
 async def get_all_users(
     session: AsyncSession,
 ) -> Sequence[User]:
@@ -24,7 +29,8 @@ async def get_all_users(
     return result.all()
 
 
-@Cache.redis(read=True, namespace="users", model_class=UserAuth)
+@Cache.redis(read=True, namespace="users", model_class=UserAuth, key="{username}")
+@timed(DB_QUERY_SECONDS)
 async def get_user_by_username(
     session: AsyncSession,
     username: str,
@@ -33,7 +39,8 @@ async def get_user_by_username(
     result = await session.scalars(stmt)
     return result.first()
 
-@Cache.redis(read=True, namespace="users", model_class=UserRead)
+@Cache.redis(read=True, namespace="users", model_class=UserRead, key="{id_}")
+@timed(DB_QUERY_SECONDS)
 async def get_user_by_id(
     session: AsyncSession,
     id_: str,
@@ -42,6 +49,31 @@ async def get_user_by_id(
     result = await session.scalars(stmt)
     return result.first()
 
+
+@timed(DB_QUERY_SECONDS)
+async def select_users(ids: Sequence[str]) -> Sequence[User]:
+    stmt = select(User).where(
+        User.id == any_(bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=False))))
+    )
+    session_factory = await db_helper.read_session_factory_for(*ids)
+    async with session_factory() as session:
+        return (await session.scalars(stmt)).all()
+
+
+async def get_users_by_ids(ids: Sequence[str]) -> dict[str, UserRead]:
+    """Пакетный get_user_by_id: кэш одним MGET, промахи — одним запросом."""
+    cached = await get_user_by_id.cached_many([{"id_": id_} for id_ in ids])
+    found = {id_: value for id_, value in zip(ids, cached) if value is not MISSING}
+    missing = [id_ for id_ in ids if id_ not in found]
+    if not missing:
+        return found
+
+    users = await select_users(missing)
+    values = await get_user_by_id.store_many([({"id_": user.id}, user) for user in users])
+    found.update(zip((user.id for user in users), values))
+    return found
+
+@timed(DB_QUERY_SECONDS)
 async def create_user(session: AsyncSession, user_create: UserReg) -> User:
     user = User(**user_create.model_dump())
     session.add(user)
@@ -0,0 +1,3 @@
+__all__ = ("SessionGC",)
+
+from .session_gc import SessionGC
@@ -0,0 +1,164 @@
+"""
+Обслуживание месячных секций session_history.
+
+Запуск отдельно от приложения, из каталога auth:
+    python -m jobs.partitions
+"""
+import asyncio
+from datetime import date, datetime, UTC
+
+from loguru import logger as log
+from sqlalchemy import Table, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.config import settings
+from core.models import SessionHistory, db_helper
+
+
+def current_month() -> date:
+    # Границы секций — по UTC, как archived_at (БД работает в UTC);
+    # date.today() на хосте в другом поясе сдвигает месяц на стыке
+    return datetime.now(UTC).date().replace(day=1)
+
+
+def add_months(month: date, shift: int) -> date:
+    index = month.year * 12 + month.month - 1 + shift
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class MonthlyPartitions:
+    """
+    Секции таблицы, секционированной RANGE по дате, по одной на месяц:
+    {table}_pYYYY_MM с границами [1-е число, 1-е число следующего месяца).
+
+    Будущие секции создаются заранее, чтобы вставка никогда не упиралась
+    в отсутствующую; старые отсоединяются DETACH PARTITION CONCURRENTLY —
+    без блокировки чтения и вставки в остальные секции и без DELETE
+    по строкам. Обслуживание на нескольких воркерах сериализуется
+    advisory-блокировкой: кто не взял её, пропускает проход.
+    """
+
+    def __init__(self, table: Table) -> None:
+        self.table = table.name
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table}_p{month:%Y_%m}"
+
+    async def attached(self, conn: AsyncConnection) -> dict[date, str]:
+        result = await conn.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table
+                """
+            ),
+            {"table": self.table},
+        )
+        prefix = f"{self.table}_p"
+        months = {}
+        for name in result.scalars():
+            try:
+                months[datetime.strptime(name.removeprefix(prefix), "%Y_%m").date()] = name
+            except ValueError:
+                # Секция, созданная вручную под другим именем
+                continue
+        return months
+
+    async def ensure(
+        self,
+        conn: AsyncConnection,
+        existing: dict[date, str],
+        months_ahead: int,
+    ) -> list[str]:
+        current = current_month()
+        created = []
+        for shift in range(months_ahead + 1):
+            month = add_months(current, shift)
+            if month in existing:
+                continue
+            name = self.partition_name(month)
+            await conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table} "
+                    f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                )
+            )
+            created.append(name)
+        return created
+
+    async def detach(
+        self,
+        conn: AsyncConnection,
+        existing: dict[date, str],
+        keep_months: int,
+        drop: bool,
+    ) -> list[str]:
+        oldest_kept = add_months(current_month(), -keep_months)
+        detached = []
+        for month, name in sorted(existing.items()):
+            if month >= oldest_kept:
+                break
+            await conn.execute(
+                text(f"ALTER TABLE {self.table} DETACH PARTITION {name} CONCURRENTLY")
+            )
+            if drop:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+        return detached
+
+    async def maintain(
+        self,
+        months_ahead: int,
+        keep_months: int,
+        drop: bool = False,
+    ) -> tuple[list[str], list[str]]:
+        """Возвращает созданные и отсоединённые секции."""
+        # DETACH ... CONCURRENTLY не выполняется внутри транзакции
+        async with db_helper.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            lock = bindparam("lock", self.table)
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(hashtext(:lock))").bindparams(lock)
+            )
+            if not locked:
+                return [], []
+            try:
+                existing = await self.attached(conn)
+                created = await self.ensure(conn, existing, months_ahead)
+                detached = await self.detach(conn, existing, keep_months, drop)
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:lock))").bindparams(lock)
+                )
+        if created or detached:
+            log.info(
+                "[PARTITIONS] %(table)s created=%(created)s detached=%(detached)s"
+                % {"table": self.table, "created": created, "detached": detached}
+            )
+        return created, detached
+
+
+session_history_partitions = MonthlyPartitions(SessionHistory.__table__)
+
+
+async def maintain_session_history() -> tuple[list[str], list[str]]:
+    return await session_history_partitions.maintain(
+        months_ahead=settings.session_gc.history_months_ahead,
+        keep_months=settings.session_gc.history_retention_months,
+        drop=settings.session_gc.history_drop_detached,
+    )
+
+
+async def main() -> None:
+    try:
+        created, detached = await maintain_session_history()
+        print(f"created={created} detached={detached}")
+    finally:
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,217 @@
+"""
+Истечение и удаление старых сессий.
+
+Запуск отдельно от приложения, из каталога auth:
+    python -m jobs.session_gc           # один проход
+    python -m jobs.session_gc --forever # проход каждые interval_seconds
+"""
+import argparse
+import asyncio
+import random
+from datetime import timedelta
+from typing import Any, Sequence
+
+from loguru import logger as log
+from redis.exceptions import RedisError
+from sqlalchemy import Executable, Select, delete, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import settings
+from core.metrics import SESSION_GC_ROWS
+from core.models import db_helper
+from core.models.user import Session, SessionHistory, SessionStatus, UserAgent
+from core.redis.cache import Cache
+from crud.stores import session_store
+from .partitions import maintain_session_history
+
+_expired = SESSION_GC_ROWS.labels("expired")
+_deleted = SESSION_GC_ROWS.labels("deleted")
+_archived = SESSION_GC_ROWS.labels("archived")
+
+_ARCHIVED = ("id", "uuid", "status", "timestamp", "sub", "user_agent_id", "ip", "can_abort")
+
+
+class SessionGC:
+    """
+    Переводит в EXPIRED активные сессии, чей последний вход старше срока
+    refresh-токена, и удаляет отключённые и истёкшие спустя retention_days
+    (в режиме archive — переносит в session_history).
+
+    Каждая пачка — отдельная короткая транзакция, строки выбираются через
+    FOR UPDATE SKIP LOCKED: строки, которые держит вход или отзыв,
+    пропускаются до следующего прохода, а сборщики нескольких воркеров
+    делят работу, не дожидаясь друг друга.
+    """
+
+    _task: asyncio.Task | None = None
+
+    @staticmethod
+    def _pick(*where: Any) -> Select:
+        return (
+            select(Session.id)
+            .where(*where)
+            .limit(settings.session_gc.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    @staticmethod
+    def _older_than(days: int) -> Any:
+        # timestamp хранится без часового пояса во времени сервера БД
+        return Session.timestamp < func.localtimestamp() - timedelta(days=days)
+
+    @classmethod
+    async def _sweep(
+        cls,
+        stmt: Executable,
+        counter: Any,
+    ) -> list[Any]:
+        """Выполняет stmt пачками, пока он возвращает полные пачки."""
+        swept = []
+        for _ in range(settings.session_gc.max_batches):
+            async with db_helper.session_factory() as session:
+                rows = (await session.execute(stmt)).all()
+                await session.commit()
+            if not rows:
+                break
+            counter.inc(len(rows))
+            swept.extend(rows)
+            await Cache.invalidate_tags(
+                "sessions",
+                sorted(
+                    {f"sub:{row.sub}" for row in rows}
+                    | {f"session:{row.uuid}" for row in rows}
+                ),
+            )
+            if len(rows) < settings.session_gc.batch_size:
+                break
+        return swept
+
+    @classmethod
+    async def expire(cls) -> Sequence[Any]:
+        stmt = (
+            update(Session)
+            .where(
+                Session.id.in_(
+                    cls._pick(
+                        Session.status == SessionStatus.ACTIVE,
+                        cls._older_than(settings.auth.refresh_token_expire_days),
+                    )
+                )
+            )
+            .values(status=SessionStatus.EXPIRED)
+            .returning(Session.uuid, Session.sub)
+        )
+        return await cls._sweep(stmt, _expired)
+
+    @classmethod
+    def _inactive(cls) -> Select:
+        return cls._pick(
+            Session.status.in_((SessionStatus.EXPIRED, SessionStatus.DISABLED)),
+            cls._older_than(
+                settings.auth.refresh_token_expire_days
+                + settings.session_gc.retention_days
+            ),
+        )
+
+    @classmethod
+    async def delete(cls) -> Sequence[Any]:
+        # DELETE ... USING user_agents: название устройства нужно forget
+        stmt = (
+            delete(Session)
+            .where(Session.id.in_(cls._inactive()), Session.user_agent_id == UserAgent.id)
+            .returning(Session.uuid, Session.sub, Session.ip, UserAgent.name)
+        )
+        deleted = await cls._sweep(stmt, _deleted)
+        if deleted:
+            await session_store.forget(deleted)
+        return deleted
+
+    @classmethod
+    async def archive(cls) -> Sequence[Any]:
+        """Как delete, но строки в той же транзакции переносятся в session_history."""
+        await maintain_session_history()
+        moved = (
+            delete(Session)
+            .where(Session.id.in_(cls._inactive()), Session.user_agent_id == UserAgent.id)
+            .returning(*(Session.__table__.c[name] for name in _ARCHIVED), UserAgent.name)
+            .cte("moved")
+        )
+        archived = (
+            insert(SessionHistory)
+            .from_select(_ARCHIVED, select(*(moved.c[name] for name in _ARCHIVED)))
+            .cte("archived")
+        )
+        stmt = select(moved.c.uuid, moved.c.sub, moved.c.ip, moved.c.name).add_cte(archived)
+        archived = await cls._sweep(stmt, _archived)
+        if archived:
+            await session_store.forget(archived)
+        return archived
+
+    @classmethod
+    async def run_once(cls) -> tuple[int, int]:
+        expired = await cls.expire()
+        if settings.session_gc.mode == "archive":
+            deleted = await cls.archive()
+        else:
+            deleted = await cls.delete()
+        if expired or deleted:
+            log.info(
+                "[SESSION GC] expired=%(expired)s %(mode)sd=%(deleted)s"
+                % {
+                    "expired": len(expired),
+                    "mode": settings.session_gc.mode,
+                    "deleted": len(deleted),
+                }
+            )
+        return len(expired), len(deleted)
+
+    @classmethod
+    async def _run(cls):
+        # Воркеры, запущенные одновременно, не приходят в БД все разом
+        await asyncio.sleep(random.uniform(0, settings.session_gc.interval_seconds))
+        while True:
+            try:
+                await cls.run_once()
+            except (SQLAlchemyError, RedisError, OSError) as e:
+                log.warning("Session GC failed: %s" % e)
+            except Exception:
+                log.exception("Session GC failed")
+            await asyncio.sleep(settings.session_gc.interval_seconds)
+
+    @classmethod
+    async def start(cls):
+        if settings.session_gc.enabled and cls._task is None:
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+
+async def main(forever: bool) -> None:
+    from core.redis import RedisClient
+
+    try:
+        while True:
+            expired, deleted = await SessionGC.run_once()
+            if not (expired or deleted):
+                # Ненулевой результат run_once пишет в лог сам
+                log.info("[SESSION GC] nothing to expire or %s" % settings.session_gc.mode)
+            if not forever:
+                break
+            await asyncio.sleep(settings.session_gc.interval_seconds)
+    finally:
+        await RedisClient.close()
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--forever", action="store_true")
+    asyncio.run(main(parser.parse_args().forever))
@@ -1,32 +1,86 @@
+import atexit
 import logging
 
 from loguru import logger
 import sys
 
 from core.config import settings
+from logs.sink import BatchingFileSink, BatchingSink, BatchingStreamSink
 
 logger.remove()
 
+# Фоновые sink'и режима async; их stats смотрит /metrics
+async_sinks: list[BatchingSink] = []
+
+
+def _batching(sink: BatchingSink) -> BatchingSink:
+    async_sinks.append(sink)
+    return sink
+
+
+def _queue_options() -> dict:
+    return dict(
+        max_queue=settings.logs.queue_size,
+        batch_size=settings.logs.batch_size,
+        flush_interval=settings.logs.flush_interval,
+    )
+
+
+# Файлы, для которых async недоступен из-за формата rotation/retention
+_unbatched: list = []
+
+
+def _file_sink(path):
+    if settings.logs.mode == "async":
+        if BatchingFileSink.supports(settings.logs.rotation, settings.logs.retention):
+            return _batching(
+                BatchingFileSink(
+                    path,
+                    rotation=settings.logs.rotation,
+                    retention=settings.logs.retention,
+                    compression=settings.logs.compression,
+                    **_queue_options(),
+                )
+            ), {}
+        _unbatched.append(path)
+    return path, dict(
+        rotation=settings.logs.rotation,
+        retention=settings.logs.retention,
+        compression=settings.logs.compression,
+        # Очередь loguru: запись в файл всё равно не в потоке запроса
+        enqueue=settings.logs.mode == "async",
+    )
+
+
 logger.add(
-    sys.stderr,
+    _batching(BatchingStreamSink(sys.stderr, **_queue_options()))
+    if settings.logs.mode == "async"
+    else sys.stderr,
     level=logging.DEBUG,
     format=settings.logs.cmd_format,
     colorize=True,
 )
 
-logger.add(
-    settings.logs.auth_logs,
-    level=logging.INFO,
-    format=settings.logs.file_format,
-    rotation=settings.logs.rotation,
-    retention=settings.logs.retention,
-    compression=settings.logs.compression,
-)
-logger.add(
-    settings.logs.error_logs,
-    level=logging.ERROR,
-    format=settings.logs.file_format,
-    rotation=settings.logs.rotation,
-    retention=settings.logs.retention,
-    compression=settings.logs.compression,
-)
+for path, level in (
+    (settings.logs.auth_logs, logging.INFO),
+    (settings.logs.error_logs, logging.ERROR),
+):
+    sink, options = _file_sink(path)
+    logger.add(
+        sink,
+        level=level,
+        format=settings.logs.file_format,
+        **options,
+    )
+
+if _unbatched:
+    logger.warning(
+        "Log rotation %r / retention %r handled by loguru's own file sink for %s"
+        % (settings.logs.rotation, settings.logs.retention, ", ".join(map(str, _unbatched)))
+    )
+
+
+@atexit.register
+def _flush_sinks():
+    for sink in async_sinks:
+        sink.stop()
@@ -0,0 +1,252 @@
+import gzip
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TextIO
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?\s*$", re.IGNORECASE)
+_DURATION = re.compile(
+    r"^\s*(\d+(?:\.\d+)?)\s*(second|minute|hour|day|week|month|year)s?\s*$", re.IGNORECASE
+)
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+# Месяц и год — как в loguru: 30 и 365 дней
+_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+    "month": 2_592_000,
+    "year": 31_536_000,
+}
+
+
+def parse_size(value: str) -> int:
+    """'10 MB' → байты; формат как у rotation в loguru."""
+    match = _SIZE.match(value)
+    if not match:
+        raise ValueError(f"Unsupported size: {value!r}")
+    return int(float(match.group(1)) * _UNITS[(match.group(2) or "B").upper()])
+
+
+def parse_duration(value: str) -> float:
+    """'10 days' → секунды; формат как у интервалов rotation/retention в loguru."""
+    match = _DURATION.match(value)
+    if not match:
+        raise ValueError(f"Unsupported duration: {value!r}")
+    return float(match.group(1)) * _SECONDS[match.group(2).lower()]
+
+
+@dataclass
+class SinkStats:
+    written: int = 0
+    dropped: int = 0
+    batches: int = 0
+    rotations: int = 0
+
+
+class BatchingSink:
+    """
+    Неблокирующий sink для loguru: вызов только кладёт строку в
+    ограниченную очередь, пишет фоновый поток пачками до batch_size.
+    При переполнении новые записи отбрасываются и считаются в
+    stats.dropped; в вывод попадает строка о числе потерянных записей.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = SinkStats()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._reported_dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-{type(self).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(str(message))
+        except queue.Full:
+            self.stats.dropped += 1
+
+    def _write(self, chunk: str) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            item = first
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            records = len(batch)
+            dropped = self.stats.dropped
+            if dropped != self._reported_dropped:
+                batch.append(
+                    f"{datetime.now():%Y-%m-%d %H:%M:%S} | WARNING  | logging - "
+                    f"{dropped - self._reported_dropped} log records dropped, queue full\n"
+                )
+                self._reported_dropped = dropped
+            if batch:
+                try:
+                    self._write("".join(batch))
+                except OSError as e:
+                    print(f"Log sink write failed: {e}", file=sys.stderr)
+                    continue
+                except Exception as e:
+                    # Поток не должен умереть: иначе после заполнения
+                    # очереди терялись бы все записи
+                    print("Log sink write failed:", file=sys.stderr)
+                    traceback.print_exception(e, file=sys.stderr)
+                    continue
+                self.stats.written += records
+                self.stats.batches += 1
+        self._close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Дописывает очередь и останавливает поток."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+
+class BatchingStreamSink(BatchingSink):
+    def __init__(self, stream: TextIO, **kwargs) -> None:
+        self.stream = stream
+        super().__init__(**kwargs)
+
+    def _write(self, chunk: str) -> None:
+        self.stream.write(chunk)
+        self.stream.flush()
+
+
+def _parses(parser, value: str) -> bool:
+    try:
+        parser(value)
+    except ValueError:
+        return False
+    return True
+
+
+class BatchingFileSink(BatchingSink):
+    """
+    Файловый sink с ротацией по размеру ('10 MB') или интервалу ('1 day').
+    Сжатие ротированного файла и удаление старых по retention идут в
+    отдельном потоке и не задерживают запись. Остальные формы настроек
+    loguru (время суток, день недели, число файлов) не поддерживаются —
+    см. supports.
+    """
+
+    _compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+
+    def __init__(
+        self,
+        path: Path,
+        rotation: str,
+        retention: str | None = None,
+        compression: str | None = None,
+        **kwargs,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if _parses(parse_size, rotation):
+            self.rotation_size, self.rotation_interval = parse_size(rotation), None
+        else:
+            self.rotation_size, self.rotation_interval = None, parse_duration(rotation)
+        self.retention = parse_duration(retention) if retention else None
+        self.compression = compression
+        self._file = self.path.open("a", encoding="utf-8")
+        self._rotate_at = self._next_rotation()
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def supports(rotation: str, retention: str | None) -> bool:
+        """Понимает ли sink эти rotation и retention; иначе — файловый sink loguru."""
+        return (
+            _parses(parse_size, rotation) or _parses(parse_duration, rotation)
+        ) and (not retention or _parses(parse_duration, retention))
+
+    def _next_rotation(self) -> float | None:
+        if self.rotation_interval is None:
+            return None
+        return time.time() + self.rotation_interval
+
+    def _due(self) -> bool:
+        if self.rotation_size is not None:
+            return self._file.tell() >= self.rotation_size
+        return time.time() >= self._rotate_at
+
+    def _write(self, chunk: str) -> None:
+        self._file.write(chunk)
+        self._file.flush()
+        if self._due():
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        rotated = self.path.with_name(f"{self.path.name}.{datetime.now():%Y-%m-%d_%H-%M-%S_%f}")
+        self.path.rename(rotated)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._rotate_at = self._next_rotation()
+        self.stats.rotations += 1
+        self._compressor.submit(self._archive, rotated).add_done_callback(
+            self._report_archive_error
+        )
+
+    @staticmethod
+    def _report_archive_error(future) -> None:
+        # loguru здесь не годится: ошибка записи логов ушла бы в тот же sink
+        if (error := future.exception()) is not None:
+            print("Log archive failed:", file=sys.stderr)
+            traceback.print_exception(error, file=sys.stderr)
+
+    def _archive(self, rotated: Path) -> None:
+        if self.compression == "zip":
+            with zipfile.ZipFile(f"{rotated}.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.write(rotated, rotated.name)
+            rotated.unlink()
+        elif self.compression == "gz":
+            with rotated.open("rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+        if self.retention is not None:
+            deadline = time.time() - self.retention
+            for old in self.path.parent.glob(f"{self.path.name}.*"):
+                if old.stat().st_mtime < deadline:
+                    old.unlink(missing_ok=True)
+
+    def _close(self) -> None:
+        self._file.close()
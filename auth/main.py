@@ -7,19 +7,42 @@ from starlette.middleware.cors import CORSMiddleware
 
 from core.config import settings
 
-from api import router as api_router
+from api.router import router as api_router
+from api.metrics import MetricsMiddleware, router as metrics_router
+from api.well_known import router as well_known_router
+from audit import AuditPublisher
+from core.http import HttpClient
 from core.models import db_helper
 from core.redis import RedisClient
+from core.redis.cache import Cache
+from core.redis.revocation import RevocationSet
+from crud.stores import SessionWriteBehind
+from jobs import SessionGC
 from logs import logger  # noqa: F401
+from utils.executor import crypto_executor
 from api.exceptions.handlers import register_exception_handlers
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Инициировать подключение в этом месте не требуется
+    await HttpClient.connect()
+    await db_helper.start()
+    await Cache.start()
+    await RevocationSet.start()
+    await SessionWriteBehind.start()
+    await SessionGC.start()
+    await AuditPublisher.start()
     yield
+    await AuditPublisher.stop()
+    await SessionGC.stop()
+    await SessionWriteBehind.stop()
+    await RevocationSet.stop()
+    await Cache.stop()
     await RedisClient.close()
+    await HttpClient.close()
     await db_helper.dispose()
+    crypto_executor.shutdown()
 
 
 main_app = FastAPI(
@@ -33,6 +56,13 @@ main_app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+main_app.add_middleware(MetricsMiddleware)
 main_app.include_router(
     api_router,
 )
+main_app.include_router(
+    well_known_router,
+)
+main_app.include_router(
+    metrics_router,
+)
@@ -0,0 +1,64 @@
+import asyncio
+
+import orjson
+import pytest
+
+from audit import AuditPublisher, LogoutEvent, emit
+from core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+class BrokenEvent(LogoutEvent):
+    def encode(self) -> bytes:
+        raise TypeError("not serializable")
+
+
+@pytest.fixture
+async def publisher(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.audit, "fallback_path", tmp_path / "audit.ndjson")
+    monkeypatch.setattr(settings.audit, "flush_interval", 0.01)
+    monkeypatch.setattr(AuditPublisher, "stats", type(AuditPublisher.stats)())
+    monkeypatch.setattr(AuditPublisher, "_next_connect", 0.0)
+
+    async def start(backend: str):
+        monkeypatch.setattr(settings.audit, "backend", backend)
+        await AuditPublisher.start()
+
+    yield start
+    await AuditPublisher.stop()
+
+
+def written(path) -> list[dict]:
+    if not path.exists():
+        return []
+    return [orjson.loads(line) for line in path.read_bytes().splitlines()]
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_unserializable_batch_is_dropped_and_publisher_keeps_running(publisher):
+    await publisher("file")
+    emit(BrokenEvent(user_id="a"))
+    await wait_for(lambda: AuditPublisher.stats.dropped == 1)
+
+    emit(LogoutEvent(user_id="b"))
+    await wait_for(lambda: AuditPublisher.stats.fallback == 1)
+    assert [event["user_id"] for event in written(settings.audit.fallback_path)] == ["b"]
+    assert not AuditPublisher._task.done()
+
+
+async def test_unexpected_publish_error_falls_back_to_file(publisher, monkeypatch):
+    async def publish(cls, batch):
+        raise ImportError("No module named 'faststream'")
+
+    monkeypatch.setattr(AuditPublisher, "_publish", classmethod(publish))
+    await publisher("nats")
+    emit(LogoutEvent(user_id="a"))
+    await wait_for(lambda: AuditPublisher.stats.fallback == 1)
+    assert AuditPublisher.stats.published == 0
+    assert written(settings.audit.fallback_path)[0]["user_id"] == "a"
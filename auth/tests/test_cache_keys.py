@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.redis.keys import KeyBuilder
+
+
+class Item(BaseModel):
+    sub: str
+    ip: str
+
+
+async def find(session: AsyncSession, sub_id: str, limit: int = 10): ...
+
+
+async def create(session: AsyncSession, item: Item): ...
+
+
+def test_positional_and_keyword_calls_share_a_key():
+    keys = KeyBuilder("ns", find)
+    positional = keys.build(keys.bind((None, "a"), {}))
+    keyword = keys.build(keys.bind((), {"session": None, "sub_id": "a", "limit": 10}))
+    assert positional == keyword
+    assert positional.startswith("ns:find:")
+
+
+def test_key_depends_on_arguments_not_session():
+    keys = KeyBuilder("ns", find)
+    assert keys.build(keys.bind(("s1", "a"), {})) == keys.build(keys.bind(("s2", "a"), {}))
+    assert keys.build(keys.bind((None, "a"), {})) != keys.build(keys.bind((None, "b"), {}))
+
+
+def test_template_and_field_paths():
+    assert KeyBuilder("ns", find, template="{sub_id}").build({"sub_id": "a"}) == "ns:find:a"
+    keys = KeyBuilder("ns", create, fields=["item.sub"])
+    same_sub = [
+        keys.build(keys.bind((None, Item(sub="a", ip=ip)), {})) for ip in ("1.1.1.1", "2.2.2.2")
+    ]
+    assert same_sub[0] == same_sub[1]
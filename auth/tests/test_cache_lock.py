@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.redis.cache import Cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def short_lease(monkeypatch):
+    monkeypatch.setattr(settings.redis, "lock_lease_ms", 300)
+    monkeypatch.setattr(settings.redis, "lock_poll_ms", 10)
+
+
+def reader(namespace: str, result=lambda: {"value": 1}):
+    calls = []
+
+    @Cache.redis(read=True, namespace=namespace, key="{uuid}", local=False)
+    async def read(session: AsyncSession | None, uuid: str):
+        calls.append(uuid)
+        return result()
+
+    return read, calls, f"{namespace}:read:"
+
+
+async def test_follower_takes_value_stored_by_lock_owner(redis):
+    read, calls, prefix = reader("t_lock_value")
+    await redis.set(prefix + "1:lock", "other-worker", px=300)
+
+    async def owner_finishes():
+        await asyncio.sleep(0.05)
+        await redis.set(prefix + "1", b'{"value":2}')
+        await redis.delete(prefix + "1:lock")
+
+    owner = asyncio.create_task(owner_finishes())
+    assert await read(None, uuid="1") == {"value": 2}
+    await owner
+    assert calls == []
+
+
+async def test_follower_falls_back_to_db_when_lease_expires(redis):
+    read, calls, prefix = reader("t_lock_timeout")
+    # Владелец блокировки «завис» и не отпускает её до конца аренды
+    await redis.set(prefix + "1:lock", "other-worker", px=60_000)
+
+    started = time.monotonic()
+    assert await read(None, uuid="1") == {"value": 1}
+    assert time.monotonic() - started >= 0.3
+    assert calls == ["1"]
+
+
+async def test_follower_stops_waiting_when_owner_stores_nothing(redis):
+    read, calls, prefix = reader("t_lock_empty", result=lambda: None)
+    await redis.set(prefix + "1:lock", "other-worker", px=60_000)
+
+    async def owner_finds_nothing():
+        await asyncio.sleep(0.05)
+        await redis.delete(prefix + "1:lock")
+
+    owner = asyncio.create_task(owner_finds_nothing())
+    started = time.monotonic()
+    assert await read(None, uuid="1") is None
+    await owner
+    # Пустой результат не кэшируется: ждать до конца аренды незачем
+    assert time.monotonic() - started < 0.3
+    assert calls == ["1"]
+
+
+async def test_concurrent_misses_in_one_worker_run_once():
+    read, calls, _ = reader("t_lock_coalesce")
+    results = await asyncio.gather(*(read(None, uuid="1") for _ in range(10)))
+    assert results == [{"value": 1}] * 10
+    assert calls == ["1"]
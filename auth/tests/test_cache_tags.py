@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.redis.cache import Cache
+
+pytestmark = pytest.mark.anyio
+
+
+def counting_reader(namespace: str, tags: tuple[str, ...]):
+    calls = []
+
+    @Cache.redis(read=True, namespace=namespace, tags=tags, key="{sub_id}:{uuid}", local=False)
+    async def read(session: AsyncSession | None, sub_id: str, uuid: str) -> dict:
+        calls.append((sub_id, uuid))
+        return {"sub": sub_id, "uuid": uuid, "version": len(calls)}
+
+    return read, calls
+
+
+async def test_read_is_cached():
+    read, calls = counting_reader("t_cached", ("sub:{sub_id}",))
+    first = await read(None, sub_id="a", uuid="1")
+    second = await read(None, sub_id="a", uuid="1")
+    assert first == second
+    assert len(calls) == 1
+
+
+async def test_write_invalidates_only_its_tags():
+    read, calls = counting_reader("t_tags", ("sub:{sub_id}", "session:{uuid}"))
+
+    @Cache.redis(write=True, namespace="t_tags", tags=("sub:{sub_id}",))
+    async def write(session: AsyncSession | None, sub_id: str) -> None:
+        return None
+
+    await read(None, sub_id="a", uuid="1")
+    await read(None, sub_id="a", uuid="2")
+    await read(None, sub_id="b", uuid="3")
+    assert len(calls) == 3
+
+    await write(None, sub_id="a")
+
+    await read(None, sub_id="a", uuid="1")
+    await read(None, sub_id="a", uuid="2")
+    await read(None, sub_id="b", uuid="3")
+    # Перечитаны только ключи под тегом sub:a
+    assert calls[3:] == [("a", "1"), ("a", "2")]
+
+
+async def test_write_without_tags_clears_namespace():
+    read, calls = counting_reader("t_clear", ("sub:{sub_id}",))
+
+    @Cache.redis(write=True, namespace="t_clear")
+    async def write(session: AsyncSession | None) -> None:
+        return None
+
+    await read(None, sub_id="a", uuid="1")
+    await read(None, sub_id="b", uuid="2")
+    await write(None)
+    await read(None, sub_id="a", uuid="1")
+    await read(None, sub_id="b", uuid="2")
+    assert len(calls) == 4
+
+
+async def test_invalidate_tags_is_scoped_to_namespace():
+    read, calls = counting_reader("t_ns_a", ("sub:{sub_id}",))
+    other, other_calls = counting_reader("t_ns_b", ("sub:{sub_id}",))
+    await read(None, sub_id="a", uuid="1")
+    await other(None, sub_id="a", uuid="1")
+
+    await Cache.invalidate_tags("t_ns_a", ["sub:a"])
+
+    await read(None, sub_id="a", uuid="1")
+    await other(None, sub_id="a", uuid="1")
+    assert len(calls) == 2
+    assert len(other_calls) == 1
@@ -0,0 +1,85 @@
+"""
+CLIENT TRACKING не поддерживается fakeredis: тесты идут против настоящего
+redis-server из TEST_REDIS_URL (по умолчанию redis://127.0.0.1:6379/15)
+и пропускаются, если его нет.
+"""
+import asyncio
+import os
+
+import pytest
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from core.redis.local import MISSING, LocalCache
+from core.redis.tracking import ClientTracking
+
+pytestmark = pytest.mark.anyio
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://127.0.0.1:6379/15")
+
+
+@pytest.fixture
+async def server():
+    client = Redis.from_url(REDIS_URL, socket_connect_timeout=0.5)
+    try:
+        await client.ping()
+    except (RedisError, OSError):
+        await client.aclose()
+        pytest.skip(f"redis-server is not available at {REDIS_URL}")
+    yield client
+    await client.delete("users:tracked", "other:untracked")
+    await client.aclose()
+
+
+@pytest.fixture
+async def tracked():
+    local = LocalCache(ttl=60)
+    invalidations = []
+
+    def on_invalidate(keys):
+        invalidations.append(keys)
+        if keys is None:
+            local.clear()
+        else:
+            local.delete(keys)
+
+    tracking = ClientTracking(
+        ConnectionPool.from_url(REDIS_URL).connection_kwargs, ["users:"], on_invalidate
+    )
+    await tracking.start()
+    try:
+        async with asyncio.timeout(2):
+            while not tracking.active:
+                await asyncio.sleep(0.01)
+        yield local, tracking, invalidations
+    finally:
+        await tracking.stop()
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_write_from_another_client_evicts_local_copy(server, tracked):
+    local, tracking, _ = tracked
+    sequence = tracking.sequence
+    local.set("users:tracked", "cached", ttl=60, cap=False)
+
+    await server.set("users:tracked", "changed")
+
+    await wait_for(lambda: local.get("users:tracked") is MISSING)
+    assert not tracking.unchanged_since("users:tracked", sequence)
+
+
+async def test_keys_outside_prefixes_are_not_reported(server, tracked):
+    local, _, invalidations = tracked
+    local.set("other:untracked", "cached")
+
+    await server.set("other:untracked", "changed")
+    await server.set("users:tracked", "changed")
+
+    await wait_for(lambda: ["users:tracked"] in invalidations)
+    assert local.get("other:untracked") == "cached"
+    assert all(keys is None or "other:untracked" not in keys for keys in invalidations)
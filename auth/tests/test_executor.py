@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.executor import CryptoExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_thread_mode_counts_running_and_waiting():
+    executor = CryptoExecutor(mode="thread", max_workers=1)
+    release = threading.Event()
+    try:
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        second = asyncio.ensure_future(executor.run(release.wait, 5))
+        for _ in range(100):
+            if executor.stats.running:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.stats.in_flight == 2
+        assert executor.stats.running == 1
+        release.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert (executor.stats.in_flight, executor.stats.running) == (0, 0)
+        assert executor.stats.completed == 2
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+async def test_inline_mode_bypasses_the_pool():
+    executor = CryptoExecutor(mode="inline")
+    assert await executor.run(sum, [1, 2]) == 3
+    assert executor.stats.inline == 1
+    assert executor.stats.submitted == 0
+
+
+async def test_reset_replaces_process_pool():
+    executor = CryptoExecutor(mode="process", max_workers=1)
+    try:
+        assert await executor.run(pow, 2, 10) == 1024
+        pool = executor._pool
+        executor.reset()
+        assert await executor.run(pow, 2, 3) == 8
+        assert executor._pool is not pool
+    finally:
+        executor.shutdown()
+
+
+async def test_small_inputs_run_inline_in_pool_modes():
+    executor = CryptoExecutor(mode="thread", max_workers=1, inline_max_bytes=16)
+    try:
+        assert await executor.run(threading.get_ident, size=16) == threading.get_ident()
+        assert await executor.run(threading.get_ident, size=17) != threading.get_ident()
+        # Без size стоимость неизвестна — только через пул
+        assert await executor.run(threading.get_ident) != threading.get_ident()
+        assert (executor.stats.inline, executor.stats.submitted) == (1, 2)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from api.api_v1.authentication import helpers
+from core.config import settings
+from core.http import HttpClient
+from utils.jwks import JWKSCache
+
+pytestmark = pytest.mark.anyio
+
+JWKS_URL = "https://oauth.test/certs"
+TOKEN_URL = "https://oauth.test/token"
+
+
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def jwk(key, kid: str) -> dict:
+    data = RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+    data.update(kid=kid, alg="RS256", use="sig")
+    return data
+
+
+class Provider:
+    """Заглушка OAuth-провайдера: JWKS и обмен кода на id_token."""
+
+    def __init__(self) -> None:
+        self.keys = {"k1": signing_key()}
+        self.max_age = 300
+        self.status = 200
+        self.jwks_requests = 0
+        self.id_token: str | None = None
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url == JWKS_URL:
+            self.jwks_requests += 1
+            if self.status != 200:
+                return httpx.Response(self.status)
+            return httpx.Response(
+                200,
+                json={"keys": [jwk(key, kid) for kid, key in self.keys.items()]},
+                headers={"Cache-Control": f"public, max-age={self.max_age}"},
+            )
+        if request.url == TOKEN_URL:
+            return httpx.Response(200, json={"id_token": self.id_token})
+        return httpx.Response(404)
+
+    def sign(self, kid: str, **claims) -> str:
+        payload = {
+            "sub": "google-sub",
+            "aud": settings.google.client_id,
+            "iss": "https://accounts.google.com",
+            "exp": int(time.time()) + 60,
+            **claims,
+        }
+        return jwt.encode(payload, self.keys[kid], algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+async def provider(monkeypatch):
+    provider = Provider()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(provider.handle))
+    monkeypatch.setattr(HttpClient, "client", client)
+    yield provider
+    await client.aclose()
+
+
+async def test_keys_are_fetched_once_and_served_from_cache(provider):
+    cache = JWKSCache(JWKS_URL)
+
+    first = await cache.get_signing_key("k1")
+    second = await cache.get_signing_key("k1")
+
+    assert first is second and first.key_id == "k1"
+    assert provider.jwks_requests == 1
+
+
+async def test_unknown_kid_refetches_keys(provider):
+    cache = JWKSCache(JWKS_URL, min_refetch_seconds=0)
+    await cache.get_signing_key("k1")
+    provider.keys["k2"] = signing_key()
+
+    key = await cache.get_signing_key("k2")
+
+    assert key is not None and key.key_id == "k2"
+    assert provider.jwks_requests == 2
+
+
+async def test_unknown_kid_refetch_is_rate_limited(provider):
+    cache = JWKSCache(JWKS_URL, min_refetch_seconds=60)
+    await cache.get_signing_key("k1")
+
+    assert await cache.get_signing_key("forged") is None
+    assert await cache.get_signing_key("forged") is None
+    assert provider.jwks_requests == 1
+
+
+async def test_expired_keys_are_served_while_refreshing(provider):
+    provider.max_age = 0
+    cache = JWKSCache(JWKS_URL)
+    old = await cache.get_signing_key("k1")
+    provider.keys = {"k1": signing_key()}
+
+    assert await cache.get_signing_key("k1") is old
+    await cache._background
+
+    assert await cache.get_signing_key("k1") is not old
+    assert provider.jwks_requests >= 2
+
+
+async def test_first_fetch_error_is_raised(provider):
+    provider.status = 503
+    cache = JWKSCache(JWKS_URL)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await cache.get_signing_key("k1")
+
+
+async def test_failed_background_refresh_keeps_old_keys(provider):
+    provider.max_age = 0
+    cache = JWKSCache(JWKS_URL)
+    old = await cache.get_signing_key("k1")
+    provider.status = 500
+
+    assert await cache.get_signing_key("k1") is old
+    await cache._background
+
+    assert await cache.get_signing_key("k1") is old
+
+
+async def test_concurrent_first_requests_share_one_fetch(provider):
+    cache = JWKSCache(JWKS_URL)
+
+    keys = await asyncio.gather(*(cache.get_signing_key("k1") for _ in range(10)))
+
+    assert all(key is keys[0] for key in keys)
+    assert provider.jwks_requests == 1
+
+
+async def test_google_id_token_is_verified_with_provider_keys(monkeypatch, provider):
+    monkeypatch.setattr(settings.google, "token_url", TOKEN_URL)
+    monkeypatch.setattr(helpers, "google_jwks", JWKSCache(JWKS_URL))
+    provider.id_token = provider.sign("k1", email="user@example.com")
+
+    token_json = await helpers.get_json_google_token("code")
+    payload = await helpers.get_google_user_payload(token_json)
+
+    assert payload["email"] == "user@example.com"
+
+
+async def test_google_id_token_with_unknown_kid_is_rejected(monkeypatch, provider):
+    monkeypatch.setattr(helpers, "google_jwks", JWKSCache(JWKS_URL, min_refetch_seconds=0))
+    provider.keys["gone"] = signing_key()
+    token = provider.sign("gone")
+    del provider.keys["gone"]
+
+    with pytest.raises(helpers.InvalidTokenException):
+        await helpers.get_google_user_payload({"id_token": token})
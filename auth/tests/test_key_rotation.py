@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, UTC
+
+import httpx
+import jwt
+import pytest
+
+from core.config import JWTKey
+from main import main_app
+from utils import auth as auth_utils
+from utils.keyring import KeyRing
+
+
+@pytest.fixture
+def use_keys(monkeypatch, rsa_pair):
+    """Подменяет связку ключей; ключи k1 и k2 создаются один раз на тест."""
+    pairs = {kid: rsa_pair(kid) for kid in ("k1", "k2")}
+
+    def configure(**dates: dict) -> KeyRing:
+        keyring = KeyRing(
+            [
+                JWTKey(
+                    kid=kid,
+                    private_key_path=private,
+                    public_key_path=public,
+                    **dates.get(kid, {}),
+                )
+                for kid, (private, public) in pairs.items()
+            ]
+        )
+        monkeypatch.setattr(auth_utils, "keyring", keyring)
+        auth_utils.load_keys()
+        return keyring
+
+    yield configure
+    monkeypatch.undo()
+    auth_utils.load_keys()
+
+
+def kid_of(token: str) -> str:
+    return jwt.get_unverified_header(token)["kid"]
+
+
+def test_rotation_switches_signing_key_and_keeps_old_tokens_valid(use_keys):
+    now = datetime.now(UTC)
+    use_keys(k2={"active_from": now + timedelta(hours=1)})
+    old_token = auth_utils.encode_jwt({"sub": "a"})
+    assert kid_of(old_token) == "k1"
+
+    # Наступил active_from нового ключа
+    use_keys(k2={"active_from": now - timedelta(seconds=1)})
+    new_token = auth_utils.encode_jwt({"sub": "a"})
+    assert kid_of(new_token) == "k2"
+    assert auth_utils.decode_jwt(old_token)["sub"] == "a"
+    assert auth_utils.decode_jwt(new_token)["sub"] == "a"
+
+
+def test_retired_key_is_rejected_even_from_verified_cache(use_keys):
+    now = datetime.now(UTC)
+    use_keys(k2={"active_from": now + timedelta(hours=1)})
+    token = auth_utils.encode_jwt({"sub": "a"})
+    auth_utils.decode_jwt(token)
+    assert auth_utils.peek_verified(token) is not None
+
+    keyring = use_keys(
+        k1={"retire_at": now - timedelta(seconds=1)},
+        k2={"active_from": now - timedelta(hours=1)},
+    )
+    # load_keys сбрасывает кэш; запись от другого потока могла появиться после
+    auth_utils.remember_verified(
+        token, jwt.decode(token, options={"verify_signature": False}), "k1"
+    )
+    assert auth_utils.peek_verified(token) is None
+    with pytest.raises(jwt.InvalidSignatureError):
+        auth_utils.decode_jwt(token)
+    assert [key["kid"] for key in keyring.jwks()["keys"]] == ["k2"]
+
+
+def test_unknown_kid_is_rejected(use_keys, rsa_pair):
+    use_keys()
+    private, _ = rsa_pair("stranger")
+    token = jwt.encode(
+        {"sub": "a"}, private.read_text(), algorithm="RS256", headers={"kid": "k9"}
+    )
+    with pytest.raises(jwt.InvalidSignatureError):
+        auth_utils.decode_jwt(token)
+
+
+@pytest.mark.anyio
+async def test_jwks_endpoint_verifies_tokens_of_every_live_key(use_keys):
+    now = datetime.now(UTC)
+    use_keys(k2={"active_from": now + timedelta(hours=1)})
+    old_token = auth_utils.encode_jwt({"sub": "a"})
+    use_keys(k2={"active_from": now - timedelta(seconds=1)})
+    new_token = auth_utils.encode_jwt({"sub": "b"})
+
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    jwks = jwt.PyJWKSet.from_dict(response.json())
+    for token, sub in ((old_token, "a"), (new_token, "b")):
+        key = jwks[kid_of(token)]
+        assert jwt.decode(token, key.key, algorithms=[key.algorithm_name])["sub"] == sub
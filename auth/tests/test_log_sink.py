@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from logs.sink import BatchingFileSink, parse_duration
+
+
+@pytest.fixture
+def make_sink(tmp_path):
+    sinks = []
+
+    def make(rotation: str, retention: str | None = None, compression: str | None = None):
+        sink = BatchingFileSink(
+            tmp_path / "app.log",
+            rotation=rotation,
+            retention=retention,
+            compression=compression,
+            flush_interval=0.01,
+        )
+        sinks.append(sink)
+        return sink
+
+    yield make
+    for sink in sinks:
+        sink.stop()
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize(
+    ("rotation", "retention", "supported"),
+    [
+        ("10 MB", "10 days", True),
+        ("1 day", "1 month", True),
+        ("500", None, True),
+        ("00:00", "10 days", False),
+        ("monday at 12:00", None, False),
+        ("10 MB", "10 files", False),
+    ],
+)
+def test_supports_matches_loguru_forms_it_implements(rotation, retention, supported):
+    assert BatchingFileSink.supports(rotation, retention) is supported
+
+
+def test_month_is_thirty_days():
+    assert parse_duration("1 month") == 30 * 86400
+
+
+def test_rotates_by_size(make_sink, tmp_path):
+    sink = make_sink("20 B")
+    sink("x" * 30 + "\n")
+    wait_for(lambda: sink.stats.rotations == 1)
+    assert len(list(tmp_path.glob("app.log.*"))) == 1
+
+
+def test_rotates_by_interval(make_sink, tmp_path):
+    sink = make_sink("1 second")
+    sink("first\n")
+    wait_for(lambda: sink.stats.written == 1)
+    assert sink.stats.rotations == 0
+    sink._rotate_at = time.time() - 1
+    sink("second\n")
+    wait_for(lambda: sink.stats.rotations == 1)
+
+
+def test_archive_errors_are_reported(make_sink, capsys, monkeypatch):
+    sink = make_sink("10 B", compression="zip")
+
+    def broken(rotated):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(sink, "_archive", broken)
+    sink("x" * 20 + "\n")
+    errors = []
+    wait_for(lambda: errors.append(capsys.readouterr().err) or "disk full" in "".join(errors))
+
+
+def test_writer_survives_unexpected_errors(make_sink, capsys, monkeypatch):
+    sink = make_sink("10 MB")
+    write = sink._write
+    calls = []
+
+    def flaky(chunk):
+        calls.append(chunk)
+        if len(calls) == 1:
+            raise UnicodeEncodeError("utf-8", chunk, 0, 1, "bad record")
+        write(chunk)
+
+    monkeypatch.setattr(sink, "_write", flaky)
+    sink("first\n")
+    wait_for(lambda: calls)
+    sink("second\n")
+    wait_for(lambda: sink.stats.written == 1)
+
+    assert sink._thread.is_alive()
+    assert "bad record" in capsys.readouterr().err
+    assert sink.path.read_text() == "second\n"
@@ -0,0 +1,113 @@
+import fakeredis
+import httpx
+import pytest
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from prometheus_client.parser import text_string_to_metric_families
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from api import metrics
+from core.redis import InstrumentedConnectionPool, RedisClient
+from main import main_app
+from utils.executor import crypto_executor
+
+pytestmark = pytest.mark.anyio
+
+
+async def scrape() -> dict:
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        family.name: family
+        for family in text_string_to_metric_families(response.text)
+    }
+
+
+async def test_exposition_is_parseable():
+    families = await scrape()
+
+    assert families["http_requests"].type == "counter"
+    assert families["db_pool_connections"].type == "gauge"
+    assert families["crypto_executor_tasks"].type == "counter"
+    assert families["crypto_executor_latency_seconds"].type == "counter"
+    assert families["crypto_executor_max_latency_seconds"].type == "gauge"
+
+
+async def test_requests_are_counted_by_route_template():
+    await scrape()
+    families = await scrape()
+
+    samples = [
+        sample
+        for sample in families["http_requests"].samples
+        if sample.name == "http_requests_total"
+        and sample.labels["route"] == "/metrics"
+        and sample.labels["status"] == "200"
+    ]
+    assert samples and samples[0].value >= 1
+
+
+@pytest.fixture
+async def pool(request, monkeypatch):
+    # Серии гистограмм общие на процесс: у каждого теста свой пул
+    pool = InstrumentedConnectionPool(
+        request.node.name,
+        connection_class=FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        max_connections=2,
+        timeout=0.05,
+    )
+    client = Redis(connection_pool=pool)
+    monkeypatch.setattr(RedisClient, "redis_client", client)
+    yield pool
+    await client.aclose()
+
+
+def samples(families: dict, name: str) -> dict:
+    return {
+        tuple(sample.labels.values()): sample.value
+        for sample in families[name].samples
+    }
+
+
+async def test_redis_pool_state_is_exported(pool):
+    await RedisClient.redis_client.set("key", 1)
+    held = await pool.get_connection()
+    try:
+        families = await scrape()
+    finally:
+        await pool.release(held)
+
+    state = samples(families, "redis_pool_connections")
+    assert state[(pool.name, "max")] == 2
+    assert state[(pool.name, "created")] == 1
+    assert state[(pool.name, "in_use")] == 1
+    assert pool.in_use == 0
+
+
+async def test_redis_pool_checkout_wait_is_observed(pool):
+    held = [await pool.get_connection(), await pool.get_connection()]
+    with pytest.raises(RedisConnectionError, match="No connection available"):
+        await pool.get_connection()
+    for connection in held:
+        await pool.release(connection)
+
+    families = await scrape()
+    counts = {
+        sample.labels["pool"]: sample.value
+        for sample in families["redis_pool_checkout_wait_seconds"].samples
+        if sample.name.endswith("_count")
+    }
+    assert counts[pool.name] == 3
+
+
+async def test_executor_latency_is_exported(monkeypatch):
+    monkeypatch.setattr(crypto_executor.stats, "total_latency", 1.5)
+    monkeypatch.setattr(crypto_executor.stats, "max_latency", 0.25)
+
+    families = await scrape()
+
+    assert samples(families, "crypto_executor_latency_seconds")[()] == 1.5
+    assert samples(families, "crypto_executor_max_latency_seconds")[()] == 0.25
@@ -0,0 +1,154 @@
+import base64
+import uuid
+from datetime import datetime
+
+import orjson
+import pytest
+
+from api.exceptions.auth import InvalidCursorException
+from core.models.user import SessionStatus
+from crud.stores import RedisSessionStore
+from crud.stores import postgres
+from utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    parse_naive_datetime,
+    parse_score,
+    parse_uuid,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_postgres_cursor_round_trip():
+    timestamp = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    id_ = str(uuid.uuid4())
+
+    cursor = encode_cursor(timestamp.isoformat(), id_)
+
+    assert decode_cursor(cursor, parse_naive_datetime, parse_uuid) == [timestamp, id_]
+
+
+def test_redis_cursor_round_trip_keeps_float_score_exact():
+    score = 1760000000.1234567
+
+    cursor = encode_cursor(score, "uuid")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, parse_score, str) == [score, "uuid"]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        encode_cursor(1.0),
+        encode_cursor(1.0, "a", "b"),
+        base64.urlsafe_b64encode(orjson.dumps({"score": 1.0})).decode(),
+        encode_cursor("yesterday", "uuid"),
+    ],
+)
+def test_foreign_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor, parse_naive_datetime, parse_uuid)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ("2026-03-01T12:30:00+00:00", str(uuid.UUID(int=1))),
+        ("2026-03-01T12:30:00", "not-a-uuid"),
+        ("2026-03-01T12:30:00", 42),
+        (1760000000, str(uuid.UUID(int=1))),
+    ],
+)
+def test_crafted_postgres_cursor_is_rejected(values):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(encode_cursor(*values), parse_naive_datetime, parse_uuid)
+
+
+@pytest.mark.parametrize("score", [True, "1.0", None])
+def test_crafted_redis_cursor_is_rejected(score):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(encode_cursor(score, "uuid"), parse_score, str)
+
+
+def test_non_finite_score_is_rejected():
+    cursor = base64.urlsafe_b64encode(b'[1e999, "uuid"]').decode()
+
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor, parse_score, str)
+
+
+async def test_postgres_store_rejects_crafted_cursor_before_querying(redis):
+    cursor = encode_cursor("2026-03-01T12:30:00+03:00", str(uuid.uuid4()))
+
+    with pytest.raises(InvalidCursorException):
+        await postgres.get_user_sessions_page(None, str(uuid.uuid4()), 10, cursor=cursor)
+
+
+async def seed(store: RedisSessionStore, sub: str, timestamps: list[float], statuses=None):
+    rows = []
+    for index, timestamp in enumerate(timestamps):
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "uuid": str(uuid.uuid4()),
+                "sub": sub,
+                "name": f"device-{index}",
+                "ip": "127.0.0.1",
+                "status": (statuses or {}).get(index, SessionStatus.ACTIVE),
+                "can_abort": True,
+                "timestamp": timestamp,
+            }
+        )
+    await store._hydrate(rows)
+    return rows
+
+
+async def walk(store: RedisSessionStore, sub: str, limit: int, status=None) -> list[list[str]]:
+    pages, cursor = [], None
+    while True:
+        page = await store.get_user_sessions_page(
+            None, sub, limit, cursor=cursor, status=status
+        )
+        pages.append([item.uuid for item in page.items])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+async def test_redis_store_pages_cover_every_session_once(redis):
+    store = RedisSessionStore()
+    sub = str(uuid.uuid4())
+    # Одинаковые timestamp: порядок внутри них задаёт uuid
+    rows = await seed(store, sub, [100.0, 100.0, 100.0, 200.0, 300.5, 300.5, 400.0])
+    expected = [row["uuid"] for row in sorted(rows, key=lambda r: (r["timestamp"], r["uuid"]))]
+
+    pages = await walk(store, sub, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [item for page in pages for item in page] == expected
+
+
+async def test_redis_store_status_filter_fills_pages(redis):
+    store = RedisSessionStore()
+    sub = str(uuid.uuid4())
+    disabled = {index: SessionStatus.DISABLED for index in (0, 1, 2, 4)}
+    rows = await seed(store, sub, [float(i) for i in range(8)], statuses=disabled)
+    active = [row["uuid"] for index, row in enumerate(rows) if index not in disabled]
+
+    pages = await walk(store, sub, limit=2, status=SessionStatus.ACTIVE)
+
+    assert [item for page in pages for item in page] == active
+    assert all(len(page) == 2 for page in pages[:-1])
+
+
+async def test_redis_store_rejects_foreign_cursor(redis):
+    store = RedisSessionStore()
+    sub = str(uuid.uuid4())
+    await seed(store, sub, [1.0])
+
+    with pytest.raises(InvalidCursorException):
+        await store.get_user_sessions_page(None, sub, 10, cursor=encode_cursor("x", "y"))
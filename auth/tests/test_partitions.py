@@ -0,0 +1,31 @@
+from datetime import date, datetime, UTC
+
+from jobs import partitions
+from jobs.partitions import MonthlyPartitions, add_months
+from core.models import SessionHistory
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(date(2025, 12, 1), 1) == date(2026, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -14) == date(2025, 1, 1)
+
+
+def test_current_month_follows_utc(monkeypatch):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # 23:30 UTC 31 января — в UTC+3 уже февраль
+            moment = datetime(2026, 1, 31, 23, 30, tzinfo=UTC)
+            return moment.astimezone(tz) if tz is not None else moment.replace(tzinfo=None)
+
+    monkeypatch.setattr(partitions, "datetime", FixedDatetime)
+
+    assert partitions.current_month() == date(2026, 1, 1)
+
+
+def test_partition_name():
+    assert (
+        MonthlyPartitions(SessionHistory.__table__).partition_name(date(2026, 2, 1))
+        == "session_history_p2026_02"
+    )
@@ -0,0 +1,52 @@
+import uuid
+
+import pytest
+
+from api.exceptions.auth import SessionNotFound
+from core.schemas.token import SessionCreate
+from crud.stores import RedisSessionStore
+from crud.stores import redis as redis_store
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def store(monkeypatch):
+    async def no_sessions(session, sub_id):
+        return []
+
+    monkeypatch.setattr(redis_store.postgres, "get_user_sessions", no_sessions)
+    return RedisSessionStore()
+
+
+def new_session(sub: str) -> SessionCreate:
+    return SessionCreate(uuid=str(uuid.uuid4()), name="device", sub=sub, ip="127.0.0.1")
+
+
+async def upserts(redis) -> list[dict]:
+    entries = await redis.xrange(RedisSessionStore.stream)
+    return [
+        {k.decode(): v.decode() for k, v in fields.items()}
+        for _, fields in entries
+        if fields[b"op"] == b"upsert"
+    ]
+
+
+async def test_repeated_login_emits_the_stored_id(redis, store):
+    sub = str(uuid.uuid4())
+
+    first = await store.create(None, new_session(sub))
+    second = await store.create(None, new_session(sub))
+
+    assert second.uuid == first.uuid
+    stored_id = (await redis.hget(store._session_key(first.uuid), "id")).decode()
+    assert [event["id"] for event in await upserts(redis)] == [stored_id, stored_id]
+
+
+async def test_abort_another_returns_the_aborted_uuid(redis, store):
+    sub = str(uuid.uuid4())
+    created = await store.create(None, new_session(sub))
+
+    assert await store.abort_another(None, sub, created.uuid) == created.uuid
+    with pytest.raises(SessionNotFound):
+        await store.abort_another(None, str(uuid.uuid4()), created.uuid)
@@ -0,0 +1,40 @@
+import importlib.util
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from core.config import RedisConfig
+from core.redis.serializers import get_serializer
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.mark.parametrize("name", ["pydantic", "orjson"])
+def test_roundtrip(name):
+    codec = get_serializer(name, Item)
+    value, raw = codec.dumps([{"id": 1, "name": "a"}])
+    assert value == [Item(id=1, name="a")]
+    assert codec.loads(raw) == value
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("msgpack") is not None,
+    reason="msgpack installed",
+)
+def test_msgpack_without_extra_fails_at_config_time():
+    with pytest.raises(ValidationError, match="msgpack extra"):
+        RedisConfig(serializer="msgpack")
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("msgpack") is None,
+    reason="msgpack extra not installed",
+)
+def test_msgpack_roundtrip():
+    RedisConfig(serializer="msgpack")
+    codec = get_serializer("msgpack", Item)
+    value, raw = codec.dumps({"id": 1, "name": "a"})
+    assert codec.loads(raw) == value
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from jobs.session_gc import SessionGC
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sweeper_survives_unexpected_errors(monkeypatch):
+    monkeypatch.setattr(settings.session_gc, "interval_seconds", 0.01)
+    calls = []
+
+    async def run_once():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("bug in a sweep")
+        return 0, 0
+
+    monkeypatch.setattr(SessionGC, "run_once", run_once)
+    await SessionGC.start()
+    try:
+        async with asyncio.timeout(2):
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+        assert not SessionGC._task.done()
+    finally:
+        await SessionGC.stop()
@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from core.config import settings, ACCESS_TOKEN_TYPE, TOKEN_TYPE_FIELD
+from core.redis.revocation import RevocationSet
+from main import main_app
+from utils import auth as auth_utils
+
+pytestmark = pytest.mark.anyio
+
+VERIFY = settings.api.prefix + settings.api.v1.prefix + settings.api.v1.auth + "/verify"
+
+
+@pytest.fixture(autouse=True)
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings.auth, "verification_mode", "stateless")
+    monkeypatch.setattr(RevocationSet, "_revoked", {})
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def access_token(session_uuid: str) -> str:
+    return auth_utils.encode_jwt(
+        {
+            TOKEN_TYPE_FIELD: ACCESS_TOKEN_TYPE,
+            "sub": str(uuid.uuid4()),
+            "username": "user",
+            "session_uuid": session_uuid,
+        }
+    )
+
+
+async def verify(client: httpx.AsyncClient, token: str) -> int:
+    response = await client.get(VERIFY, headers={"cookie": f"access_token={token}"})
+    return response.status_code
+
+
+async def test_valid_token_is_accepted_without_session_lookup(client):
+    assert await verify(client, access_token("s-ok")) == 200
+
+
+async def test_revoked_session_is_rejected(client):
+    token = access_token("s-revoked")
+    assert await verify(client, token) == 200
+    await RevocationSet.revoke("s-revoked")
+    # Токен уже в кэше проверенных, но отзыв проверяется всё равно
+    assert await verify(client, token) == 401
+
+
+async def test_revocation_from_another_worker_arrives_with_sync(client, redis):
+    token = access_token("s-remote")
+    await redis.zadd(RevocationSet.key, {"s-remote": RevocationSet._expires_at()})
+    assert await verify(client, token) == 200
+    await RevocationSet.sync()
+    assert await verify(client, token) == 401
+
+
+async def test_restored_session_is_accepted_again(client):
+    token = access_token("s-restored")
+    await RevocationSet.revoke("s-restored")
+    assert await verify(client, token) == 401
+    await RevocationSet.restore("s-restored")
+    assert await verify(client, token) == 200
+
+
+async def test_expired_revocations_are_pruned_on_sync(redis):
+    await redis.zadd(RevocationSet.key, {"s-old": 1.0})
+    await RevocationSet.sync()
+    assert not RevocationSet.is_revoked("s-old")
+    assert await redis.zcard(RevocationSet.key) == 0
+
+
+@pytest.fixture
+def during_sync(monkeypatch):
+    """Выполняет action, пока sync ждёт ответа Redis."""
+    state = {"action": None}
+    pipeline = RevocationSet.redis_client.pipeline
+
+    def delayed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def delayed_execute(*a, **kw):
+            result = await execute(*a, **kw)
+            await state["action"]()
+            return result
+
+        pipe.execute = delayed_execute
+        return pipe
+
+    monkeypatch.setattr(RevocationSet.redis_client, "pipeline", delayed_pipeline)
+    return state
+
+
+async def test_revoke_during_sync_is_kept(redis, during_sync):
+    during_sync["action"] = lambda: RevocationSet.revoke("s-late")
+
+    await RevocationSet.sync()
+
+    assert RevocationSet.is_revoked("s-late")
+
+
+async def test_restore_during_sync_is_kept(redis, during_sync):
+    await RevocationSet.revoke("s-back")
+    during_sync["action"] = lambda: RevocationSet.restore("s-back")
+
+    await RevocationSet.sync()
+
+    assert not RevocationSet.is_revoked("s-back")
+
+
+async def test_restore_from_another_worker_arrives_with_sync(redis):
+    await RevocationSet.revoke("s-other")
+    await redis.zrem(RevocationSet.key, "s-other")
+
+    await RevocationSet.sync()
+
+    assert not RevocationSet.is_revoked("s-other")
+
+
+async def test_session_mode_still_prunes(monkeypatch, redis):
+    monkeypatch.setattr(settings.auth, "verification_mode", "session")
+    monkeypatch.setattr(settings.auth, "revocation_sync_seconds", 0.01)
+    await redis.zadd(RevocationSet.key, {"s-old": 1.0})
+    RevocationSet._revoked["s-old"] = 1.0
+
+    await RevocationSet.start()
+    try:
+        await asyncio.sleep(0.05)
+    finally:
+        await RevocationSet.stop()
+
+    assert await redis.zcard(RevocationSet.key) == 0
+    assert "s-old" not in RevocationSet._revoked
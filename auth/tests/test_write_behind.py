@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from core.config import settings
+from core.redis import RedisClient
+from crud.stores import SessionWriteBehind
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(SessionWriteBehind, "retry_delay", 0.01)
+    monkeypatch.setattr(SessionWriteBehind, "_failures", {})
+    monkeypatch.setattr(settings.sessions, "flush_block_ms", 20)
+    monkeypatch.setattr(settings.sessions, "max_flush_attempts", 3)
+
+    # fakeredis не ждёт BLOCK и не отдаёт управление циклу событий
+    xreadgroup = RedisClient.blocking_client.xreadgroup
+
+    async def blocking_xreadgroup(*args, block=None, **kwargs):
+        response = await xreadgroup(*args, block=block, **kwargs)
+        if not response:
+            await asyncio.sleep((block or 0) / 1000)
+        return response
+
+    monkeypatch.setattr(RedisClient.blocking_client, "xreadgroup", blocking_xreadgroup)
+
+
+@pytest.fixture
+def flushed(monkeypatch):
+    """
+    Подменяет запись в Postgres: failures(uuids) решает, упасть ли пачке;
+    подтверждение и удаление из потока — настоящие.
+    """
+    applied: list[str] = []
+    state = {"fail": lambda uuids: None}
+
+    async def flush(cls, entries):
+        uuids = [fields[b"uuid"].decode() for _, fields in entries]
+        if (error := state["fail"](uuids)) is not None:
+            raise error
+        applied.extend(uuids)
+        await cls._ack([entry_id for entry_id, _ in entries])
+
+    monkeypatch.setattr(SessionWriteBehind, "flush", classmethod(flush))
+    return applied, state
+
+
+async def add_events(redis, *uuids: str):
+    for uuid in uuids:
+        await redis.xadd(SessionWriteBehind.stream, {"op": "status", "uuid": uuid, "status": "expired"})
+
+
+async def run_until(condition, timeout: float = 3.0):
+    task = asyncio.create_task(SessionWriteBehind._run())
+    try:
+        async with asyncio.timeout(timeout):
+            while not await condition():
+                assert not task.done(), task.exception()
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def test_unacked_entries_are_replayed_after_db_outage(redis, flushed):
+    applied, state = flushed
+    outages = iter([OperationalError("INSERT", {}, ConnectionError("down"))] * 2)
+    state["fail"] = lambda uuids: next(outages, None)
+    await add_events(redis, "a", "b", "c")
+
+    await run_until(lambda: _stream_empty(redis))
+
+    assert applied == ["a", "b", "c"]
+    assert (await redis.xpending(SessionWriteBehind.stream, SessionWriteBehind.group))["pending"] == 0
+
+
+async def test_rejected_entry_goes_to_dead_letter_stream(redis, flushed):
+    applied, state = flushed
+    state["fail"] = lambda uuids: (
+        IntegrityError("INSERT", {}, ValueError("duplicate uuid")) if "bad" in uuids else None
+    )
+    await add_events(redis, "a", "bad", "c")
+
+    await run_until(lambda: _stream_empty(redis))
+
+    assert applied == ["a", "c"]
+    [(_, fields)] = await redis.xrange(SessionWriteBehind.dead_stream)
+    assert fields[b"uuid"] == b"bad"
+    assert b"duplicate uuid" in fields[b"dead_error"]
+
+
+async def test_unexpected_error_does_not_stop_the_writer(redis, flushed):
+    applied, state = flushed
+    errors = iter([RuntimeError("bug")])
+    state["fail"] = lambda uuids: next(errors, None)
+    await add_events(redis, "a")
+
+    await run_until(lambda: _stream_empty(redis))
+
+    assert applied == ["a"]
+    assert await redis.xlen(SessionWriteBehind.dead_stream) == 0
+
+
+async def _stream_empty(redis) -> bool:
+    return await redis.xlen(SessionWriteBehind.stream) == 0
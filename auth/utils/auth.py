@@ -1,3 +1,8 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 import bcrypt
 
@@ -7,11 +12,29 @@ from api.exceptions.auth import (
     TokenTypeException,
 )
 from core.config import settings, TOKEN_TYPE_FIELD
+from utils.executor import crypto_executor
+from utils.keyring import KeyRing
+
+# Ключи разбираются один раз, а не на каждый вызов PyJWT
+keyring = KeyRing.from_settings()
+
+# digest токена -> (payload, exp, kid) уже проверенных токенов
+_verified: OrderedDict[bytes, tuple[dict, float, str]] = OrderedDict()
+# decode_jwt может выполняться в пуле потоков
+_verified_lock = threading.Lock()
+
+
+def load_keys() -> None:
+    """Читает и разбирает ключи. Повторный вызов — горячая перезагрузка ключей."""
+    keyring.load()
+    with _verified_lock:
+        _verified.clear()
+    crypto_executor.reset()
 
 
 def encode_jwt(
     payload: dict,
-    private_key: str = settings.auth.private_key_path.read_text(),
+    private_key=None,
     algorithm: str = settings.auth.algorithm,
     expire_timedelta: timedelta | None = timedelta(minutes=settings.auth.access_token_expire_minutes),
 ):
@@ -19,23 +42,77 @@ def encode_jwt(
     now = datetime.now(UTC)
     expire = now + expire_timedelta
     to_encode.update(exp=expire, iat=now)
+    headers = None
+    if private_key is None:
+        signing_key = keyring.signing_key()
+        private_key, algorithm = signing_key.private_key, signing_key.algorithm
+        headers = {"kid": signing_key.kid}
     encoded = jwt.encode(
         payload=to_encode,
         key=private_key,
         algorithm=algorithm,
+        headers=headers,
     )
     return encoded
 
 
+def _token_digest(token: str | bytes) -> bytes:
+    if isinstance(token, str):
+        token = token.encode()
+    return hashlib.blake2b(token, digest_size=16).digest()
+
+
+def peek_verified(token: str | bytes) -> dict | None:
+    """Payload уже проверенного и ещё не истёкшего токена, без проверки подписи."""
+    digest = _token_digest(token)
+    with _verified_lock:
+        cached = _verified.get(digest)
+        if cached is None:
+            return None
+        payload, exp, kid = cached
+        if exp > time.time() and keyring.verification_key(kid):
+            _verified.move_to_end(digest)
+            return payload.copy()
+        del _verified[digest]
+    return None
+
+
 def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.auth.public_key_path.read_text(),
+    public_key=None,
     algorithm: str = settings.auth.algorithm,
 ):
-    decoded = jwt.decode(token, public_key, algorithms=[algorithm])
+    if public_key is not None:
+        return jwt.decode(token, public_key, algorithms=[algorithm])
+
+    # Повторная проверка того же токена до его exp не требует подписи
+    if (payload := peek_verified(token)) is not None:
+        return payload
+
+    key = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+    if key is None:
+        raise jwt.InvalidSignatureError("Unknown or retired signing key")
+    # Алгоритм берётся из ключа, а не из заголовка токена
+    decoded = jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+    remember_verified(token, decoded, key.kid)
     return decoded
 
 
+def remember_verified(token: str | bytes, payload: dict, kid: str | None = None) -> None:
+    """Запоминает токен, подпись которого уже проверена."""
+    if not settings.auth.verified_token_cache_size or "exp" not in payload:
+        return
+    if kid is None:
+        kid = jwt.get_unverified_header(token).get("kid") or keyring.default_kid
+    with _verified_lock:
+        _verified[_token_digest(token)] = (payload.copy(), payload["exp"], kid)
+        if len(_verified) > settings.auth.verified_token_cache_size:
+            _verified.popitem(last=False)
+
+
+load_keys()
+
+
 def hash_password(password: str) -> bytes:
     salt = bcrypt.gensalt()
     pwd_bytes: bytes = password.encode()
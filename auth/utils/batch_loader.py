@@ -0,0 +1,86 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class BatchLoaderStats:
+    batches: int = 0
+    keys: int = 0
+    # Запросы, получившие результат чужого запроса того же ключа
+    deduplicated: int = 0
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Собирает одиночные запросы по ключу, пришедшие в течение window_ms,
+    в один вызов batch_fn и раздаёт результаты ожидающим.
+
+    batch_fn получает уникальные ключи и возвращает словарь ключ → значение;
+    отсутствующий в словаре ключ даёт None. Пачка уходит раньше окна,
+    если набралось max_batch ключей.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[K]], Awaitable[dict[K, V]]],
+        window_ms: float = 1.0,
+        max_batch: int = 256,
+    ) -> None:
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = BatchLoaderStats()
+        self._pending: dict[K, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.window, self._flush
+                )
+        else:
+            self.stats.deduplicated += 1
+        # Отмена одного запроса не должна отменять загрузку для остальных
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: dict[K, asyncio.Future]) -> None:
+        self.stats.batches += 1
+        self.stats.keys += len(batch)
+        try:
+            results = await self.batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Ожидающих могли отменить — не логировать как забытое
+                    future.exception()
+            return
+        except BaseException:
+            for future in batch.values():
+                future.cancel()
+            raise
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+
+from core.config import settings
+
+
+@dataclass
+class ExecutorStats:
+    submitted: int = 0
+    completed: int = 0
+    inline: int = 0
+    # Отправлено в пул и ещё не завершено: выполняется или ждёт свободного
+    # исполнителя
+    in_flight: int = 0
+    # Выполняется прямо сейчас; считается только в режиме thread —
+    # начало задачи в дочернем процессе отсюда не видно
+    running: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class CryptoExecutor:
+    """
+    Выполняет CPU-ёмкие операции (подпись и проверка JWT) вне цикла событий,
+    чтобы RSA одного запроса не задерживала остальные запросы воркера.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["inline", "thread", "process"] = "thread",
+        max_workers: int | None = None,
+        inline_max_bytes: int = 0,
+    ) -> None:
+        self.mode = mode
+        self.max_workers = max_workers
+        self.inline_max_bytes = inline_max_bytes
+        self.stats = ExecutorStats()
+        self._pool: Executor | None = None
+        self._running_lock = threading.Lock()
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="crypto"
+                )
+        return self._pool
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Выполняется в потоке пула."""
+        with self._running_lock:
+            self.stats.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._running_lock:
+                self.stats.running -= 1
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        size: int | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """size — размер входа операции, если её стоимость от него зависит."""
+        if self.mode == "inline" or (size is not None and size <= self.inline_max_bytes):
+            self.stats.inline += 1
+            return fn(*args, **kwargs)
+
+        stats = self.stats
+        stats.submitted += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        pool = self._get_pool()
+        if self.mode == "thread":
+            call = pool.submit(self._call, fn, args, kwargs)
+        else:
+            call = pool.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(call)
+        finally:
+            latency = time.perf_counter() - started
+            stats.in_flight -= 1
+            stats.completed += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+
+    def reset(self) -> None:
+        """
+        Процессы пула разбирают ключи JWT при запуске и горячую перезагрузку
+        в основном процессе не видят: пул пересоздаётся при следующем вызове,
+        а уже отправленные задачи дорабатывают в старом.
+        """
+        if self.mode == "process" and self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+crypto_executor = CryptoExecutor(
+    mode=settings.executor.mode,
+    max_workers=settings.executor.max_workers,
+    inline_max_bytes=settings.executor.inline_max_bytes,
+)
@@ -0,0 +1,83 @@
+import asyncio
+import re
+import time
+
+import httpx
+from jwt import PyJWK, PyJWKSet
+from jwt.exceptions import PyJWKSetError
+from loguru import logger as log
+
+from core.http import HttpClient
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSCache:
+    """
+    Асинхронный кэш JWKS внешнего провайдера.
+
+    Ключи живут столько, сколько разрешает Cache-Control: max-age ответа.
+    Истёкший набор продолжает использоваться, пока в фоне загружается
+    новый; незнакомый kid вызывает внеочередную загрузку, но не чаще
+    min_refetch_seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        default_max_age: int = 300,
+        min_refetch_seconds: float = 30.0,
+    ) -> None:
+        self.url = url
+        self.default_max_age = default_max_age
+        self.min_refetch_seconds = min_refetch_seconds
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._background: asyncio.Task | None = None
+
+    def _max_age(self, response: httpx.Response) -> int:
+        if match := _MAX_AGE.search(response.headers.get("Cache-Control", "")):
+            return int(match.group(1))
+        return self.default_max_age
+
+    async def _fetch(self) -> None:
+        response = await HttpClient.get().get(self.url)
+        response.raise_for_status()
+        jwk_set = PyJWKSet.from_dict(response.json())
+        now = time.monotonic()
+        self._keys = {key.key_id: key for key in jwk_set.keys}
+        self._fetched_at = now
+        self._expires_at = now + self._max_age(response)
+
+    async def refresh(self) -> None:
+        """Загружает JWKS; одновременные вызовы ждут одну загрузку."""
+        fetched_at = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != fetched_at:
+                return
+            await self._fetch()
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except (httpx.HTTPError, PyJWKSetError) as e:
+            log.warning("JWKS refresh from %s failed: %s" % (self.url, e))
+
+    def _refresh_in_background(self) -> None:
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._refresh_quietly())
+
+    async def get_signing_key(self, kid: str | None) -> PyJWK | None:
+        if not self._keys:
+            await self.refresh()
+        elif time.monotonic() >= self._expires_at:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at >= self.min_refetch_seconds:
+            # Возможно, провайдер уже сменил ключи
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
@@ -0,0 +1,110 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Any
+
+from jwt.algorithms import get_default_algorithms
+
+from core.config import settings, JWTKey
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+@dataclass(frozen=True)
+class LoadedKey:
+    kid: str
+    algorithm: str
+    private_key: Any | None
+    public_key: Any
+    active_from: datetime | None = None
+    retire_at: datetime | None = None
+
+    def is_retired(self, now: datetime) -> bool:
+        return self.retire_at is not None and self.retire_at <= now
+
+    def can_sign(self, now: datetime) -> bool:
+        return (
+            self.private_key is not None
+            and not self.is_retired(now)
+            and (self.active_from is None or self.active_from <= now)
+        )
+
+
+class KeyRing:
+    """
+    Ключи подписи JWT, различаемые по kid в заголовке токена.
+
+    Подписывает самый свежий ключ, чей active_from уже наступил; проверять
+    можно любым ключом до его retire_at. Ротация планируется датами в
+    настройках и не требует перезапуска.
+    """
+
+    def __init__(self, configs: list[JWTKey]) -> None:
+        self.configs = configs
+        self._keys: dict[str, LoadedKey] = {}
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        if settings.auth.keys:
+            return cls(settings.auth.keys)
+        # Одна пара ключей из старых настроек; kid — отпечаток публичного ключа
+        public_pem = settings.auth.public_key_path.read_bytes()
+        legacy = JWTKey(
+            kid=hashlib.sha256(public_pem).hexdigest()[:16],
+            algorithm=settings.auth.algorithm,
+            private_key_path=settings.auth.private_key_path,
+            public_key_path=settings.auth.public_key_path,
+        )
+        return cls([legacy])
+
+    def load(self) -> None:
+        algorithms = get_default_algorithms()
+        keys = {}
+        for config in self.configs:
+            algorithm = algorithms[config.algorithm]
+            private_key = None
+            if config.private_key_path is not None:
+                private_key = algorithm.prepare_key(config.private_key_path.read_text())
+            keys[config.kid] = LoadedKey(
+                kid=config.kid,
+                algorithm=config.algorithm,
+                private_key=private_key,
+                public_key=algorithm.prepare_key(config.public_key_path.read_text()),
+                active_from=_as_utc(config.active_from),
+                retire_at=_as_utc(config.retire_at),
+            )
+        self._keys = keys
+
+    @property
+    def default_kid(self) -> str:
+        """Ключ для токенов, выпущенных до появления kid в заголовке."""
+        return self.configs[0].kid
+
+    def signing_key(self) -> LoadedKey:
+        now = datetime.now(UTC)
+        candidates = [key for key in self._keys.values() if key.can_sign(now)]
+        if not candidates:
+            raise RuntimeError("No active JWT signing key")
+        return max(candidates, key=lambda k: k.active_from or datetime.min.replace(tzinfo=UTC))
+
+    def verification_key(self, kid: str | None) -> LoadedKey | None:
+        key = self._keys.get(kid or self.default_kid)
+        if key is None or key.is_retired(datetime.now(UTC)):
+            return None
+        return key
+
+    def jwks(self) -> dict:
+        now = datetime.now(UTC)
+        algorithms = get_default_algorithms()
+        keys = []
+        for key in self._keys.values():
+            if key.is_retired(now):
+                continue
+            jwk = algorithms[key.algorithm].to_jwk(key.public_key, as_dict=True)
+            jwk.update(kid=key.kid, alg=key.algorithm, use="sig")
+            keys.append(jwk)
+        return {"keys": keys}
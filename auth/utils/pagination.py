@@ -0,0 +1,58 @@
+import base64
+import binascii
+import math
+import uuid
+from datetime import datetime
+from typing import Any, Callable
+
+import orjson
+
+from api.exceptions.auth import InvalidCursorException
+
+
+def encode_cursor(*values: Any) -> str:
+    """Непрозрачный курсор keyset-пагинации: значения ключа последней строки."""
+    return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> list[Any]:
+    """
+    Значения курсора, разобранные parsers; курсор, выданный не нами,
+    даёт InvalidCursorException.
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidCursorException
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise InvalidCursorException
+    try:
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (TypeError, ValueError):
+        raise InvalidCursorException
+
+
+# Разборщики значений курсора: всё, что не прошло бы сравнение или
+# привязку параметра в запросе, — ValueError/TypeError, то есть 400
+
+
+def parse_uuid(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError("uuid must be a string")
+    return str(uuid.UUID(value))
+
+
+def parse_naive_datetime(value: Any) -> datetime:
+    """timestamp сессий хранится без часового пояса."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError("timestamp must be naive")
+    return parsed
+
+
+def parse_score(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError("score must be a number")
+    if not math.isfinite(value):
+        raise ValueError("score must be finite")
+    return float(value)
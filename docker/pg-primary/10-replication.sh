@@ -0,0 +1,5 @@
+#!/bin/sh
+# Разрешает потоковую репликацию для сервиса pg-replica (профиль replica).
+# Скрипты initdb выполняются только при создании тома pg_data
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"